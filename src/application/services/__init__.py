@@ -0,0 +1,24 @@
+"""
+Application Services パッケージ初期化
+"""
+from .parallel_extraction import ExtractionOutcome, extract_and_filter, iter_extractions
+from .near_duplicates import MinHasher, NearDuplicateIndex, estimate_jaccard
+from .pipeline import Pipeline, PipelineAborted, StageQueue, StageStats
+from .rank_fusion import reciprocal_rank_fusion
+from .text_chunker import TextChunker, approximate_token_count
+
+__all__ = [
+    "ExtractionOutcome",
+    "extract_and_filter",
+    "iter_extractions",
+    "MinHasher",
+    "NearDuplicateIndex",
+    "estimate_jaccard",
+    "Pipeline",
+    "PipelineAborted",
+    "StageQueue",
+    "StageStats",
+    "reciprocal_rank_fusion",
+    "TextChunker",
+    "approximate_token_count",
+]
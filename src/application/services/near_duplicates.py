@@ -0,0 +1,131 @@
+"""
+MinHash/LSH によるほぼ重複ページの検出
+
+wget ミラーにはバージョン違いのコピー、index.html とディレクトリ URL、印刷用ページなど、
+ほとんど同じ本文のページが多い。抽出後のテキストを単語 n-gram の集合として MinHash 署名を作り、
+LSH（バンド分割）で候補を絞ってから推定 Jaccard 係数で重複と判定する。
+"""
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# (a * x + b) mod p が uint64 に収まる 2^32 未満の素数
+_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+# 署名の計算で一度に処理するシングル数（一時配列のメモリを抑える）
+_SHINGLE_BLOCK = 4096
+_WORD_RE = re.compile(r"\w+")
+
+
+class MinHasher:
+    """単語シングルの MinHash 署名を計算する（パラメータは固定シードで再現可能）"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            num_perm: 署名の長さ（ハッシュ関数の数）
+            shingle_size: シングル（単語 n-gram）の単語数
+            seed: ハッシュ関数の係数を決める乱数シード（署名を永続化するため固定）
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2**32 - 5, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32 - 5, size=num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        size = min(self.shingle_size, len(words))
+        hashes = {
+            zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+            for i in range(len(words) - size + 1)
+        }
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash 署名（uint32 配列）。単語がなければ None"""
+        hashes = self._shingle_hashes(text)
+        if hashes.size == 0:
+            return None
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, hashes.size, _SHINGLE_BLOCK):
+            block = hashes[start:start + _SHINGLE_BLOCK, None]
+            permuted = (block * self._a + self._b) % _PRIME
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """2つの署名から Jaccard 係数を推定"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """LSH で近い署名を探し、閾値以上のものを重複として返すインデックス"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.9):
+        """
+        Args:
+            num_perm: 署名の長さ（bands で割り切れること）
+            bands: LSH のバンド数（多いほど低い類似度でも候補になる）
+            threshold: 重複とみなす推定 Jaccard 係数の下限
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self._rows = num_perm // bands
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self._rows:(band + 1) * self._rows].tobytes()
+
+    def add(self, path: str, signature: np.ndarray) -> None:
+        """正規ドキュメントとして署名を登録（同じパスの古い署名は置き換える）"""
+        if len(signature) != self.num_perm:
+            return
+        self.remove(path)
+        self._signatures[path] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(path)
+
+    def remove(self, path: str) -> None:
+        """登録済みの署名を取り除く"""
+        signature = self._signatures.pop(path, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket and path in bucket:
+                bucket.remove(path)
+
+    def find_duplicate(self, path: str, signature: np.ndarray) -> Optional[str]:
+        """
+        閾値以上に近い登録済みドキュメントのパスを返す（最も近いもの。なければ None）
+
+        path 自身の登録は候補から除く（再索引時に自分自身と一致させないため）。
+        """
+        if len(signature) != self.num_perm:
+            return None
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(path)
+
+        best_path, best_score = None, -1.0
+        # 同点の場合に結果が実行ごとに変わらないようパス順に比較する
+        for candidate in sorted(candidates):
+            score = estimate_jaccard(signature, self._signatures[candidate])
+            if score >= self.threshold and score > best_score:
+                best_path, best_score = candidate, score
+        return best_path
@@ -0,0 +1,133 @@
+"""
+テキスト抽出とコンテンツポリシー判定の並列実行
+
+抽出（trafilatura + clean_text）とポリシー判定は CPU バウンドな純 Python 処理のため、
+ProcessPoolExecutor でコア数に応じてスケールさせる。
+呼び出し元はパイプラインのスレッドやモデルのスレッドプールを抱えているため、
+fork でワーカーを作るとロック状態ごと複製されて固まることがある。
+ワーカーは forkserver（使えない環境では spawn）で起動する。
+モデルと DB 書き込みはメインプロセスが保持し、ここでは結果を順番に返すだけにする。
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+# 抽出対象: パス、または (パス, 計算済みのファイル内容ハッシュ)
+ExtractionTarget = Union[str, Tuple[str, Optional[str]]]
+
+
+@dataclass
+class ExtractionOutcome:
+    """1ファイル分の抽出・判定結果"""
+    path: str
+    text: str = ""
+    meaningful: bool = False
+    error: Optional[str] = None  # 抽出時の例外メッセージ
+
+
+def extract_and_filter(
+    extract_text_func: Callable,
+    content_policy,
+    path: str,
+    content_hash: Optional[str] = None
+) -> ExtractionOutcome:
+    """
+    テキストを抽出し、コンテンツポリシーで判定する
+
+    content_hash がある場合は extract_text_func(path, content_hash=...) として渡す
+    （抽出キャッシュのキーに使い、ファイルを再度ハッシュしない）。
+    """
+    try:
+        if content_hash is None:
+            text = extract_text_func(path)
+        else:
+            text = extract_text_func(path, content_hash=content_hash)
+    except Exception as e:
+        return ExtractionOutcome(path=path, error=str(e))
+
+    if not text.strip():
+        return ExtractionOutcome(path=path, text=text)
+
+    return ExtractionOutcome(
+        path=path,
+        text=text,
+        meaningful=content_policy.is_meaningful_for(path, text)
+    )
+
+
+def _worker_context():
+    """スレッドを複製しない起動方式のコンテキストを返す"""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _split_target(target: ExtractionTarget) -> Tuple[str, Optional[str]]:
+    if isinstance(target, str):
+        return target, None
+    return target
+
+
+def _extract_chunk(
+    extract_text_func: Callable,
+    content_policy,
+    targets: List[ExtractionTarget]
+) -> List[ExtractionOutcome]:
+    """ワーカープロセスで複数ファイルをまとめて処理する"""
+    return [
+        extract_and_filter(extract_text_func, content_policy, *_split_target(target))
+        for target in targets
+    ]
+
+
+def iter_extractions(
+    paths: Iterable[ExtractionTarget],
+    extract_text_func: Callable,
+    content_policy,
+    workers: int = 1,
+    chunk_size: int = 16
+) -> Iterator[ExtractionOutcome]:
+    """
+    ファイルを抽出・判定し、入力順に結果を返す
+
+    Args:
+        paths: ファイルパス、または (パス, ファイル内容ハッシュ) のイテラブル（ジェネレータ可）
+        extract_text_func: テキスト抽出関数（workers > 1 の場合は pickle 可能であること）
+        content_policy: コンテンツポリシー
+        workers: ワーカープロセス数（1 以下ならメインプロセスで逐次処理）
+        chunk_size: 1タスクとしてワーカーに渡すファイル数
+
+    Yields:
+        ExtractionOutcome
+    """
+    if workers <= 1:
+        for target in paths:
+            yield extract_and_filter(extract_text_func, content_policy, *_split_target(target))
+        return
+
+    task = partial(_extract_chunk, extract_text_func, content_policy)
+    iterator = iter(paths)
+    # 投入済みタスク数を抑えてメモリ使用量を一定に保つ
+    max_in_flight = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context()) as executor:
+        in_flight = deque()
+
+        def submit_next() -> bool:
+            chunk = list(islice(iterator, max(1, chunk_size)))
+            if not chunk:
+                return False
+            in_flight.append(executor.submit(task, chunk))
+            return True
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        while in_flight:
+            outcomes = in_flight.popleft().result()
+            submit_next()
+            yield from outcomes
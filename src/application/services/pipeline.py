@@ -0,0 +1,153 @@
+"""
+スレッドで段をつないだプロデューサ/コンシューマ型パイプライン
+
+各段は専用スレッドで動き、段の間は上限付きキューでつなぐ。
+下流が詰まると上流の put がブロックするため（バックプレッシャー）、
+同時に保持するデータ量はキューの上限で頭打ちになる。
+どこかの段で例外が起きると停止イベントを立てて全段を止め、run() で再送出する。
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List
+
+# 停止イベントを確認する間隔（秒）
+_POLL_SECONDS = 0.1
+
+# ストリーム終端を表す番兵
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """他の段の失敗によりパイプラインが停止した"""
+
+
+@dataclass
+class StageStats:
+    """段ごとの処理件数と時間"""
+    name: str
+    items: int = 0  # 段が処理した件数（単位は段ごとに異なる）
+    elapsed_seconds: float = 0.0  # 段のスレッドが動いていた時間
+    wait_seconds: float = 0.0  # キューの get/put で待っていた時間
+
+    @property
+    def busy_seconds(self) -> float:
+        """キュー待ちを除いた処理時間"""
+        return max(0.0, self.elapsed_seconds - self.wait_seconds)
+
+    @property
+    def throughput(self) -> float:
+        """処理時間あたりの件数（件/秒）"""
+        busy = self.busy_seconds
+        return self.items / busy if busy > 0 else 0.0
+
+
+class StageQueue:
+    """停止イベントを見ながら待つ上限付きキュー"""
+
+    def __init__(self, maxsize: int, stop_event: threading.Event):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = stop_event
+
+    def put(self, item, stats: StageStats = None) -> None:
+        """要素を追加（満杯なら空くまで待つ）"""
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineAborted()
+            try:
+                self._queue.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        if stats is not None:
+            stats.wait_seconds += time.perf_counter() - start
+
+    def get(self, stats: StageStats = None):
+        """要素を取り出す（空なら届くまで待つ）"""
+        start = time.perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise PipelineAborted()
+            try:
+                item = self._queue.get(timeout=_POLL_SECONDS)
+                break
+            except queue.Empty:
+                continue
+        if stats is not None:
+            stats.wait_seconds += time.perf_counter() - start
+        return item
+
+    def close(self, stats: StageStats = None) -> None:
+        """これ以上要素を追加しないことを下流に伝える"""
+        self.put(_DONE, stats)
+
+    def iterate(self, stats: StageStats = None) -> Iterator:
+        """close() されるまで要素を順に返す"""
+        while True:
+            item = self.get(stats)
+            if item is _DONE:
+                return
+            yield item
+
+
+class Pipeline:
+    """段（スレッド）とキューを束ね、まとめて起動・停止する"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self.stats: List[StageStats] = []
+
+    def queue(self, maxsize: int) -> StageQueue:
+        """このパイプラインの停止イベントに連動するキューを作成"""
+        return StageQueue(maxsize, self._stop)
+
+    def add_stage(self, name: str, func: Callable, *args) -> StageStats:
+        """
+        段を登録する（run() で起動）
+
+        func は func(stats, *args) として呼ばれ、出力キューがあれば最後に close() すること。
+        """
+        stats = StageStats(name)
+        self.stats.append(stats)
+        self._threads.append(
+            threading.Thread(
+                target=self._run_stage,
+                args=(stats, func, args),
+                name=f"pipeline-{name}",
+                daemon=True
+            )
+        )
+        return stats
+
+    def _run_stage(self, stats: StageStats, func: Callable, args: tuple) -> None:
+        start = time.perf_counter()
+        try:
+            func(stats, *args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            stats.elapsed_seconds = time.perf_counter() - start
+
+    def run(self) -> List[StageStats]:
+        """全段を起動して完了を待つ（いずれかの段の例外はここで再送出）"""
+        for thread in self._threads:
+            thread.start()
+        try:
+            for thread in self._threads:
+                thread.join()
+        except BaseException:
+            # Ctrl+C などで待機が中断された場合も全段を止めてから抜ける
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+            raise
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
@@ -0,0 +1,36 @@
+"""
+Reciprocal Rank Fusion（RRF）による検索結果の統合
+
+スコアの尺度が異なる検索（ベクトルの距離と BM25）を、順位だけを使って1つの順位にまとめる。
+各結果のスコアは、それぞれの検索での順位 r（1 始まり）について 1 / (k + r) を足したもの。
+"""
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+# RRF の定数 k（元論文の既定値。上位の順位差の影響を和らげる）
+DEFAULT_RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = DEFAULT_RRF_K,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[Hashable, float]]:
+    """
+    複数の順位付きリストを RRF で統合する
+
+    Args:
+        rankings: 検索ごとの結果キーのリスト（良い順）
+        k: RRF の定数
+        weights: 検索ごとの重み（省略時はすべて 1）
+
+    Returns:
+        (キー, RRF スコア) のスコア降順のリスト。同点は先に現れた順
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    # sorted は安定なので、同点は最初に現れた順のまま
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,107 @@
+"""
+ドキュメントをトークン数で区切った重なりのあるパッセージに分割する
+
+all-MiniLM-L6-v2 は先頭 256 トークンしか読まないため、ページ全体を1本の
+ベクトルにすると大半の本文が検索に反映されない。行（clean_text 後はほぼ文単位）を
+まとめてトークン上限内のパッセージにし、前後のパッセージを一部重ねて文脈を保つ。
+"""
+import re
+from typing import Callable, List, Optional
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def approximate_token_count(text: str) -> int:
+    """
+    単語と記号の数でトークン数を近似する（WordPiece のトークン数の下限に近い）
+    """
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+class TextChunker:
+    """トークン上限付き・オーバーラップありのパッセージ分割"""
+
+    def __init__(
+        self,
+        max_tokens: int = 250,
+        overlap_tokens: int = 50,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Args:
+            max_tokens: 1パッセージの最大トークン数
+            overlap_tokens: 直前のパッセージから引き継ぐ最大トークン数
+            count_tokens: トークン数を数える関数（省略時は近似）
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens)")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens or approximate_token_count
+
+    def split(self, text: str) -> List[str]:
+        """
+        テキストをパッセージに分割する
+
+        Returns:
+            パッセージのリスト（空のテキストなら空リスト）
+        """
+        units = self._split_units(text)
+        chunks: List[str] = []
+        current: List[tuple] = []  # (テキスト, トークン数)
+        current_tokens = 0
+
+        for unit, tokens in units:
+            if current and current_tokens + tokens > self.max_tokens:
+                chunks.append("\n".join(u for u, _ in current))
+                current, current_tokens = self._overlap_tail(current, tokens)
+            current.append((unit, tokens))
+            current_tokens += tokens
+
+        if current:
+            chunks.append("\n".join(u for u, _ in current))
+        return chunks
+
+    def _overlap_tail(self, units: List[tuple], next_tokens: int) -> tuple:
+        """次のパッセージに引き継ぐ末尾のユニットを選ぶ"""
+        budget = min(self.overlap_tokens, self.max_tokens - next_tokens)
+        tail: List[tuple] = []
+        total = 0
+        for unit, tokens in reversed(units):
+            if total + tokens > budget:
+                break
+            tail.insert(0, (unit, tokens))
+            total += tokens
+        return tail, total
+
+    def _split_units(self, text: str) -> List[tuple]:
+        """行単位に分け、上限を超える行は単語単位でさらに分割する"""
+        units = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            tokens = self.count_tokens(line)
+            if tokens <= self.max_tokens:
+                units.append((line, tokens))
+                continue
+            units.extend(self._split_long_line(line))
+        return units
+
+    def _split_long_line(self, line: str) -> List[tuple]:
+        """上限を超える1行を単語境界で上限以下の断片に分ける"""
+        pieces = []
+        words: List[str] = []
+        words_tokens = 0
+        for word in line.split():
+            tokens = self.count_tokens(word)
+            if words and words_tokens + tokens > self.max_tokens:
+                pieces.append((" ".join(words), words_tokens))
+                words, words_tokens = [], 0
+            words.append(word)
+            words_tokens += tokens
+        if words:
+            pieces.append((" ".join(words), words_tokens))
+        return pieces
@@ -1,26 +1,56 @@
 """
 ドキュメント索引構築ユースケース
+
+索引構築は次の段をスレッドでつないだパイプラインとして実行する。
+
+    走査（マニフェスト照合・ハッシュ） → 抽出・判定（プロセスプール可） → 埋め込み → SQLite 書き込み
+
+段の間は上限付きキューでつなぐため、ディスク・CPU・モデルが同時に働きつつ、
+メモリ上に保持するドキュメント数は queue_size × batch_size 程度で頭打ちになる。
+SQLite への書き込みは書き込み段の1スレッドだけが行う。
 """
-from dataclasses import dataclass
-from typing import Optional, Callable
+from dataclasses import dataclass, field, fields
+from typing import Optional, Callable, Dict, Iterable, Iterator, List, Tuple
 from pathlib import Path
+import hashlib
+import os
 import sys
 
+import numpy as np
+
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from domain.entities import Document
+from domain.entities import Document, FileManifestEntry
 from domain.repositories import DocumentRepository
+from application.services import (
+    MinHasher,
+    NearDuplicateIndex,
+    Pipeline,
+    StageQueue,
+    StageStats,
+    TextChunker,
+    iter_extractions,
+)
 from infrastructure.models import EmbeddingModel
 from policies.content_policy import ContentPolicy
+from utils.file_hash import compute_file_hash
 
 
 @dataclass
 class BuildIndexRequest:
     """索引構築リクエスト"""
-    files: list  # ファイルパスのリスト
+    files: Iterable[str]  # ファイルパスのイテラブル（ジェネレータなら走査段で逐次消費）
     category: str = ""
     max_text_length: int = 120000
+    batch_size: int = 32  # 1回の埋め込み・保存でまとめるドキュメント数
+    embed_batch_size: int = 64  # モデルの1回の順伝播で処理するパッセージ数
+    incremental: bool = True  # False の場合はマニフェストを無視して全件再処理
+    workers: int = 1  # 抽出・ポリシー判定を行うプロセス数（1 なら抽出段のスレッドで逐次処理）
+    extraction_chunk_size: int = 16  # 1タスクでワーカーに渡すファイル数
+    queue_size: int = 4  # 段の間に溜められるバッチ数（メモリ上限を決める）
+    use_embedding_cache: bool = True  # 同一テキストの埋め込みを DB のキャッシュから再利用する
+    near_duplicate_threshold: float = 0.9  # ほぼ重複とみなす推定 Jaccard 係数（0 以下で検出しない）
 
 
 @dataclass
@@ -29,6 +59,55 @@ class BuildIndexResponse:
     new_documents: int
     updated_documents: int
     skipped_documents: int
+    unchanged_documents: int = 0
+    duplicate_documents: int = 0  # ほぼ重複として別名だけを記録したページ数
+    embedding_cache_hits: int = 0  # キャッシュ（またはバッチ内の同一テキスト）で賄ったパッセージ数
+    embedding_cache_misses: int = 0  # モデルで埋め込んだパッセージ数
+    stage_stats: List[StageStats] = field(default_factory=list, compare=False)
+
+
+@dataclass
+class _PendingDocument:
+    """埋め込み待ちのドキュメント"""
+    document: Document
+    passages: List[str]
+    manifest_entry: FileManifestEntry
+    signature: Optional[np.ndarray] = None  # MinHash 署名（重複検出が無効なら None）
+
+
+@dataclass
+class _ScannedFile:
+    """走査段の結果（changed=False ならマニフェストの更新のみ）"""
+    entry: FileManifestEntry
+    changed: bool = True
+
+
+@dataclass
+class _Batch:
+    """段の間を流れるバッチ"""
+    pending: List[_PendingDocument]
+    manifest_updates: List[FileManifestEntry]
+    # (ドキュメント位置, チャンク番号, パッセージ) を長さ順に並べたもの
+    passages: list = field(default_factory=list)
+    embeddings: object = None
+    # 新たに埋め込んだ分（書き込み段で埋め込みキャッシュに保存する）
+    cache_keys: List[str] = field(default_factory=list)
+    cache_embeddings: object = None
+    # ほぼ重複として索引しないページ（別名パス → 正規ドキュメントのパス）
+    aliases: Dict[str, str] = field(default_factory=dict)
+    # 別名になったため削除する既存ドキュメントのID
+    stale_document_ids: List[int] = field(default_factory=list)
+    # マニフェストを補完した索引済みドキュメントの MinHash 署名（パス → 署名）
+    signatures: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+def embedding_cache_key(model_id: str, text: str) -> str:
+    """埋め込みキャッシュのキー（モデルIDと埋め込み入力そのもののハッシュ）"""
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _new_tally() -> BuildIndexResponse:
+    return BuildIndexResponse(new_documents=0, updated_documents=0, skipped_documents=0)
 
 
 class BuildIndexUseCase:
@@ -41,16 +120,22 @@ class BuildIndexUseCase:
         content_policy: ContentPolicy,
         extract_text_func: Callable,
         path_to_url_func: Callable,
-        logger: Optional[Callable] = None
+        logger: Optional[Callable] = None,
+        file_hash_func: Callable = compute_file_hash,
+        text_chunker: Optional[TextChunker] = None,
+        min_hasher: Optional[MinHasher] = None
     ):
         """
         Args:
             repository: ドキュメントリポジトリ
             embedding_model: 埋め込みモデル
             content_policy: コンテンツポリシー
-            extract_text_func: テキスト抽出関数
+            extract_text_func: テキスト抽出関数（path と content_hash キーワード引数を受け取る）
             path_to_url_func: パスをURLに変換する関数
             logger: ログ出力関数
+            file_hash_func: ファイル内容のハッシュ（SHA-256 の16進表記）を計算する関数
+            text_chunker: 本文をパッセージに分割するチャンカー
+            min_hasher: ほぼ重複検出用の MinHash 計算器
         """
         self.repository = repository
         self.embedding_model = embedding_model
@@ -58,6 +143,9 @@ class BuildIndexUseCase:
         self.extract_text_func = extract_text_func
         self.path_to_url_func = path_to_url_func
         self._logger = logger or print
+        self.file_hash_func = file_hash_func
+        self.text_chunker = text_chunker or TextChunker()
+        self.min_hasher = min_hasher or MinHasher()
 
     def execute(self, request: BuildIndexRequest) -> BuildIndexResponse:
         """
@@ -67,64 +155,459 @@ class BuildIndexUseCase:
             request: 索引構築リクエスト
             
         Returns:
-            索引構築レスポンス
+            索引構築レスポンス（stage_stats に段ごとの処理件数・時間）
+        """
+        batch_size = max(1, request.batch_size)
+        queue_size = max(1, request.queue_size)
+        manifest: Dict[str, FileManifestEntry] = self.repository.get_manifest()
+        duplicates = self._load_near_duplicate_index(request)
+        # 別名パス → 正規ドキュメントのパス（正規ドキュメントが変わったら別名も再判定する）
+        aliases = self.repository.get_aliases() if request.incremental else {}
+
+        pipeline = Pipeline()
+        scanned = pipeline.queue(batch_size * queue_size)
+        extracted = pipeline.queue(queue_size)
+        embedded = pipeline.queue(queue_size)
+
+        # 件数は段ごとに別々に数え、最後に合算する（スレッド間で共有しない）
+        tallies = [_new_tally() for _ in range(4)]
+        pipeline.add_stage(
+            "scan", self._scan_stage, request, manifest, aliases, scanned, tallies[0]
+        )
+        pipeline.add_stage(
+            "extract", self._extract_stage, request, duplicates, scanned, extracted, tallies[1]
+        )
+        pipeline.add_stage("embed", self._embed_stage, request, extracted, embedded, tallies[2])
+        pipeline.add_stage("write", self._write_stage, embedded, tallies[3])
+        stage_stats = pipeline.run()
+
+        response = _new_tally()
+        for tally in tallies:
+            for f in fields(BuildIndexResponse):
+                if f.name != "stage_stats":
+                    setattr(response, f.name, getattr(response, f.name) + getattr(tally, f.name))
+        response.stage_stats = stage_stats
+        return response
+
+    def _load_near_duplicate_index(self, request: BuildIndexRequest) -> Optional[NearDuplicateIndex]:
         """
-        new_count = 0
-        updated_count = 0
-        skipped_count = 0
+        索引済みの正規ドキュメントの署名を読み込む（検出しない場合は None）
 
+        検索はカテゴリで絞り込むため、重複はリクエストのカテゴリ内だけで判定する
+        （別カテゴリのドキュメントの別名にすると、このカテゴリの検索からページが消える）。
+        """
+        if request.near_duplicate_threshold <= 0:
+            return None
+        index = NearDuplicateIndex(
+            num_perm=self.min_hasher.num_perm, threshold=request.near_duplicate_threshold
+        )
+        for path, signature in self.repository.get_signatures(request.category).items():
+            index.add(path, signature)
+        return index
+
+    def _scan_stage(
+        self,
+        stats: StageStats,
+        request: BuildIndexRequest,
+        manifest: Dict[str, FileManifestEntry],
+        aliases: Dict[str, str],
+        output: StageQueue,
+        tally: BuildIndexResponse
+    ) -> None:
+        """
+        走査段: 前回から変更のあるファイルだけを抽出段へ送る
+
+        サイズ・更新時刻が一致するファイルは抽出前にスキップし、unchanged として数える。
+        内容ハッシュだけが一致した場合はマニフェスト更新のため changed=False で送る。
+        変更のあった正規ドキュメントの別名は、最後にまとめて送り直して新しい本文と比べ直す
+        （正規ドキュメントより後に抽出されるよう、全ファイルの走査後に送る）。
+        """
+        changed_paths = set()
+        unchanged_aliases: List[str] = []
         for file_path in request.files:
+            stats.items += 1
             self._logger(f"Processing: {file_path}")
 
-            # テキストを抽出
             try:
-                text = self.extract_text_func(file_path)
-            except Exception as e:
-                self._logger(f"  ⊘ Failed to extract text: {e}")
-                skipped_count += 1
+                stat = os.stat(file_path)
+                previous = manifest.get(file_path)
+                if (
+                    request.incremental
+                    and previous is not None
+                    and previous.matches_stat(stat.st_size, stat.st_mtime_ns)
+                ):
+                    self._logger(f"  = Unchanged")
+                    tally.unchanged_documents += 1
+                    if file_path in aliases:
+                        unchanged_aliases.append(file_path)
+                    continue
+
+                content_hash = self.file_hash_func(file_path)
+            except OSError as e:
+                self._logger(f"  ⊘ Failed to read file: {e}")
+                tally.skipped_documents += 1
                 continue
 
-            if not text.strip():
-                self._logger(f"  ⊘ No text content")
-                skipped_count += 1
+            entry = FileManifestEntry(
+                path=file_path,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                content_hash=content_hash,
+                doc_id=previous.doc_id if previous else None
+            )
+            if (
+                request.incremental
+                and previous is not None
+                and previous.content_hash == content_hash
+            ):
+                # 更新時刻のみ変わった場合はマニフェストだけ更新
+                self._logger(f"  = Unchanged (content hash)")
+                tally.unchanged_documents += 1
+                if file_path in aliases:
+                    unchanged_aliases.append(file_path)
+                output.put(_ScannedFile(entry, changed=False), stats)
+                continue
+
+            changed_paths.add(file_path)
+            output.put(_ScannedFile(entry), stats)
+
+        for file_path in unchanged_aliases:
+            if aliases[file_path] not in changed_paths:
+                continue
+            try:
+                stat = os.stat(file_path)
+                content_hash = self.file_hash_func(file_path)
+            except OSError as e:
+                self._logger(f"  ⊘ Failed to read file: {e}")
+                continue
+            self._logger(f"Re-checking near-duplicate of changed {aliases[file_path]}: {file_path}")
+            tally.unchanged_documents -= 1
+            output.put(
+                _ScannedFile(FileManifestEntry(
+                    path=file_path,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    content_hash=content_hash
+                )),
+                stats
+            )
+        output.close(stats)
+
+    def _extract_stage(
+        self,
+        stats: StageStats,
+        request: BuildIndexRequest,
+        duplicates: Optional[NearDuplicateIndex],
+        scanned: StageQueue,
+        output: StageQueue,
+        tally: BuildIndexResponse
+    ) -> None:
+        """
+        抽出段: テキスト抽出・ポリシー判定・重複検出・パッセージ分割を行い、batch_size 件ずつ送る
+
+        ほぼ重複のページは埋め込まずに別名として記録する（重複検出の状態はこのスレッドだけが持つ）。
+        """
+        batch_size = max(1, request.batch_size)
+        pending: List[_PendingDocument] = []
+        manifest_updates: List[FileManifestEntry] = []
+        aliases: Dict[str, str] = {}
+        stale_document_ids: List[int] = []
+        signatures: Dict[str, np.ndarray] = {}
+        # 抽出中のファイルのマニフェストエントリ（結果が返るまで保持）
+        in_flight: Dict[str, FileManifestEntry] = {}
+
+        def candidates() -> Iterator[Tuple[str, str]]:
+            # iter_extractions から（このスレッドで）呼ばれるため、リストの更新は競合しない
+            for item in scanned.iterate(stats):
+                if not item.changed:
+                    manifest_updates.append(item.entry)
+                    continue
+                in_flight[item.entry.path] = item.entry
+                # 走査段のハッシュを抽出キャッシュのキーに使う（ファイルを再度ハッシュしない）
+                yield item.entry.path, item.entry.content_hash
+
+        outcomes = iter_extractions(
+            candidates(),
+            self.extract_text_func,
+            self.content_policy,
+            workers=request.workers,
+            chunk_size=request.extraction_chunk_size
+        )
+
+        for outcome in outcomes:
+            stats.items += 1
+            file_path = outcome.path
+            entry = in_flight.pop(file_path)
+
+            if outcome.error is not None:
+                self._logger(f"  ⊘ Failed to extract text ({file_path}): {outcome.error}")
+                tally.skipped_documents += 1
+                continue
+
+            if not outcome.text.strip():
+                self._logger(f"  ⊘ No text content: {file_path}")
+                tally.skipped_documents += 1
+                manifest_updates.append(entry)
                 continue
 
             # コンテンツが有意義かチェック
-            if not self.content_policy.is_meaningful_for(file_path, text):
-                self._logger(f"  ⊘ Not meaningful content")
-                skipped_count += 1
+            if not outcome.meaningful:
+                self._logger(f"  ⊘ Not meaningful content: {file_path}")
+                tally.skipped_documents += 1
+                manifest_updates.append(entry)
+                continue
+
+            text = outcome.text
+            if entry.doc_id is None and self._adopt_indexed_document(
+                request, entry, text, duplicates, signatures
+            ):
+                self._logger(f"  = Unchanged (already indexed)")
+                tally.unchanged_documents += 1
+                manifest_updates.append(entry)
                 continue
 
-            # ドキュメントエンティティを作成
+            signature = None
+            if duplicates is not None:
+                signature = self.min_hasher.signature(text[:request.max_text_length])
+                canonical = (
+                    duplicates.find_duplicate(file_path, signature)
+                    if signature is not None else None
+                )
+                if canonical is not None:
+                    self._logger(f"  ≈ Near-duplicate of {canonical}: {file_path}")
+                    tally.duplicate_documents += 1
+                    aliases[file_path] = canonical
+                    duplicates.remove(file_path)
+                    if entry.doc_id is not None:
+                        # 以前は正規ドキュメントとして索引していた
+                        stale_document_ids.append(entry.doc_id)
+                        entry.doc_id = None
+                    manifest_updates.append(entry)
+                    continue
+                if signature is not None:
+                    # 以降のページはこのドキュメントと比較する
+                    duplicates.add(file_path, signature)
+
+            # ドキュメントエンティティを作成（既存IDがあれば更新扱い）
             url = self.path_to_url_func(file_path)
             document = Document(
+                id=entry.doc_id,
                 path=file_path,
                 url=url,
                 text=text,
                 category=request.category
             )
+            passages = self.text_chunker.split(text[:request.max_text_length])
+            pending.append(_PendingDocument(document, passages, entry, signature))
+
+            # バッチが溜まったら埋め込み段へ
+            if len(pending) >= batch_size:
+                output.put(
+                    _Batch(pending, manifest_updates, aliases=aliases,
+                           stale_document_ids=stale_document_ids, signatures=signatures),
+                    stats
+                )
+                pending = []
+                manifest_updates = []
+                aliases = {}
+                stale_document_ids = []
+                signatures = {}
+
+        if pending or manifest_updates or aliases:
+            output.put(
+                _Batch(pending, manifest_updates, aliases=aliases,
+                       stale_document_ids=stale_document_ids, signatures=signatures),
+                stats
+            )
+        output.close(stats)
+
+    def _adopt_indexed_document(
+        self,
+        request: BuildIndexRequest,
+        entry: FileManifestEntry,
+        text: str,
+        duplicates: Optional[NearDuplicateIndex],
+        signatures: Dict[str, np.ndarray]
+    ) -> bool:
+        """
+        マニフェストにないファイルが索引済みなら、マニフェストを補完して再処理を省く
+
+        マニフェスト導入前の DB では、初回の実行で全ドキュメントが新規扱いになるのを防ぐ。
+        保存済みの本文・カテゴリが一致し、埋め込みもあれば True を返す。
+        本文が変わっている場合も entry.doc_id を設定し、新規ではなく更新として数える。
+        """
+        existing = self.repository.find_by_path(entry.path)
+        if existing is None:
+            return False
+        entry.doc_id = existing.id
+        if (
+            not request.incremental
+            or existing.text != text
+            or existing.category != request.category
+            or not self.repository.has_embeddings(existing.id)
+        ):
+            return False
+
+        if duplicates is not None:
+            # 以降のページはこのドキュメントと比較する（署名は書き込み段で保存）
+            signature = self.min_hasher.signature(text[:request.max_text_length])
+            if signature is not None:
+                duplicates.add(entry.path, signature)
+                signatures[entry.path] = signature
+        return True
+
+    def _embed_stage(
+        self,
+        stats: StageStats,
+        request: BuildIndexRequest,
+        extracted: StageQueue,
+        output: StageQueue,
+        tally: BuildIndexResponse
+    ) -> None:
+        """埋め込み段: バッチ内の全パッセージを長さ順にまとめてエンコードする"""
+        for batch in extracted.iterate(stats):
+            if batch.pending:
+                # 長さ順に並べてパディングを減らす
+                batch.passages = sorted(
+                    (
+                        (doc_pos, chunk_index, text)
+                        for doc_pos, item in enumerate(batch.pending)
+                        for chunk_index, text in enumerate(item.passages)
+                    ),
+                    key=lambda passage: len(passage[2])
+                )
+                self._logger(
+                    f"Embedding batch of {len(batch.pending)} documents "
+                    f"({len(batch.passages)} passages)"
+                )
+                try:
+                    self._embed_batch(batch, request, tally)
+                    stats.items += len(batch.passages)
+                except Exception as e:
+                    self._logger(f"  ⊘ Failed to embed batch: {e}")
+                    tally.skipped_documents += len(batch.pending)
+                    batch.pending = []
+                    batch.passages = []
+            output.put(batch, stats)
+        output.close(stats)
+
+    def _embed_batch(
+        self,
+        batch: _Batch,
+        request: BuildIndexRequest,
+        tally: BuildIndexResponse
+    ) -> None:
+        """
+        バッチのパッセージを埋め込む
+
+        埋め込みキャッシュにあるものは再利用し、残りは同一テキストをまとめてからモデルに渡す。
+        新たに埋め込んだ分は batch.cache_keys / cache_embeddings に載せて書き込み段で保存する。
+        """
+        texts = [text for _, _, text in batch.passages]
+        if not request.use_embedding_cache or not texts:
+            batch.embeddings = self.embedding_model.encode_batch(
+                texts, batch_size=request.embed_batch_size
+            )
+            return
+
+        keys = [embedding_cache_key(self.embedding_model.model_id, text) for text in texts]
+        vectors = self.repository.get_cached_embeddings(keys)
+        # キャッシュにないテキスト（長さ順のまま・重複なし）
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = self.embedding_model.encode_batch(
+                list(missing.values()), batch_size=request.embed_batch_size
+            )
+            vectors.update(zip(missing, computed))
+            batch.cache_keys = list(missing)
+            batch.cache_embeddings = computed
 
-            # リポジトリに保存
+        batch.embeddings = np.stack([vectors[key] for key in keys])
+        tally.embedding_cache_hits += len(keys) - len(missing)
+        tally.embedding_cache_misses += len(missing)
+
+    def _write_stage(
+        self,
+        stats: StageStats,
+        embedded: StageQueue,
+        tally: BuildIndexResponse
+    ) -> None:
+        """書き込み段: SQLite への書き込みはこのスレッドだけが行う"""
+        for batch in embedded.iterate(stats):
+            self._flush(batch, tally)
+            stats.items += len(batch.pending)
+
+    def _flush(self, batch: _Batch, response: BuildIndexResponse) -> None:
+        """
+        埋め込み済みのバッチを保存する
+
+        Args:
+            batch: 埋め込み済みのバッチ（成功分のマニフェストエントリが追加される）
+            response: 件数を加算するレスポンス
+        """
+        pending = batch.pending
+        manifest_updates = batch.manifest_updates
+        if pending:
+            # ドキュメント・チャンク・埋め込みを1トランザクションで保存する
+            # （途中で失敗してもドキュメントだけが更新され、次回ハッシュ一致でスキップされることはない）
+            is_new = [item.document.id is None for item in pending]
             try:
-                saved_doc = self.repository.save(document)
-                
-                # 埋め込みを生成して保存
-                embedding_text = text[:request.max_text_length]
-                embedding = self.embedding_model.encode(embedding_text)
-                self.repository.save_embedding(saved_doc.id, embedding)
-
-                if document.id is None:
-                    new_count += 1
-                    self._logger(f"  ✓ Indexed (new)")
+                self.repository.save_indexed_documents(
+                    [item.document for item in pending],
+                    batch.passages,
+                    batch.embeddings
+                )
+            except Exception as e:
+                self._logger(f"  ⊘ Failed to save batch: {e}")
+                response.skipped_documents += len(pending)
+                pending = []
+
+            if pending:
+                try:
+                    # 正規ドキュメントの署名を保存し、以前の別名登録を外す
+                    self.repository.save_signatures({
+                        item.document.path: item.signature
+                        for item in pending if item.signature is not None
+                    })
+                    self.repository.delete_aliases([item.document.path for item in pending])
+                except Exception as e:
+                    self._logger(f"  ⊘ Failed to save near-duplicate signatures: {e}")
+
+            if batch.cache_keys:
+                try:
+                    self.repository.save_cached_embeddings(batch.cache_keys, batch.cache_embeddings)
+                except Exception as e:
+                    # キャッシュの保存失敗は索引の結果には影響しない
+                    self._logger(f"  ⊘ Failed to save embedding cache: {e}")
+
+            for item, created in zip(pending, is_new):
+                item.manifest_entry.doc_id = item.document.id
+                manifest_updates.append(item.manifest_entry)
+                if created:
+                    response.new_documents += 1
+                    self._logger(f"  ✓ Indexed (new): {item.document.path}")
                 else:
-                    updated_count += 1
-                    self._logger(f"  ✓ Updated")
+                    response.updated_documents += 1
+                    self._logger(f"  ✓ Updated: {item.document.path}")
+
+        if batch.signatures:
+            try:
+                self.repository.save_signatures(batch.signatures)
             except Exception as e:
-                self._logger(f"  ⊘ Failed to save: {e}")
-                skipped_count += 1
+                self._logger(f"  ⊘ Failed to save near-duplicate signatures: {e}")
 
-        return BuildIndexResponse(
-            new_documents=new_count,
-            updated_documents=updated_count,
-            skipped_documents=skipped_count
-        )
+        if batch.aliases:
+            try:
+                for doc_id in batch.stale_document_ids:
+                    self.repository.delete_by_id(doc_id)
+                self.repository.save_aliases(batch.aliases)
+            except Exception as e:
+                self._logger(f"  ⊘ Failed to save near-duplicate aliases: {e}")
+
+        try:
+            self.repository.save_manifest_entries(manifest_updates)
+        except Exception as e:
+            self._logger(f"  ⊘ Failed to save manifest: {e}")
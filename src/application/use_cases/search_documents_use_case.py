@@ -1,18 +1,28 @@
 """
 検索ドキュメントユースケース
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from dataclasses import dataclass
 from pathlib import Path
 import sys
+import threading
 
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from application.services import reciprocal_rank_fusion
 from domain.entities import SearchResult
 from domain.repositories import DocumentRepository
 from infrastructure.models import EmbeddingModel
 
+# ハイブリッド検索で各検索から取る候補数（top_k の倍率）
+_HYBRID_CANDIDATE_FACTOR = 4
+
+# SearchResult.score の種類
+SCORE_TYPE_DISTANCE = "distance"  # ベクトルの距離（小さいほど上位。尺度は repository.score_metric）
+SCORE_TYPE_RRF = "rrf"  # ハイブリッド検索の RRF スコア（大きいほど上位）
+
 
 @dataclass
 class SearchDocumentsRequest:
@@ -20,6 +30,7 @@ class SearchDocumentsRequest:
     query: str
     category: Optional[str] = None
     top_k: int = 5
+    hybrid: bool = False  # キーワード検索（BM25）とベクトル検索を RRF で統合する
 
 
 @dataclass
@@ -29,6 +40,7 @@ class SearchDocumentsResponse:
     query: str
     category: Optional[str]
     total_results: int
+    score_type: str = SCORE_TYPE_DISTANCE  # results の score の種類（SCORE_TYPE_*）
 
 
 class SearchDocumentsUseCase:
@@ -37,10 +49,20 @@ class SearchDocumentsUseCase:
     def __init__(
         self,
         repository: DocumentRepository,
-        embedding_model: EmbeddingModel
+        embedding_model: EmbeddingModel,
+        text_search_workers: int = 4
     ):
+        """
+        Args:
+            repository: ドキュメントリポジトリ
+            embedding_model: クエリをエンコードする埋め込みモデル
+            text_search_workers: ハイブリッド検索でキーワード検索を並行実行するスレッド数
+        """
         self.repository = repository
         self.embedding_model = embedding_model
+        self.text_search_workers = max(1, text_search_workers)
+        self._text_search_executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
 
     def execute(self, request: SearchDocumentsRequest) -> SearchDocumentsResponse:
         """
@@ -52,6 +74,9 @@ class SearchDocumentsUseCase:
         Returns:
             検索レスポンス
         """
+        if request.hybrid:
+            return self.search_hybrid(request)
+
         # クエリをベクトルにエンコード
         query_vector = self.embedding_model.encode(request.query)
 
@@ -74,3 +99,60 @@ class SearchDocumentsUseCase:
             category=request.category,
             total_results=len(search_results)
         )
+
+    def search_hybrid(self, request: SearchDocumentsRequest) -> SearchDocumentsResponse:
+        """
+        キーワード検索（BM25）とベクトル検索を並行して実行し、RRF で統合する
+
+        API 名のように埋め込みでは拾いにくい完全一致をキーワード検索で補う。
+        キーワード検索は別スレッドで実行し、その間にクエリのエンコードとベクトル検索を行う。
+        返す SearchResult.score は RRF スコア（大きいほど上位）。
+        """
+        depth = max(request.top_k * _HYBRID_CANDIDATE_FACTOR, request.top_k)
+        text_future = self._get_text_search_executor().submit(
+            self.repository.search_by_text, request.query, request.category, depth
+        )
+        try:
+            query_vector = self.embedding_model.encode(request.query)
+            vector_hits = self.repository.search_by_vector(
+                query_vector,
+                category=request.category,
+                top_k=depth
+            )
+        except BaseException:
+            text_future.cancel()
+            raise
+        text_hits = text_future.result()
+
+        # 同じドキュメントは、より上位に現れた検索のパッセージを返す
+        best = {}
+        for hits in (vector_hits, text_hits):
+            for rank, (doc, _) in enumerate(hits):
+                if doc.id not in best or rank < best[doc.id][0]:
+                    best[doc.id] = (rank, doc)
+        fused = reciprocal_rank_fusion([
+            [doc.id for doc, _ in vector_hits],
+            [doc.id for doc, _ in text_hits],
+        ])
+
+        search_results = [
+            SearchResult.from_document(best[doc_id][1], score)
+            for doc_id, score in fused[:request.top_k]
+        ]
+
+        return SearchDocumentsResponse(
+            results=search_results,
+            query=request.query,
+            category=request.category,
+            total_results=len(search_results),
+            score_type=SCORE_TYPE_RRF
+        )
+
+    def _get_text_search_executor(self) -> ThreadPoolExecutor:
+        """キーワード検索用のスレッドプール（初回に作成し、リクエスト間で使い回す）"""
+        with self._lock:
+            if self._text_search_executor is None:
+                self._text_search_executor = ThreadPoolExecutor(
+                    max_workers=self.text_search_workers, thread_name_prefix="text-search"
+                )
+            return self._text_search_executor
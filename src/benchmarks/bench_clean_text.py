@@ -0,0 +1,164 @@
+"""
+clean_text のベンチマーク
+
+従来の実装（呼び出しごとに各パターンを re.sub / 行単位パターンを毎回コンパイル）と
+TextCleaner（起動時にコンパイル・必須リテラルで置換を省略・行処理を1パス）の
+1ドキュメントあたりの処理時間を比較し、出力が一致することも確認する。
+
+既定では HTML から抽出した文書に似た合成テキスト（本文・ナビゲーション・CSS 残骸・
+著者欄・重複見出し）を使う。--html-dir を指定すると trafilatura で実ファイルから抽出する。
+
+使い方:
+    python src/benchmarks/bench_clean_text.py --docs 200 --paragraphs 400
+    python src/benchmarks/bench_clean_text.py --html-dir ~/docs/python --docs 200
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS
+from utils.text_cleaner import CONTRIBUTOR_PATTERNS, CSS_NOISE_PATTERNS, TextCleaner
+
+WORDS = (
+    "the function returns a value when called with keyword arguments and raises an error "
+    "if the resource does not exist stack lambda construct component template property"
+).split()
+NAV_LINES = ["On this page", "Copy", "Try", "Table of contents", "Back to top", "Next chapter"]
+
+
+def legacy_clean_text(text):
+    """TextCleaner 導入前の clean_text"""
+    for pattern in CSS_NOISE_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    for pattern in NOISE_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    if PER_LINE_NOISE_PATTERNS:
+        lines = text.split('\n')
+        compiled = [re.compile(p, re.IGNORECASE) for p in PER_LINE_NOISE_PATTERNS]
+        kept = []
+        for line in lines:
+            stripped = line.strip()
+            if any(rx.search(stripped) for rx in compiled):
+                continue
+            kept.append(line)
+        text = '\n'.join(kept)
+    for pattern in CONTRIBUTOR_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.MULTILINE | re.DOTALL)
+    lines = text.split('\n')
+    deduped_lines = []
+    prev_line = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            deduped_lines.append(line)
+            prev_line = None
+        elif stripped != prev_line:
+            deduped_lines.append(line)
+            prev_line = stripped
+    text = '\n'.join(deduped_lines)
+    text = re.sub(r'([a-z])\n([a-z]{1,3}\b)', r'\1\2', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'([.!?])\s+([A-Z])', r'\1\n\2', text)
+    text = re.sub(r'\n\s*\n(\s*\n)+', '\n\n', text)
+    text = re.sub(r'[ \t]+$', '', text, flags=re.MULTILINE)
+    return text.strip()
+
+
+def synthetic_document(rng: random.Random, paragraphs: int) -> str:
+    """HTML から抽出したテキストに似た合成文書"""
+    lines = []
+    for i in range(paragraphs):
+        roll = rng.random()
+        if roll < 0.1:
+            heading = f"Section {i} {rng.choice(WORDS).title()}"
+            lines += [heading, heading]
+        elif roll < 0.2:
+            lines.append(rng.choice(NAV_LINES))
+        elif roll < 0.23:
+            lines.append("font-family: Roboto, Arial; color: #333; padding: 12px;")
+        else:
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+            lines.append(sentence.capitalize() + ". " + rng.choice(WORDS).title() + " follows.")
+        if rng.random() < 0.3:
+            lines.append("")
+    if rng.random() < 0.5:
+        lines += ["", "Contributors:", "alice", "bob", "", "Was this page helpful?"]
+    return "\n".join(lines)
+
+
+def load_html_documents(html_dir: str, limit: int) -> list:
+    """実ファイルを trafilatura で抽出（clean_text 適用前のテキスト）"""
+    import trafilatura
+
+    texts = []
+    for root, _, files in os.walk(os.path.expanduser(html_dir)):
+        for name in files:
+            if not name.lower().endswith((".html", ".htm")):
+                continue
+            with open(os.path.join(root, name), "r", encoding="utf-8", errors="ignore") as f:
+                extracted = trafilatura.extract(f.read(), include_comments=False, include_tables=False)
+            if extracted and extracted.strip():
+                texts.append(extracted)
+                if len(texts) >= limit:
+                    return texts
+    return texts
+
+
+def _measure(func, texts) -> list:
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    print(
+        f"{label:<12} total={sum(timings):9.1f} ms  "
+        f"mean={statistics.mean(timings):7.3f} ms  median={statistics.median(timings):7.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark clean_text implementations")
+    parser.add_argument("--docs", type=int, default=200, help="Number of documents")
+    parser.add_argument("--paragraphs", type=int, default=400, help="Paragraphs per synthetic document")
+    parser.add_argument("--html-dir", help="Extract documents from HTML files in this directory instead")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    if args.html_dir:
+        texts = load_html_documents(args.html_dir, args.docs)
+    else:
+        rng = random.Random(args.seed)
+        texts = [synthetic_document(rng, args.paragraphs) for _ in range(args.docs)]
+    if not texts:
+        print("No documents to benchmark")
+        sys.exit(1)
+
+    cleaner = TextCleaner(NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS)
+    mismatches = sum(1 for text in texts if cleaner.clean(text) != legacy_clean_text(text))
+
+    legacy = _measure(legacy_clean_text, texts)
+    engine = _measure(cleaner.clean, texts)
+
+    print("\n============================")
+    print(f"{len(texts)} documents, mean {statistics.mean(len(t) for t in texts):,.0f} chars")
+    _report("legacy", legacy)
+    _report("TextCleaner", engine)
+    print(f"speedup: {sum(legacy) / sum(engine):.2f}x")
+    print(f"output mismatches: {mismatches}")
+    print("============================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+埋め込みバックエンドのベンチマーク
+
+torch（sentence-transformers）・onnx（FP32）・onnx-int8 について、
+読み込み時間（import を含む）、1クエリのレイテンシ（p50/p95）、索引構築時のバッチ
+スループットを計測し、torch の結果とのコサイン類似度（平均・最小）を表示する。
+import 時間を正しく測るため、各バックエンドは別プロセスで計測する。
+
+使い方:
+    python src/export_onnx_model.py
+    python src/benchmarks/bench_embedding_backends.py --queries 200 --docs 512
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+BACKENDS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+WORDS = (
+    "how to configure lambda function timeout with environment variables in a cdk stack "
+    "vue component props reactive state python asyncio event loop typescript generics"
+).split()
+
+
+def sample_texts(count: int, words: int, seed: int):
+    rng = np.random.RandomState(seed)
+    return [" ".join(rng.choice(WORDS, size=words)) for _ in range(count)]
+
+
+def run_backend(name: str, queries: int, docs: int, batch_size: int, output: str) -> None:
+    """（子プロセス）1つのバックエンドを計測し、埋め込みを output に保存する"""
+    backend, quantized = BACKENDS[name]
+    start = time.perf_counter()
+    from infrastructure.models.embedding_model import create_encoder
+
+    encoder, _ = create_encoder(backend, quantized)
+    load_seconds = time.perf_counter() - start
+
+    query_texts = sample_texts(queries, 8, seed=1)
+    doc_texts = sample_texts(docs, 200, seed=2)
+    encoder.encode(query_texts[:3])  # ウォームアップ
+
+    latencies = []
+    query_vectors = []
+    for text in query_texts:
+        start = time.perf_counter()
+        query_vectors.append(encoder.encode([text])[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    doc_vectors = encoder.encode(doc_texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    np.savez(output, queries=np.stack(query_vectors), docs=doc_vectors)
+    print(json.dumps({
+        "load_s": load_seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "docs_per_s": docs / batch_seconds if batch_seconds > 0 else 0.0,
+    }))
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends (torch / onnx / onnx-int8)")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes to time")
+    parser.add_argument("--docs", type=int, default=512, help="Passages for the batch throughput run")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch size for the throughput run")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_backend(args.run, args.queries, args.docs, args.batch_size, args.output)
+        return
+
+    results = {}
+    vectors = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.backends.split(","):
+            output = os.path.join(tmp, f"{name}.npz")
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run", name, "--output", output,
+                 "--queries", str(args.queries), "--docs", str(args.docs),
+                 "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{name}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+            with np.load(output) as data:
+                vectors[name] = {"queries": data["queries"], "docs": data["docs"]}
+
+    if not results:
+        sys.exit(1)
+
+    print("\n============================")
+    print(f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'docs/s':>9} {'cos mean':>9} {'cos min':>8}")
+    for name, r in results.items():
+        cos_mean = cos_min = float("nan")
+        if "torch" in vectors and name != "torch":
+            cos = np.concatenate([
+                _cosine(vectors[name][kind], vectors["torch"][kind]) for kind in ("queries", "docs")
+            ])
+            cos_mean, cos_min = float(cos.mean()), float(cos.min())
+        print(
+            f"{name:<10} {r['load_s']:>7.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+            f"{r['docs_per_s']:>9.1f} {cos_mean:>9.4f} {cos_min:>8.4f}"
+        )
+    print("(cos = cosine similarity to the torch embeddings of the same texts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+FastMCP 検索のレイテンシ計測スクリプト
+
+リクエストごとにモデル・DB接続を作り直す旧実装（cold）と、
+起動時に1回だけ読み込んだ EmbeddingModel / SQLiteDocumentRepository を
+使い回す現行実装（warm）の1呼び出しあたりのレイテンシを比較する。
+どちらもサーバーと同じ SearchDocumentsUseCase・リポジトリの検索経路を通る。
+クエリ埋め込みキャッシュに当たるとモデルの推論を測れないため、どちらもキャッシュを使わずにエンコードする。
+
+使い方:
+    python src/benchmarks/bench_fastmcp_search.py --runs 5 --category python
+    python src/benchmarks/bench_fastmcp_search.py --runs 20 --no-hybrid
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import SEARCH_HYBRID, VECTOR_ENGINE
+from infrastructure.persistence import SQLiteDocumentRepository, load_vector_index
+from infrastructure.models import EmbeddingModel
+from infrastructure.models.embedding_model import create_encoder
+from application.use_cases import SearchDocumentsUseCase, SearchDocumentsRequest
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "techdocs.db")
+
+QUERIES = [
+    "Python decorators",
+    "asyncio event loop",
+    "dataclass field default factory",
+    "context manager protocol",
+    "type hints generics",
+]
+
+
+class UncachedQueryEncoder:
+    """クエリ埋め込みキャッシュを通さずに毎回推論する（SearchDocumentsUseCase の embedding_model 用）"""
+
+    def __init__(self, encode_batch):
+        self._encode_batch = encode_batch
+
+    def encode(self, text: str):
+        return self._encode_batch([text])[0]
+
+
+def cold_search(request: SearchDocumentsRequest):
+    """旧実装相当: 呼び出しごとにモデルとDB接続を初期化する"""
+    encoder, _ = create_encoder()
+    with SQLiteDocumentRepository(DB_PATH) as repository:
+        use_case = SearchDocumentsUseCase(repository, UncachedQueryEncoder(encoder.encode))
+        return use_case.execute(request)
+
+
+def _measure(func, runs: int) -> list:
+    timings = []
+    for i in range(runs):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    print(
+        f"{label:<6} runs={len(timings):<3} "
+        f"mean={statistics.mean(timings):9.1f} ms  "
+        f"median={statistics.median(timings):9.1f} ms  "
+        f"max={max(timings):9.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FastMCP search latency")
+    parser.add_argument("--runs", type=int, default=5, help="Calls per mode")
+    parser.add_argument("--category", default="python", help="Category to search")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per call")
+    parser.add_argument(
+        "--hybrid", action=argparse.BooleanOptionalAction, default=SEARCH_HYBRID,
+        help="Fuse BM25 and vector search as the MCP servers do (default: TECHDOC_SEARCH_HYBRID)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"Database not found: {DB_PATH}")
+        sys.exit(1)
+
+    def make_request(query: str) -> SearchDocumentsRequest:
+        return SearchDocumentsRequest(
+            query=query, category=args.category, top_k=args.top_k, hybrid=args.hybrid
+        )
+
+    cold = _measure(lambda q: cold_search(make_request(q)), args.runs)
+
+    start = time.perf_counter()
+    repository = SQLiteDocumentRepository(
+        DB_PATH, vector_engine=load_vector_index(VECTOR_ENGINE, DB_PATH)
+    )
+    use_case = SearchDocumentsUseCase(repository, UncachedQueryEncoder(EmbeddingModel().encode_batch))
+    startup_ms = (time.perf_counter() - start) * 1000
+
+    def warm_search(query: str):
+        return use_case.execute(make_request(query))
+
+    warm_search(QUERIES[0])  # 初回の推論・ページ読み込みの影響を除外
+    warm = _measure(warm_search, args.runs)
+    repository.close()
+
+    print("\n============================")
+    print(f"Per-call search latency ({'hybrid' if args.hybrid else 'vector only'})")
+    _report("cold", cold)
+    _report("warm", warm)
+    print(f"warm startup (one-time): {startup_ms:.1f} ms")
+    print(f"speedup (median): {statistics.median(cold) / statistics.median(warm):.1f}x")
+    print("============================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+MCP サーバーの起動時間のベンチマーク
+
+各計測は新しいプロセスで行う（import のキャッシュが効かないように）。
+- import-time: サーバーモジュールの import にかかる時間。initialize / list_tools に
+  応答できるようになるまでの時間に相当する
+- eager: 従来どおり import 時にモデルと DB を読み込んだ場合に応答可能になるまでの時間
+- time-to-first-query: プロセス開始から最初の検索結果が返るまでの時間
+
+使い方:
+    python src/benchmarks/bench_server_startup.py --runs 5
+    python src/benchmarks/bench_server_startup.py --server fastmcp --query "asyncio gather"
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent
+
+SERVERS = {"mcp": "mcp_server", "fastmcp": "mcp_server_fastmcp"}
+
+
+def child(server: str, mode: str, query: str) -> None:
+    """（子プロセス）1回分を計測して JSON で出力する"""
+    start = time.perf_counter()
+    sys.path.insert(0, str(SRC_DIR))
+    module = __import__(SERVERS[server])
+    import_seconds = time.perf_counter() - start
+    result = {"import_s": import_seconds}
+
+    if mode == "eager":
+        from server_runtime import load_search_dependencies
+
+        load_search_dependencies(module.DB_PATH)
+        result["ready_s"] = time.perf_counter() - start
+    else:
+        # サーバーの起動時と同じく読み込みを開始し、最初の検索が返るまでを測る
+        module._runtime.start()
+        if server == "mcp":
+            import asyncio
+
+            asyncio.run(module.search_docs(query, None, 5))
+        else:
+            module._search_docs_internal(query, None, 5)
+        result["first_query_s"] = time.perf_counter() - start
+    print(json.dumps(result))
+
+
+def _run_child(server: str, mode: str, query: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--server", server, "--query", query],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCP server import time and time to first query")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="mcp", help="Server module to measure")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--query", default="Python decorators", help="Query for the first search")
+    parser.add_argument("--child", choices=["lazy", "eager"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.server, args.child, args.query)
+        return
+
+    lazy = [_run_child(args.server, "lazy", args.query) for _ in range(args.runs)]
+    eager = [_run_child(args.server, "eager", args.query) for _ in range(args.runs)]
+
+    def median(rows, key):
+        return statistics.median(row[key] for row in rows)
+
+    print("\n============================")
+    print(f"Server: {SERVERS[args.server]} ({args.runs} runs, median)")
+    print(f"  import-time (ready for initialize/list_tools): {median(lazy, 'import_s'):8.3f} s")
+    print(f"  eager load before serving (previous behavior):  {median(eager, 'ready_s'):8.3f} s")
+    print(f"  time-to-first-query:                           {median(lazy, 'first_query_s'):8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+ベクトル検索のベンチマーク
+
+一時DBにランダムな埋め込みを N 件（既定 100,000 件）投入し、
+旧実装の全件スキャン（vec_distance_L2 + JOIN + ORDER BY）と
+vec0 の KNN（MATCH ... AND k = ?、カテゴリ partition key）、
+メモリマップした NumPy 索引（行列ベクトル積 + argpartition）のレイテンシを比較する。
+
+使い方:
+    python src/benchmarks/bench_vector_search.py --rows 100000 --queries 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from domain.entities import Chunk, Document
+from infrastructure.persistence import (
+    SQLiteDocumentRepository,
+    export_vector_index,
+    load_vector_index,
+)
+
+CATEGORIES = ["typescript", "python", "cdk", "vue", "aws_design"]
+DIM = 384
+INSERT_BATCH = 2000
+
+
+def populate(repository: SQLiteDocumentRepository, rows: int, rng: np.random.Generator) -> None:
+    """ランダムな単位ベクトルとダミー本文を投入（1ドキュメント1チャンク）"""
+    for start in range(0, rows, INSERT_BATCH):
+        count = min(INSERT_BATCH, rows - start)
+        docs = [
+            Document(
+                path=f"/bench/{start + i}.html",
+                url=f"https://bench.example/{start + i}",
+                text=f"document {start + i}",
+                category=CATEGORIES[(start + i) % len(CATEGORIES)],
+            )
+            for i in range(count)
+        ]
+        saved = repository.save_many(docs)
+        chunks = repository.replace_chunks_many(
+            [Chunk(document_id=d.id, chunk_index=0, text=d.text) for d in saved]
+        )
+        vectors = rng.standard_normal((count, DIM)).astype("float32")
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        repository.save_embeddings_many([c.id for c in chunks], vectors)
+
+
+def full_scan_search(repository, vector, category, top_k):
+    """旧実装相当: 全行の距離を計算してからソート"""
+    conn = repository._get_connection()
+    sql = """
+        SELECT documents.id, documents.path, documents.url,
+               chunks.text, documents.category,
+               vec_distance_L2(doc_embeddings.embedding, ?) AS score
+        FROM doc_embeddings
+        JOIN chunks ON doc_embeddings.rowid = chunks.id
+        JOIN documents ON chunks.document_id = documents.id
+    """
+    params = [vector.tobytes()]
+    if category:
+        sql += " WHERE documents.category = ?"
+        params.append(category)
+    sql += " ORDER BY score ASC LIMIT ?"
+    params.append(top_k)
+    return conn.execute(sql, params).fetchall()
+
+
+def _measure(func, queries) -> list:
+    timings = []
+    for vector in queries:
+        start = time.perf_counter()
+        func(vector)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    print(
+        f"{label:<22} mean={statistics.mean(timings):8.2f} ms  "
+        f"median={statistics.median(timings):8.2f} ms  p95={np.percentile(timings, 95):8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector search strategies")
+    parser.add_argument("--rows", type=int, default=100_000, help="Number of embeddings")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per strategy")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    queries = rng.standard_normal((args.queries, DIM)).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        with SQLiteDocumentRepository(db_path) as repository:
+            start = time.perf_counter()
+            populate(repository, args.rows, rng)
+            print(f"Inserted {args.rows} rows in {time.perf_counter() - start:.1f} s")
+            start = time.perf_counter()
+            export_vector_index("numpy", repository, db_path)
+            numpy_index = load_vector_index("numpy", db_path)
+            print(f"Exported NumPy index in {time.perf_counter() - start:.1f} s")
+
+            print("\n============================")
+            for category in (None, "python"):
+                label = category or "all categories"
+                print(f"[{label}]")
+                _report(
+                    "full scan + ORDER BY",
+                    _measure(lambda v: full_scan_search(repository, v, category, args.top_k), queries),
+                )
+                _report(
+                    "vec0 KNN",
+                    _measure(lambda v: repository.search_by_vector(v, category, args.top_k), queries),
+                )
+                repository.vector_engine = numpy_index
+                _report(
+                    "NumPy mmap index",
+                    _measure(lambda v: repository.search_by_vector(v, category, args.top_k), queries),
+                )
+                repository.vector_engine = None
+            print("============================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+埋め込みの保存形式（float32 / int8 / bit）のベンチマーク
+
+同じ合成データ（クラスタ構造を持つ単位ベクトル）を保存形式ごとの一時DBに投入し、
+DB サイズ、検索レイテンシ、float32 の厳密検索に対する recall@k（ドキュメント単位）を比べる。
+量子化した形式は粗い KNN の候補倍率（rescore_oversample）ごとに測る。
+
+使い方:
+    python src/benchmarks/bench_vector_storage.py --rows 50000 --queries 50
+    python src/benchmarks/bench_vector_storage.py --oversample 2,4,8,16 --top-k 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from domain.entities import Chunk, Document
+from infrastructure.persistence import SQLiteDocumentRepository
+
+CATEGORIES = ["typescript", "python", "cdk", "vue", "aws_design"]
+DIM = 384
+INSERT_BATCH = 2000
+
+
+def make_vectors(rows: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """トピックごとにまとまった単位ベクトル（文埋め込みに近い分布）"""
+    centers = rng.standard_normal((clusters, DIM)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, size=rows)]
+    vectors += rng.standard_normal((rows, DIM)).astype("float32") * 0.8
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def populate(repository: SQLiteDocumentRepository, vectors: np.ndarray) -> None:
+    """1ドキュメント1チャンクで埋め込みを投入"""
+    for start in range(0, len(vectors), INSERT_BATCH):
+        batch = vectors[start:start + INSERT_BATCH]
+        docs = repository.save_many([
+            Document(
+                path=f"/bench/{start + i}.html",
+                url=f"https://bench.example/{start + i}",
+                text=f"document {start + i}",
+                category=CATEGORIES[(start + i) % len(CATEGORIES)],
+            )
+            for i in range(len(batch))
+        ])
+        chunks = repository.replace_chunks_many(
+            [Chunk(document_id=d.id, chunk_index=0, text=d.text) for d in docs]
+        )
+        repository.save_embeddings_many([c.id for c in chunks], batch)
+
+
+def _db_size(db_path: str) -> int:
+    return sum(
+        os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path)
+    )
+
+
+def _run(repository, queries, top_k):
+    timings = []
+    results = []
+    for vector in queries:
+        start = time.perf_counter()
+        hits = repository.search_by_vector(vector, None, top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append([doc.id for doc, _ in hits])
+    return timings, results
+
+
+def _recall(expected, actual) -> float:
+    return statistics.mean(
+        len(set(e) & set(a)) / len(e) if e else 1.0 for e, a in zip(expected, actual)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage formats")
+    parser.add_argument("--rows", type=int, default=50_000, help="Number of embeddings")
+    parser.add_argument("--clusters", type=int, default=200, help="Number of synthetic topics")
+    parser.add_argument("--queries", type=int, default=50, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--oversample", default="1,2,4,8", help="Comma-separated rescore oversampling factors")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(args.rows, args.clusters, rng)
+    # クエリは保存済みのベクトルに近いが一致しないもの
+    queries = vectors[rng.choice(args.rows, size=args.queries, replace=False)]
+    queries = queries + rng.standard_normal(queries.shape).astype("float32") * 0.03
+    oversample_values = [int(value) for value in args.oversample.split(",") if value.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'storage':<20} {'DB MB':>8} {'recall@k':>9} {'mean ms':>9} {'p95 ms':>9}")
+        expected = None
+        for storage in ("float32", "int8", "bit"):
+            db_path = os.path.join(tmp_dir, f"{storage}.db")
+            with SQLiteDocumentRepository(db_path, vector_storage=storage) as repository:
+                populate(repository, vectors)
+                repository._get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                size_mb = _db_size(db_path) / 1024 / 1024
+                settings = [None] if storage == "float32" else oversample_values
+                for oversample in settings:
+                    if oversample is not None:
+                        repository.rescore_oversample = oversample
+                    _run(repository, queries[:3], args.top_k)  # ウォームアップ
+                    timings, results = _run(repository, queries, args.top_k)
+                    if expected is None:
+                        expected = results
+                    label = storage if oversample is None else f"{storage} (x{oversample})"
+                    print(
+                        f"{label:<20} {size_mb:>8.1f} {_recall(expected, results):>9.4f} "
+                        f"{statistics.mean(timings):>9.2f} {np.percentile(timings, 95):>9.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+HNSW 索引の再現率（recall@k）とレイテンシの評価
+
+DB に保存済みの埋め込みから一時ディレクトリに HNSW 索引を作り、厳密検索と比べる。
+- チャンク単位: NumPy 索引（全件の厳密な L2）の上位 k チャンクのうち HNSW が返した割合
+- ドキュメント単位: search_by_vector の厳密経路（sqlite-vec の KNN）の上位 k ドキュメントのうち
+  HNSW 経由の search_by_vector が返した割合
+クエリは保存済みの埋め込みを無作為に選び、ノイズを加えたもの（完全一致を避ける）。
+
+使い方:
+    python src/benchmarks/eval_ann_recall.py --queries 200 --k 10 --ef 16,32,64,128
+    python src/benchmarks/eval_ann_recall.py --db /path/to/techdocs.db --m 32 --ef-construction 400
+    python src/benchmarks/eval_ann_recall.py --rows 50000   # 合成データの一時DBで評価
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import HNSW_EF_CONSTRUCTION, HNSW_M
+from infrastructure.persistence import HnswVectorIndex, NumpyVectorIndex, SQLiteDocumentRepository
+from infrastructure.persistence.vector_index import export_hnsw_index, export_numpy_index
+
+DEFAULT_DB_PATH = str(Path(__file__).parent.parent / "techdocs.db")
+
+
+def sample_queries(index: NumpyVectorIndex, count: int, noise: float, rng: np.random.Generator):
+    """保存済みの埋め込みにノイズを加えたクエリ（カテゴリ付き）"""
+    rows = rng.choice(len(index), size=min(count, len(index)), replace=False)
+    categories = {}
+    for category, (start, end) in index.category_ranges.items():
+        for row in rows[(rows >= start) & (rows < end)]:
+            categories[int(row)] = category
+    queries = []
+    for row in rows:
+        vector = np.array(index._embeddings[row], dtype="float32")
+        vector += rng.standard_normal(vector.shape).astype("float32") * noise * np.linalg.norm(vector) \
+            / np.sqrt(len(vector))
+        queries.append((vector, categories[int(row)]))
+    return queries
+
+
+def recall(expected, actual) -> float:
+    expected = set(expected)
+    if not expected:
+        return 1.0
+    return len(expected & set(actual)) / len(expected)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def evaluate(repository, exact_index, hnsw_index, queries, k: int, ef_values, use_category: bool):
+    """ef ごとの再現率とレイテンシを表示する"""
+    exact_chunks = []
+    exact_docs = []
+    exact_ms = []
+    for vector, category in queries:
+        category = category if use_category else None
+        hits, ms = _timed(exact_index.search, vector, category, k)
+        exact_chunks.append([chunk_id for chunk_id, _ in hits])
+        exact_ms.append(ms)
+        repository.vector_engine = None
+        exact_docs.append([doc.id for doc, _ in repository.search_by_vector(vector, category, k)])
+
+    print(f"{'engine':<16} {'chunk R@k':>10} {'doc R@k':>9} {'mean ms':>9} {'p95 ms':>9}")
+    print(
+        f"{'exact (numpy)':<16} {1.0:>10.4f} {1.0:>9.4f} "
+        f"{statistics.mean(exact_ms):>9.3f} {np.percentile(exact_ms, 95):>9.3f}"
+    )
+    for ef in ef_values:
+        hnsw_index.ef_search = ef
+        chunk_recalls = []
+        doc_recalls = []
+        hnsw_ms = []
+        for (vector, category), expected_chunks, expected_docs in zip(queries, exact_chunks, exact_docs):
+            category = category if use_category else None
+            hits, ms = _timed(hnsw_index.search, vector, category, k)
+            hnsw_ms.append(ms)
+            chunk_recalls.append(recall(expected_chunks, [chunk_id for chunk_id, _ in hits]))
+            repository.vector_engine = hnsw_index
+            docs = repository.search_by_vector(vector, category, k)
+            doc_recalls.append(recall(expected_docs, [doc.id for doc, _ in docs]))
+        repository.vector_engine = None
+        print(
+            f"{f'hnsw ef={ef}':<16} {statistics.mean(chunk_recalls):>10.4f} "
+            f"{statistics.mean(doc_recalls):>9.4f} "
+            f"{statistics.mean(hnsw_ms):>9.3f} {np.percentile(hnsw_ms, 95):>9.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate HNSW recall@k against exact vector search")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Database to evaluate")
+    parser.add_argument("--rows", type=int, help="Evaluate on a temporary DB with this many synthetic embeddings")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--ef", default="16,32,64,128,256", help="Comma-separated ef_search values")
+    parser.add_argument("--m", type=int, default=HNSW_M, help="HNSW M")
+    parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION, help="HNSW ef_construction")
+    parser.add_argument("--noise", type=float, default=0.5, help="Relative noise added to sampled query vectors")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    ef_values = [int(value) for value in args.ef.split(",") if value.strip()]
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db
+        if args.rows:
+            from bench_vector_search import populate
+
+            db_path = os.path.join(tmp_dir, "eval.db")
+            with SQLiteDocumentRepository(db_path) as repository:
+                populate(repository, args.rows, rng)
+        elif not os.path.exists(db_path):
+            parser.error(f"Database not found: {db_path}")
+
+        with SQLiteDocumentRepository(db_path) as repository:
+            start = time.perf_counter()
+            export_numpy_index(repository, os.path.join(tmp_dir, "exact"))
+            exact_index = NumpyVectorIndex(os.path.join(tmp_dir, "exact"))
+            print(f"Loaded {len(exact_index)} embeddings in {time.perf_counter() - start:.1f} s")
+            if len(exact_index) == 0:
+                print("No embeddings to evaluate.")
+                return
+
+            start = time.perf_counter()
+            export_hnsw_index(
+                repository, os.path.join(tmp_dir, "hnsw"), m=args.m, ef_construction=args.ef_construction
+            )
+            hnsw_index = HnswVectorIndex(os.path.join(tmp_dir, "hnsw"))
+            print(
+                f"Built HNSW index (M={args.m}, ef_construction={args.ef_construction}) "
+                f"in {time.perf_counter() - start:.1f} s"
+            )
+
+            queries = sample_queries(exact_index, args.queries, args.noise, rng)
+            for use_category in (False, True):
+                print("\n============================")
+                print(f"[{'per category' if use_category else 'all categories'}] "
+                      f"{len(queries)} queries, k={args.k}")
+                evaluate(repository, exact_index, hnsw_index, queries, args.k, ef_values, use_category)
+            print("============================")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,28 @@ from pathlib import Path
 # 親ディレクトリをパスに追加してインポート
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import LOCAL_DOCS_BASE, MAX_EMBED_TEXT_LEN, DOMAIN_BLOCKLIST
+from config import (
+    LOCAL_DOCS_BASE,
+    MAX_EMBED_TEXT_LEN,
+    DOMAIN_BLOCKLIST,
+    EMBED_BATCH_SIZE,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    NEAR_DUPLICATE_THRESHOLD,
+    VECTOR_ENGINE,
+    VECTOR_STORAGE,
+)
 from policies.content_policy import ContentPolicy
 from utils.extract_text import extract_text
 
-from infrastructure.persistence import SQLiteDocumentRepository
+from infrastructure.persistence import (
+    VECTOR_STORAGE_TYPES,
+    SQLiteDocumentRepository,
+    export_vector_index,
+)
 from infrastructure.models import EmbeddingModel
 from application.use_cases import BuildIndexUseCase, BuildIndexRequest
+from application.services import TextChunker
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "techdocs.db")
 
@@ -210,6 +225,46 @@ def main():
         choices=KNOWN_CATEGORIES,
         help="Limit indexing to a single category",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help=f"Number of documents embedded and saved per batch (default: {EMBED_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the file manifest and re-process every file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes for text extraction and filtering (default: 1)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=4,
+        help="Batches buffered between pipeline stages; bounds memory use (default: 4)",
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Embed every passage with the model instead of reusing cached embeddings",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Index near-duplicate pages instead of recording them as aliases",
+    )
+    parser.add_argument(
+        "--vector-storage",
+        choices=sorted(VECTOR_STORAGE_TYPES),
+        default=VECTOR_STORAGE or None,
+        help="Storage format of doc_embeddings; an existing DB is converted without "
+             "re-encoding (default: keep the DB's current format, float32 for a new DB)",
+    )
     args = parser.parse_args()
 
     target_dirs = select_target_dirs(args.category)
@@ -218,7 +273,8 @@ def main():
     print("Loading embedding model (384-dim)...")
     embedding_model = EmbeddingModel()
     
-    repository = SQLiteDocumentRepository(DB_PATH)
+    repository = SQLiteDocumentRepository(DB_PATH, vector_storage=args.vector_storage)
+    print(f"Vector storage: {repository.vector_storage}")
     
     # ユースケースを初期化
     use_case = BuildIndexUseCase(
@@ -227,7 +283,12 @@ def main():
         content_policy=policy,
         extract_text_func=extract_text,
         path_to_url_func=path_to_url,
-        logger=print
+        logger=print,
+        text_chunker=TextChunker(
+            max_tokens=CHUNK_MAX_TOKENS,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS,
+            count_tokens=embedding_model.count_tokens
+        )
     )
 
     # 既存の不要ドメインをクリーンアップ
@@ -254,25 +315,57 @@ def main():
     except Exception as e:
         print(f"URL backfill skipped due to error: {e}")
 
-    # ファイルリストを取得
-    files = list(walk_files(target_dirs))
-    print(f"Found {len(files)} files to process")
+    # ファイルは走査段で逐次列挙する（全件のリストは作らない）
+    print(f"Scanning {len(target_dirs)} target directories")
 
     # ユースケースを実行
     request = BuildIndexRequest(
-        files=files,
+        files=walk_files(target_dirs),
         category=detect_category(target_dirs[0]) if target_dirs else "",
-        max_text_length=MAX_EMBED_TEXT_LEN
+        max_text_length=MAX_EMBED_TEXT_LEN,
+        batch_size=args.batch_size,
+        incremental=not args.full,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        use_embedding_cache=not args.no_embedding_cache,
+        near_duplicate_threshold=0 if args.no_dedup else NEAR_DUPLICATE_THRESHOLD
     )
     
-    response = use_case.execute(request)
+    try:
+        response = use_case.execute(request)
+        # MCP サーバーが読み込むベクトル索引を DB の隣に書き出す（最新なら省略）
+        if VECTOR_ENGINE != "sqlite":
+            print(f"Exporting {VECTOR_ENGINE} vector index...")
+            meta = export_vector_index(VECTOR_ENGINE, repository, DB_PATH)
+            if meta is None:
+                print("  Vector index is up to date.")
+            else:
+                print(f"  Exported {meta['count']} vectors (revision {meta['revision']}).")
+    finally:
+        repository.close()
 
     print("\n============================")
     print(f"Index build complete!")
     print(f"  New documents: {response.new_documents}")
     print(f"  Updated documents: {response.updated_documents}")
     print(f"  Skipped documents: {response.skipped_documents}")
+    print(f"  Unchanged documents: {response.unchanged_documents}")
+    print(f"  Near-duplicate documents: {response.duplicate_documents}")
     print(f"  Total: {response.new_documents + response.updated_documents}")
+    embedded = response.embedding_cache_hits + response.embedding_cache_misses
+    if embedded:
+        print(
+            f"  Embedding cache: {response.embedding_cache_hits} hits / "
+            f"{response.embedding_cache_misses} misses "
+            f"({response.embedding_cache_hits / embedded:.1%} hit rate)"
+        )
+    print("  Pipeline stages:")
+    for stage in response.stage_stats:
+        print(
+            f"    {stage.name:<8} {stage.items:>8} items  "
+            f"busy {stage.busy_seconds:8.1f} s  waiting {stage.wait_seconds:8.1f} s  "
+            f"{stage.throughput:8.1f} items/s"
+        )
     print(f"DB file: {DB_PATH}")
     print("============================")
 
@@ -47,6 +47,146 @@ except ValueError:
     # 環境変数に不正な値が入っていた場合は安全な既定値にフォールバック
     MAX_EMBED_TEXT_LEN = 120000
 
+# 索引構築時に1回の埋め込み計算へまとめるドキュメント数
+# 既定: 32。環境変数 TECHDOC_EMBED_BATCH_SIZE で上書き可能。
+try:
+    EMBED_BATCH_SIZE = int(os.getenv("TECHDOC_EMBED_BATCH_SIZE", "32"))
+except ValueError:
+    EMBED_BATCH_SIZE = 32
+
+# パッセージ分割の設定（トークン数）
+# all-MiniLM-L6-v2 は最大 256 トークン（[CLS]/[SEP] を含む）までしか読まないため、
+# 1パッセージはその範囲に収める。環境変数 TECHDOC_CHUNK_MAX_TOKENS /
+# TECHDOC_CHUNK_OVERLAP_TOKENS で上書き可能。
+try:
+    CHUNK_MAX_TOKENS = int(os.getenv("TECHDOC_CHUNK_MAX_TOKENS", "250"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("TECHDOC_CHUNK_OVERLAP_TOKENS", "50"))
+except ValueError:
+    CHUNK_MAX_TOKENS = 250
+    CHUNK_OVERLAP_TOKENS = 50
+
+# クエリ埋め込みキャッシュ（MCP サーバーでの検索クエリ用）
+# TECHDOC_QUERY_CACHE_SIZE: 最大件数（既定 1024、0 で無効）
+# TECHDOC_QUERY_CACHE_TTL: 有効期間（秒、既定 0 = 無期限）
+# TECHDOC_QUERY_CACHE_PATH: 指定するとプロセス終了時に npz で保存し、次回起動時に読み込む
+try:
+    QUERY_CACHE_SIZE = int(os.getenv("TECHDOC_QUERY_CACHE_SIZE", "1024"))
+except ValueError:
+    QUERY_CACHE_SIZE = 1024
+try:
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv("TECHDOC_QUERY_CACHE_TTL", "0"))
+except ValueError:
+    QUERY_CACHE_TTL_SECONDS = 0.0
+QUERY_CACHE_PATH = os.getenv("TECHDOC_QUERY_CACHE_PATH", "")
+
+# クエリエンコードのマイクロバッチ（同時に届いたクエリを1回の encode_batch にまとめる）
+# TECHDOC_QUERY_BATCH_SIZE: 1バッチの最大件数（既定 16、1 以下でバッチ化しない）
+# TECHDOC_QUERY_BATCH_WAIT_MS: 最初のクエリが届いてから後続を待つ時間（ミリ秒、既定 2）
+try:
+    QUERY_BATCH_MAX_SIZE = int(os.getenv("TECHDOC_QUERY_BATCH_SIZE", "16"))
+except ValueError:
+    QUERY_BATCH_MAX_SIZE = 16
+try:
+    QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("TECHDOC_QUERY_BATCH_WAIT_MS", "2"))
+except ValueError:
+    QUERY_BATCH_MAX_WAIT_MS = 2.0
+
+# MCP サーバーの検索実行（イベントループを止めないようスレッドプールで実行する）
+# TECHDOC_SEARCH_WORKERS: 同時に実行する検索の上限（既定 4）
+# TECHDOC_SEARCH_TIMEOUT: 1リクエストの待ち時間の上限（秒、既定 30、0 で無制限）
+try:
+    SEARCH_MAX_CONCURRENCY = int(os.getenv("TECHDOC_SEARCH_WORKERS", "4"))
+except ValueError:
+    SEARCH_MAX_CONCURRENCY = 4
+try:
+    SEARCH_TIMEOUT_SECONDS = float(os.getenv("TECHDOC_SEARCH_TIMEOUT", "30"))
+except ValueError:
+    SEARCH_TIMEOUT_SECONDS = 30.0
+
+# ハイブリッド検索（FTS5 の BM25 とベクトル検索を Reciprocal Rank Fusion で統合する）
+# MCP サーバーの検索で使う。TECHDOC_SEARCH_HYBRID=0 でベクトル検索のみ。
+SEARCH_HYBRID = os.getenv("TECHDOC_SEARCH_HYBRID", "1") != "0"
+
+# ベクトル検索エンジン
+# TECHDOC_VECTOR_ENGINE: "sqlite"（既定、sqlite-vec の KNN）、"numpy"
+# （build_index.py が DB の隣に書き出した索引をメモリマップして厳密検索する）、
+# または "hnsw"（同じく書き出した HNSW グラフで近似検索する）。
+# 索引が DB の埋め込みより古い場合は自動的に sqlite-vec の KNN に戻る。
+VECTOR_ENGINE = os.getenv("TECHDOC_VECTOR_ENGINE", "sqlite").strip().lower()
+
+# 埋め込みの保存形式（build_index.py で選ぶ。既存 DB は再エンコードせずに変換する）
+# TECHDOC_VECTOR_STORAGE: "float32"（全精度）、"int8" または "bit"（量子化して粗く検索し、
+# 上位候補を float16 のベクトルで計算し直す）。空文字（既定）なら DB の現在の形式を使う。
+VECTOR_STORAGE = os.getenv("TECHDOC_VECTOR_STORAGE", "").strip().lower()
+
+# HNSW 索引（TECHDOC_VECTOR_ENGINE=hnsw、hnswlib が必要）の調整値
+# TECHDOC_HNSW_M: 各ノードの近傍数（既定 16）
+# TECHDOC_HNSW_EF_CONSTRUCTION: 構築時の候補数（既定 200）
+# TECHDOC_HNSW_EF_SEARCH: 検索時の候補数（既定 64、大きいほど再現率が上がり遅くなる）
+# M / ef_construction を変えた場合は build_index.py の実行時に索引を作り直す。
+try:
+    HNSW_M = int(os.getenv("TECHDOC_HNSW_M", "16"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("TECHDOC_HNSW_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH = int(os.getenv("TECHDOC_HNSW_EF_SEARCH", "64"))
+except ValueError:
+    HNSW_M = 16
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+
+# HTML 本文抽出の高速パス（lxml + XPath）
+# レイアウトが決まっているサイトは本文コンテナを XPath で直接取り出し、
+# 抽出結果が短すぎる場合やコンテナが見つからない場合は trafilatura にフォールバックする。
+# TECHDOC_FAST_HTML_EXTRACT=0 で無効化（常に trafilatura）。
+FAST_HTML_EXTRACT = os.getenv("TECHDOC_FAST_HTML_EXTRACT", "1") != "0"
+try:
+    FAST_EXTRACT_MIN_CHARS = int(os.getenv("TECHDOC_FAST_EXTRACT_MIN_CHARS", "200"))
+except ValueError:
+    FAST_EXTRACT_MIN_CHARS = 200
+
+# ドメイン → 本文コンテナの XPath（サブドメインにも適用）
+SITE_CONTENT_XPATHS = {
+    # Sphinx（<div class="body" role="main">）
+    "docs.python.org": '//div[@role="main"]',
+    # VitePress
+    "vuejs.org": '//div[contains(concat(" ", normalize-space(@class), " "), " vp-doc ")]',
+    # AWS ドキュメント（CDK API リファレンスを含む）
+    "docs.aws.amazon.com": '//div[@id="main-col-body"]',
+    # TypeScript Handbook
+    "www.typescriptlang.org": "//article",
+}
+
+# HTML 抽出結果のディスクキャッシュ（clean_text 適用前のテキスト）
+# キーはファイル内容のハッシュと抽出器のバージョン。NOISE_PATTERNS や ContentPolicy を
+# 調整して再構築する際に HTML のパースを省略できる。
+# TECHDOC_EXTRACTION_CACHE_DIR: 保存先（空文字で無効）
+# TECHDOC_EXTRACTION_CACHE_MB: 上限サイズ（MB、既定 1024。超えたら古いものから削除）
+EXTRACTION_CACHE_DIR = os.getenv(
+    "TECHDOC_EXTRACTION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "extraction"),
+)
+try:
+    EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("TECHDOC_EXTRACTION_CACHE_MB", "1024")) * 1024 * 1024
+except ValueError:
+    EXTRACTION_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# ほぼ重複ページの検出（MinHash の推定 Jaccard 係数がこの値以上なら別名として扱い索引しない）
+# 環境変数 TECHDOC_NEAR_DUPLICATE_THRESHOLD で上書き可能（0 で無効）。
+try:
+    NEAR_DUPLICATE_THRESHOLD = float(os.getenv("TECHDOC_NEAR_DUPLICATE_THRESHOLD", "0.9"))
+except ValueError:
+    NEAR_DUPLICATE_THRESHOLD = 0.9
+
+# 埋め込みモデルの推論バックエンド
+# TECHDOC_EMBEDDING_BACKEND: "torch"（既定、sentence-transformers）または "onnx"（onnxruntime）
+# ONNX モデルは export_onnx_model.py で ONNX_MODEL_DIR に一度だけ書き出しておく。
+# TECHDOC_ONNX_QUANTIZE=1 で動的 int8 量子化したモデル（model.int8.onnx）を使う。
+EMBEDDING_BACKEND = os.getenv("TECHDOC_EMBEDDING_BACKEND", "torch").strip().lower()
+ONNX_MODEL_DIR = os.getenv(
+    "TECHDOC_ONNX_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "onnx", "all-MiniLM-L6-v2"),
+)
+ONNX_QUANTIZE = os.getenv("TECHDOC_ONNX_QUANTIZE", "0") == "1"
+
 # ブロックするドメイン（広告、トラッキング、分析系など）
 # 以下に一致するドメインは処理から除外
 DOMAIN_BLOCKLIST = [
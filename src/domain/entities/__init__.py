@@ -3,5 +3,7 @@ Domain層のエンティティパッケージ初期化
 """
 from .document import Document
 from .search_result import SearchResult
+from .file_manifest_entry import FileManifestEntry
+from .chunk import Chunk
 
-__all__ = ["Document", "SearchResult"]
+__all__ = ["Document", "SearchResult", "FileManifestEntry", "Chunk"]
@@ -0,0 +1,17 @@
+"""
+Chunk エンティティ - ドキュメントを分割したパッセージ
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Chunk:
+    """
+    埋め込みの単位となるパッセージ
+    1つの Document が複数の Chunk を持つ
+    """
+    id: Optional[int] = None
+    document_id: Optional[int] = None
+    chunk_index: int = 0
+    text: str = ""
@@ -0,0 +1,22 @@
+"""
+FileManifestEntry エンティティ - 索引済みファイルの状態
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class FileManifestEntry:
+    """
+    前回の索引構築時点でのファイル状態を表すエンティティ
+    差分索引（変更のないファイルのスキップ）に使用する
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    doc_id: Optional[int] = None  # 索引対象外と判定されたファイルは None
+
+    def matches_stat(self, size: int, mtime_ns: int) -> bool:
+        """サイズと更新時刻が一致するか（ハッシュ計算を省略できるか）"""
+        return self.size == size and self.mtime_ns == mtime_ns
@@ -3,7 +3,7 @@ DocumentRepository インターフェース - Repository パターン
 外部実装（SQLite、PostgreSQL等）から独立させる
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from pathlib import Path
 import sys
@@ -11,7 +11,7 @@ import sys
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from domain.entities import Document, SearchResult
+from domain.entities import Chunk, Document, SearchResult, FileManifestEntry
 
 
 class DocumentRepository(ABC):
@@ -30,11 +30,29 @@ class DocumentRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def save_many(self, documents: List[Document]) -> List[Document]:
+        """
+        複数のドキュメントを1トランザクションでまとめて保存（作成または更新）
+
+        Args:
+            documents: 保存するドキュメントのリスト
+
+        Returns:
+            保存されたドキュメント（IDを含む、入力と同じ順序）
+        """
+        pass
+
     @abstractmethod
     def find_by_path(self, path: str) -> Optional[Document]:
         """パスでドキュメントを検索"""
         pass
 
+    @abstractmethod
+    def has_embeddings(self, doc_id: int) -> bool:
+        """ドキュメントのチャンクに埋め込みが保存されているか"""
+        pass
+
     @abstractmethod
     def find_by_id(self, doc_id: int) -> Optional[Document]:
         """IDでドキュメントを検索"""
@@ -62,6 +80,29 @@ class DocumentRepository(ABC):
             
         Returns:
             (Document, スコア)のタプルリスト、スコア昇順
+            （スコアは距離。正規化済みの埋め込みではコサイン距離 1 - cos）
+            ドキュメントごとに最も近いチャンク1件で、Document.text はそのパッセージ
+        """
+        pass
+
+    @abstractmethod
+    def search_by_text(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        top_k: int = 5
+    ) -> List[tuple[Document, float]]:
+        """
+        キーワード検索（全文検索）
+
+        Args:
+            query: 検索語（空白区切り）
+            category: カテゴリでフィルタ（Noneの場合は全て）
+            top_k: 返す結果数
+
+        Returns:
+            (Document, スコア)のタプルリスト、スコア昇順
+            ドキュメントごとに最もよく一致したチャンク1件で、Document.text はそのパッセージ
         """
         pass
 
@@ -76,6 +117,125 @@ class DocumentRepository(ABC):
         pass
 
     @abstractmethod
-    def save_embedding(self, doc_id: int, embedding: np.ndarray) -> None:
-        """ドキュメントの埋め込みベクトルを保存"""
+    def replace_chunks_many(self, chunks: List[Chunk]) -> List[Chunk]:
+        """
+        ドキュメントのチャンクを1トランザクションでまとめて置き換え
+
+        含まれる document_id の既存チャンクと埋め込みは削除される。
+
+        Args:
+            chunks: 保存するチャンクのリスト（document_id 設定済み）
+
+        Returns:
+            保存されたチャンク（IDを含む、入力と同じ順序）
+        """
+        pass
+
+    @abstractmethod
+    def save_embedding(self, chunk_id: int, embedding: np.ndarray) -> None:
+        """チャンクの埋め込みベクトルを保存"""
+        pass
+
+    @abstractmethod
+    def save_embeddings_many(self, chunk_ids: List[int], embeddings: np.ndarray) -> None:
+        """
+        複数チャンクの埋め込みベクトルを1トランザクションでまとめて保存
+
+        Args:
+            chunk_ids: チャンクIDのリスト
+            embeddings: (len(chunk_ids), 次元数) の埋め込み行列
+        """
+        pass
+
+    @abstractmethod
+    def save_indexed_documents(
+        self,
+        documents: List[Document],
+        passages: List[Tuple[int, int, str]],
+        embeddings: np.ndarray,
+    ) -> List[Document]:
+        """
+        ドキュメントとそのチャンク・埋め込みを1トランザクションでまとめて保存
+
+        途中で失敗した場合はどれも保存されない（ドキュメントだけが更新されることはない）。
+        含まれるドキュメントの既存チャンクと埋め込みは置き換えられる。
+        本文が変わった既存ドキュメントの別名登録は外し、別名だったページはマニフェストからも外す。
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            passages: (documents 内の位置, チャンク番号, パッセージ) のリスト
+            embeddings: (len(passages), 次元数) の埋め込み行列
+
+        Returns:
+            保存されたドキュメント（IDを含む、入力と同じ順序）
+        """
+        pass
+
+    @abstractmethod
+    def get_manifest(self) -> Dict[str, FileManifestEntry]:
+        """索引済みファイルのマニフェストをパスをキーにして全件取得"""
+        pass
+
+    @abstractmethod
+    def save_manifest_entries(self, entries: List[FileManifestEntry]) -> None:
+        """マニフェストエントリをまとめて保存（作成または更新）"""
+        pass
+
+    @abstractmethod
+    def get_cached_embeddings(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        埋め込みキャッシュを検索
+
+        Args:
+            keys: 埋め込み入力とモデルIDから作ったキャッシュキー
+
+        Returns:
+            見つかったキー → 埋め込みベクトル
+        """
+        pass
+
+    @abstractmethod
+    def save_cached_embeddings(self, keys: List[str], embeddings: np.ndarray) -> None:
+        """
+        埋め込みキャッシュにまとめて保存
+
+        Args:
+            keys: キャッシュキーのリスト
+            embeddings: (len(keys), 次元数) の埋め込み行列
+        """
+        pass
+
+    @abstractmethod
+    def get_signatures(self, category: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        正規ドキュメントの MinHash 署名をパスをキーにして取得
+
+        Args:
+            category: 指定した場合はこのカテゴリのドキュメントの署名だけを返す（None なら全件）
+        """
+        pass
+
+    @abstractmethod
+    def save_signatures(self, signatures: Dict[str, np.ndarray]) -> None:
+        """MinHash 署名をまとめて保存（作成または更新）"""
+        pass
+
+    @abstractmethod
+    def save_aliases(self, aliases: Dict[str, str]) -> None:
+        """
+        ほぼ重複のページを別名として保存
+
+        Args:
+            aliases: 別名パス → 正規ドキュメントのパス
+        """
+        pass
+
+    @abstractmethod
+    def get_aliases(self) -> Dict[str, str]:
+        """別名パス → 正規ドキュメントのパスを全件取得"""
+        pass
+
+    @abstractmethod
+    def delete_aliases(self, alias_paths: List[str]) -> None:
+        """別名の登録を削除"""
         pass
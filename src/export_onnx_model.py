@@ -0,0 +1,47 @@
+"""
+埋め込みモデルを ONNX に書き出すスクリプト
+
+TECHDOC_EMBEDDING_BACKEND=onnx で使うモデルを一度だけ作成します。
+書き出しには PyTorch・transformers・onnxruntime が必要ですが、
+書き出し後の推論（サーバー・索引構築）は onnxruntime と tokenizers だけで動きます。
+
+使い方:
+    python src/export_onnx_model.py                 # FP32 と int8 量子化モデルを書き出す
+    python src/export_onnx_model.py --no-quantize   # FP32 のみ
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# src/ をパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import ONNX_MODEL_DIR
+from infrastructure.models.embedding_model import MODEL_NAME
+from infrastructure.models.onnx_encoder import export_onnx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument(
+        "--output-dir",
+        default=ONNX_MODEL_DIR,
+        help=f"Directory to write the ONNX model and tokenizer (default: {ONNX_MODEL_DIR})",
+    )
+    parser.add_argument(
+        "--no-quantize",
+        action="store_true",
+        help="Skip writing the dynamically int8-quantized model",
+    )
+    args = parser.parse_args()
+
+    print(f"Exporting {MODEL_NAME} to ONNX...")
+    written = export_onnx(MODEL_NAME, args.output_dir, quantize=not args.no_quantize)
+    for path in written:
+        size_mb = Path(path).stat().st_size / (1024 * 1024)
+        print(f"  ✓ {path} ({size_mb:.1f} MB)")
+    print("\nSet TECHDOC_EMBEDDING_BACKEND=onnx (and TECHDOC_ONNX_QUANTIZE=1 for int8) to use it.")
+
+
+if __name__ == "__main__":
+    main()
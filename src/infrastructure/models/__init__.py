@@ -2,5 +2,7 @@
 Models パッケージ初期化
 """
 from .embedding_model import EmbeddingModel
+from .micro_batcher import MicroBatcher
+from .query_embedding_cache import QueryEmbeddingCache
 
-__all__ = ["EmbeddingModel"]
+__all__ = ["EmbeddingModel", "MicroBatcher", "QueryEmbeddingCache"]
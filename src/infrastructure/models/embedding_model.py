@@ -1,15 +1,77 @@
 """
 埋め込みモデル管理サービス
+
+推論バックエンドは config.EMBEDDING_BACKEND で選ぶ。
+- "torch": sentence-transformers（PyTorch）
+- "onnx": 書き出し済みの ONNX モデルを onnxruntime で実行（PyTorch は読み込まない）
+どちらのバックエンドも初期化時に必要なものだけを import する。
+返す埋め込みはどちらも L2 正規化済み（検索は内積・コサイン距離で比較する）。
 """
-from sentence_transformers import SentenceTransformer
+import atexit
+import sys
+
 import numpy as np
 
+from config import (
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZE,
+    QUERY_BATCH_MAX_SIZE,
+    QUERY_BATCH_MAX_WAIT_MS,
+    QUERY_CACHE_PATH,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL_SECONDS,
+)
+from .micro_batcher import MicroBatcher
+from .query_embedding_cache import QueryEmbeddingCache
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class SentenceTransformerEncoder:
+    """sentence-transformers（PyTorch）による推論"""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        # import torch が重いため、このバックエンドを選んだときだけ読み込む
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list, batch_size: int = 32) -> np.ndarray:
+        return self._model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True
+        ).astype("float32")
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._model.tokenizer.tokenize(text))
+
+
+def create_encoder(backend: str = EMBEDDING_BACKEND, quantized: bool = ONNX_QUANTIZE):
+    """
+    バックエンド名から推論器を作成
+
+    Returns:
+        (推論器, モデル識別子)。量子化で結果が変わる場合は識別子も変える
+        （埋め込みキャッシュにほかのバックエンドの結果が混ざらないように）
+    """
+    if backend == "onnx":
+        from .onnx_encoder import OnnxEncoder
+
+        model_id = f"{MODEL_NAME}+onnx-int8" if quantized else MODEL_NAME
+        return OnnxEncoder(ONNX_MODEL_DIR, quantized=quantized), model_id
+    if backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {backend!r} (expected 'torch' or 'onnx')")
+    return SentenceTransformerEncoder(MODEL_NAME), MODEL_NAME
+
 
 class EmbeddingModel:
     """埋め込みモデルの初期化と管理"""
 
+    model_id: str = MODEL_NAME  # 埋め込みキャッシュのキーに使うモデル識別子
     _instance: 'EmbeddingModel' = None  # シングルトン
-    _model: SentenceTransformer = None
+    _encoder = None  # SentenceTransformerEncoder または OnnxEncoder
+    _query_cache: QueryEmbeddingCache = None
+    _batcher: MicroBatcher = None  # None ならクエリを1件ずつエンコード
 
     def __new__(cls):
         """シングルトンパターン - モデルを1回だけ読み込む"""
@@ -20,14 +82,50 @@ class EmbeddingModel:
 
     def _initialize_model(self):
         """モデルを初期化"""
-        print("Loading embedding model (sentence-transformers/all-MiniLM-L6-v2)...")
-        self._model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-        print("Model loaded successfully")
+        # stdio の MCP サーバーでは stdout が JSON-RPC の通信路のため、進捗は stderr に出す
+        print(f"Loading embedding model ({MODEL_NAME}, backend: {EMBEDDING_BACKEND})...", file=sys.stderr)
+        self._encoder, self.model_id = create_encoder()
+        print("Model loaded successfully", file=sys.stderr)
+
+        self._query_cache = QueryEmbeddingCache(
+            max_entries=QUERY_CACHE_SIZE,
+            ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+            path=QUERY_CACHE_PATH or None,
+        )
+        if QUERY_CACHE_PATH:
+            self._query_cache.load()
+            # サーバー再起動後もキャッシュを引き継ぐため終了時に書き出す
+            atexit.register(self._query_cache.save)
+
+        if QUERY_BATCH_MAX_SIZE > 1:
+            # 同時に届いた検索クエリ（キャッシュミス分）を1回の推論にまとめる
+            self._batcher = MicroBatcher(
+                self._encoder.encode,
+                max_batch_size=QUERY_BATCH_MAX_SIZE,
+                max_wait_ms=QUERY_BATCH_MAX_WAIT_MS,
+            )
 
     def encode(self, text: str) -> np.ndarray:
-        """テキストをベクトルにエンコード"""
-        return self._model.encode(text).astype("float32")
+        """テキストをベクトルにエンコード（クエリ埋め込みキャッシュ経由）
+
+        返すベクトルはキャッシュと共有される読み取り専用配列。
+        複数スレッドから同時に呼ばれた場合、キャッシュにないクエリはマイクロバッチでまとめて推論する。
+        """
+        return self._query_cache.get_or_compute(self.model_id, text, self._encode_uncached)
+
+    def _encode_uncached(self, text: str) -> np.ndarray:
+        if self._batcher is not None:
+            return self._batcher.encode(text)
+        return self._encoder.encode([text])[0]
+
+    def cache_stats(self) -> dict:
+        """クエリ埋め込みキャッシュのヒット・ミス統計"""
+        return self._query_cache.stats()
+
+    def count_tokens(self, text: str) -> int:
+        """モデルのトークナイザでのトークン数（特殊トークンを除く）"""
+        return self._encoder.count_tokens(text)
 
-    def encode_batch(self, texts: list) -> np.ndarray:
-        """複数のテキストをバッチでエンコード"""
-        return self._model.encode(texts).astype("float32")
+    def encode_batch(self, texts: list, batch_size: int = 32) -> np.ndarray:
+        """複数のテキストをバッチでエンコード（索引構築用のためキャッシュしない）"""
+        return self._encoder.encode(texts, batch_size=batch_size)
@@ -0,0 +1,136 @@
+"""
+クエリエンコードのマイクロバッチ処理
+
+複数のクライアントから同時に届いたクエリを、最初の1件が届いてから max_wait_ms の間
+（または max_batch_size 件に達するまで）集め、1回の encode_batch でまとめて推論する。
+推論は専用のワーカースレッド1本で行い、各呼び出し元には自分のベクトルだけを返す。
+同期の呼び出し（encode）と asyncio からの呼び出し（encode_async）の両方に対応する。
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+# ワーカーに停止を伝える番兵
+_STOP = (None, None)
+
+
+class MicroBatcher:
+    """単発のエンコード要求をまとめて encode_batch に渡すバッチャー"""
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0
+    ):
+        """
+        Args:
+            encode_batch: テキストのリストを (件数, 次元数) の行列に変換する関数
+            max_batch_size: 1回の encode_batch に渡す最大件数
+            max_wait_ms: 最初の要求が届いてから後続を待つ時間（0 なら届いている分だけ）
+        """
+        self._encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self._requests: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.batches = 0  # 実行したバッチ数
+        self.items = 0  # エンコードした件数
+
+    def encode(self, text: str) -> np.ndarray:
+        """テキストをエンコード（バッチの完了まで待つ）"""
+        return self.submit(text).result()
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """イベントループを止めずにエンコード"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        """エンコード要求を登録し、結果の Future を返す"""
+        if self._closed.is_set():
+            raise RuntimeError("MicroBatcher is closed")
+        self._ensure_worker()
+        future: Future = Future()
+        self._requests.put((text, future))
+        if self._closed.is_set():
+            # close() と競合した場合に要求が残り続けないようにする
+            self._fail_pending(RuntimeError("MicroBatcher is closed"))
+        return future
+
+    def close(self) -> None:
+        """ワーカーを止める（未処理の要求はエラーで終わらせる）"""
+        self._closed.set()
+        if self._worker is not None:
+            self._requests.put(_STOP)
+            self._worker.join()
+        self._fail_pending(RuntimeError("MicroBatcher is closed"))
+
+    def _ensure_worker(self) -> None:
+        # 最初の要求でワーカーを起動する（使われないプロセスではスレッドを作らない）
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="query-micro-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """1バッチ分の要求を集める（停止時は空リスト）"""
+        first = self._requests.get()
+        if first is _STOP:
+            return []
+        batch = [first]
+
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    request = self._requests.get(timeout=remaining)
+                else:
+                    # 待ち時間を過ぎても、すでに届いている要求は同じバッチに含める
+                    request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                # このバッチを処理した後に停止する
+                self._requests.put(_STOP)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            # 呼び出し元がキャンセル済みの要求は推論しない
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self._encode_batch([text for text, _ in batch])
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def _fail_pending(self, error: Exception) -> None:
+        while True:
+            try:
+                _, future = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(error)
@@ -0,0 +1,140 @@
+"""
+onnxruntime による文埋め込みの推論（PyTorch を読み込まない CPU バックエンド）
+
+sentence-transformers の all-MiniLM-L6-v2 と同じ処理（トークナイズ → Transformer →
+attention mask 付き平均プーリング → L2 正規化）を onnxruntime と tokenizers だけで行う。
+モデルは export_onnx() で一度だけ ONNX に書き出し、必要なら動的 int8 量子化する。
+"""
+import os
+from typing import List
+
+import numpy as np
+
+ONNX_FILE = "model.onnx"
+QUANTIZED_ONNX_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# all-MiniLM-L6-v2 の max_seq_length（sentence-transformers と同じ位置で切り詰める）
+MAX_SEQ_LENGTH = 256
+
+
+def onnx_model_path(model_dir: str, quantized: bool) -> str:
+    """書き出し済みモデルのパス"""
+    return os.path.join(model_dir, QUANTIZED_ONNX_FILE if quantized else ONNX_FILE)
+
+
+def mean_pool_normalize(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    パディングを除いたトークン埋め込みの平均を L2 正規化する
+
+    Args:
+        token_embeddings: (batch, seq, dim) のトークン埋め込み
+        attention_mask: (batch, seq) のマスク（1 が実トークン）
+    """
+    mask = attention_mask.astype("float32")[:, :, None]
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled = summed / counts
+    norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return (pooled / norms).astype("float32")
+
+
+class OnnxEncoder:
+    """書き出し済みの ONNX モデルで埋め込みを計算する（SentenceTransformer の代替）"""
+
+    def __init__(self, model_dir: str, quantized: bool = False, max_seq_length: int = MAX_SEQ_LENGTH):
+        """
+        Args:
+            model_dir: export_onnx() の書き出し先
+            quantized: int8 量子化したモデルを使うか
+            max_seq_length: これより長い入力は切り詰める
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        path = onnx_model_path(model_dir, quantized)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"ONNX model not found: {path} (run export_onnx_model.py first)"
+            )
+        self._session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        # バッチ内の最長に合わせてパディング（sentence-transformers と同じ）
+        self.tokenizer.enable_padding()
+        # count_tokens 用に切り詰めなしのトークナイザも持つ
+        self._counting_tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self._counting_tokenizer.no_truncation()
+        self._counting_tokenizer.no_padding()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """テキストのリストを (len(texts), dim) の float32 行列にエンコード"""
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            outputs.append(self._encode_batch(texts[start:start + batch_size]))
+        if not outputs:
+            return np.empty((0, 0), dtype="float32")
+        return np.concatenate(outputs)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype="int64")
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype="int64")
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype="int64")
+        token_embeddings = self._session.run(None, feeds)[0]
+        return mean_pool_normalize(token_embeddings, attention_mask)
+
+    def count_tokens(self, text: str) -> int:
+        """トークン数（特殊トークンを除く）"""
+        return len(self._counting_tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool = True) -> List[str]:
+    """
+    Hugging Face のモデルを ONNX に書き出す（PyTorch と transformers が必要）
+
+    Args:
+        model_name: 書き出すモデル名
+        model_dir: 書き出し先ディレクトリ
+        quantize: 動的 int8 量子化したモデルも書き出すか
+
+    Returns:
+        書き出したモデルファイルのパス
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    # tokenizer.json（fast tokenizer）を推論側の tokenizers で読み込む
+    tokenizer.save_pretrained(model_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    path = onnx_model_path(model_dir, quantized=False)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    written = [path]
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = onnx_model_path(model_dir, quantized=True)
+        quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+        written.append(quantized_path)
+    return written
@@ -0,0 +1,164 @@
+"""
+クエリ埋め込みキャッシュ
+
+MCP クライアントは同じ（または表記ゆれだけの）クエリを繰り返し送るため、
+正規化したクエリ文字列とモデル名をキーにして埋め込みベクトルを LRU で保持する。
+TTL とディスクへの永続化（npz）は任意。
+"""
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """キャッシュキー用にクエリを正規化（前後空白除去・空白の畳み込み・小文字化）
+
+    all-MiniLM-L6-v2 は uncased モデルのため、大文字小文字を畳んでも埋め込みは変わらない。
+    """
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """スレッドセーフな LRU（+任意の TTL）クエリ埋め込みキャッシュ"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 0,
+        path: Optional[str] = None,
+    ):
+        """
+        Args:
+            max_entries: 保持する最大件数（0 以下でキャッシュ無効）
+            ttl_seconds: エントリの有効期間（秒）。0 以下で無期限
+            path: 永続化先の npz ファイル（None で永続化しない）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        # key -> (作成時刻, ベクトル)。末尾が最近使われたもの
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """キャッシュ済みのベクトルを返す（なければ None）"""
+        key = (model_name, normalize_query(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0], time.time()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model_name: str, text: str, vector: np.ndarray) -> np.ndarray:
+        """ベクトルを登録し、上限を超えた分を古い順に追い出す（登録したベクトルを返す）"""
+        vector = np.array(vector, dtype="float32")
+        # 呼び出し側で書き換えられてもキャッシュが壊れないよう読み取り専用にする
+        vector.flags.writeable = False
+        if self.max_entries <= 0:
+            return vector
+        key = (model_name, normalize_query(text))
+        with self._lock:
+            self._entries[key] = (time.time(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+    def get_or_compute(self, model_name: str, text: str, compute) -> np.ndarray:
+        """キャッシュにあれば返し、なければ compute(text) の結果を登録して返す"""
+        vector = self.get(model_name, text)
+        if vector is None:
+            vector = self.put(model_name, text, compute(text))
+        return vector
+
+    def stats(self) -> dict:
+        """ヒット数・ミス数・件数・ヒット率"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        """エントリと統計をリセット"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self) -> None:
+        """path に npz として書き出す（一時ファイル経由で置き換え）"""
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            items = [
+                (key, created_at, vector)
+                for key, (created_at, vector) in self._entries.items()
+                if not self._is_expired(created_at, now)
+            ]
+        if not items:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                models=np.array([key[0] for key, _, _ in items]),
+                queries=np.array([key[1] for key, _, _ in items]),
+                created_at=np.array([created_at for _, created_at, _ in items], dtype="float64"),
+                vectors=np.stack([vector for _, _, vector in items]),
+            )
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> int:
+        """path から読み込み、読み込んだ件数を返す（ファイルがない・壊れている場合は 0）"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                models = data["models"].tolist()
+                queries = data["queries"].tolist()
+                created = data["created_at"].tolist()
+                vectors = data["vectors"].astype("float32")
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for model_name, query, created_at, vector in zip(models, queries, created, vectors):
+                if self._is_expired(created_at, now):
+                    continue
+                vector.flags.writeable = False
+                self._entries[(model_name, query)] = (created_at, vector)
+                loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return loaded
@@ -1,6 +1,21 @@
 """
 Persistence パッケージ初期化
 """
-from .sqlite_document_repository import SQLiteDocumentRepository
+from .sqlite_document_repository import VECTOR_STORAGE_TYPES, SQLiteDocumentRepository
+from .vector_index import (
+    HnswVectorIndex,
+    NumpyVectorIndex,
+    export_vector_index,
+    load_vector_index,
+    vector_index_dir,
+)
 
-__all__ = ["SQLiteDocumentRepository"]
+__all__ = [
+    "SQLiteDocumentRepository",
+    "VECTOR_STORAGE_TYPES",
+    "HnswVectorIndex",
+    "NumpyVectorIndex",
+    "export_vector_index",
+    "load_vector_index",
+    "vector_index_dir",
+]
@@ -3,7 +3,11 @@ SQLite DocumentRepository 実装
 """
 import sqlite3
 import os
-from typing import List, Optional
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import numpy as np
 from pathlib import Path
 import sys
@@ -11,20 +15,196 @@ import sys
 # 親ディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from domain.entities import Document
+from domain.entities import Chunk, Document, FileManifestEntry
 from domain.repositories import DocumentRepository
 
 
+# 複数行 INSERT 1文あたりの最大行数（SQLite のプレースホルダ上限に収まるように）
+_UPSERT_ROWS_PER_STATEMENT = 500
+
+# 埋め込みの保存形式 → vec0 の列の型
+# "float32" 以外では vec0 に量子化したベクトルを置いて粗く KNN し、chunk_vectors の
+# float16 ベクトルで上位候補の距離を計算し直す（DB サイズとスキャン量を減らす）
+VECTOR_STORAGE_TYPES = {"float32": "FLOAT[384]", "int8": "INT8[384]", "bit": "BIT[384]"}
+# vec0 に量子化したベクトルを渡すときの変換関数
+_VECTOR_SQL_PARAMS = {"float32": "?", "int8": "vec_int8(?)", "bit": "vec_bit(?)"}
+
+
+def _doc_embeddings_ddl(storage: str) -> str:
+    """
+    doc_embeddings: カテゴリを partition key にした vec0 テーブル
+
+    カテゴリ絞り込みがベクトルスキャンの内側で効くようにする
+    """
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS doc_embeddings USING vec0(
+            category TEXT PARTITION KEY,
+            embedding {VECTOR_STORAGE_TYPES[storage]}
+        );
+    """
+
+
+def _insert_embedding_sql(storage: str) -> str:
+    """埋め込みの rowid はチャンクID。チャンクが属するドキュメントのカテゴリをパーティションにする"""
+    return f"""
+        INSERT INTO doc_embeddings (rowid, category, embedding)
+        SELECT chunks.id, COALESCE(documents.category, ''), {_VECTOR_SQL_PARAMS[storage]}
+        FROM chunks
+        JOIN documents ON documents.id = chunks.document_id
+        WHERE chunks.id = ?
+    """
+
+
+# int8 量子化の倍率（成分 × 倍率を四捨五入する）。DB ごとに metadata に保存し、
+# 既存の埋め込みから変換する場合は成分の最大絶対値に合わせる
+_INT8_SCALE_KEY = "int8_scale"
+# 正規化済みの埋め込みの成分はほぼ ±0.5 に収まる
+_DEFAULT_INT8_SCALE = 127 / 0.5
+
+# 保存した埋め込みを L2 正規化済みにしたか（"1"）。正規化済みの DB では
+# 内積（コサイン類似度）で比較し、スコアはコサイン距離 1 - cos を返す
+_EMBEDDINGS_NORMALIZED_KEY = "embeddings_normalized"
+
+# 埋め込みを変更するたびに進めるリビジョン（書き出したベクトル索引の鮮度確認用）
+_EMBEDDINGS_REVISION_KEY = "embeddings_revision"
+_BUMP_EMBEDDINGS_REVISION_SQL = f"""
+    INSERT INTO metadata (key, value) VALUES ('{_EMBEDDINGS_REVISION_KEY}', '1')
+    ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+"""
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """最後の軸を L2 正規化する（ゼロベクトルはそのまま）"""
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+# chunks_fts: チャンク本文の FTS5 全文検索索引（BM25 でのキーワード検索用）
+# 本文は chunks を参照し（external content）、索引は保存・削除の処理で更新する
+_CHUNKS_FTS_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+        text,
+        content = 'chunks',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+"""
+# 全文検索クエリに使う語数の上限
+_MAX_FTS_TERMS = 32
+
+
+def _fts_match_query(query: str) -> str:
+    """
+    検索語を FTS5 の MATCH 式にする
+
+    空白区切りの語をそれぞれフレーズとして OR でつなぐ。aws_lambda.Function のような
+    API 名は区切り文字で分かれたトークンが連続するフレーズとして一致する。
+    """
+    terms = [term for term in query.split() if re.search(r"\w", term)][:_MAX_FTS_TERMS]
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+# ドキュメント単位で上位 top_k 件を得るため、チャンクを多めに KNN で取得する倍率
+_CHUNK_OVERSAMPLE = 4
+# vec0 の KNN で指定できる k の上限（ベクトル索引・BM25 で取得するチャンク数の上限も兼ねる）
+_MAX_KNN_K = 4096
+# 量子化した保存形式で、粗い KNN で取る候補の倍率（候補の距離を float16 で計算し直す）
+_RESCORE_OVERSAMPLE = 2
+
+
 class SQLiteDocumentRepository(DocumentRepository):
-    """SQLiteベースのドキュメント永続化"""
+    """
+    SQLiteベースのドキュメント永続化
+
+    接続はスレッドごとに1本を保持して使い回す（sqlite-vec のロードと
+    PRAGMA 設定は接続作成時の1回だけ）。executor スレッドから呼び出しても
+    スレッド間で接続を共有しないため安全。使い終わったら close() するか
+    with 文で利用する。
+
+    vector_engine を指定すると、ベクトル検索はその索引（DB から書き出したもの）で行い、
+    本文は最終的な上位のチャンクだけを SQLite から読む。索引が DB の埋め込みより古い場合は
+    vec0 の KNN に戻る。
+
+    vector_storage で埋め込みの保存形式（"float32" / "int8" / "bit"）を指定すると、
+    既存 DB の形式が異なる場合は保存済みのベクトルから変換する（再エンコードは不要）。
+    省略時は DB の現在の形式を使う（新規 DB は "float32"）。
 
-    def __init__(self, db_path: str):
+    埋め込みは L2 正規化して保存し、検索スコアはコサイン距離（1 - cos、昇順）になる。
+    正規化していない既存 DB は開いたときに保存済みのベクトルを一括で正規化する
+    （sqlite-vec が読み込める場合。再エンコードは不要）。正規化できなかった DB の
+    スコアは L2 距離のまま（score_metric で判別できる）。
+    """
+
+    def __init__(self, db_path: str, vector_engine=None, vector_storage: Optional[str] = None):
+        if vector_storage is not None and vector_storage not in VECTOR_STORAGE_TYPES:
+            raise ValueError(
+                f"Unknown vector storage: {vector_storage!r} "
+                f"(expected one of {tuple(VECTOR_STORAGE_TYPES)})"
+            )
         self.db_path = db_path
-        self._ensure_db_created()
+        self.vector_engine = vector_engine
+        self.vector_storage = vector_storage or "float32"
+        self.rescore_oversample = _RESCORE_OVERSAMPLE
+        self._int8_scale = _DEFAULT_INT8_SCALE
+        self.embeddings_normalized = False
+        self.fts_available = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (接続を開いたスレッドの弱参照, 接続)。終了したスレッドの接続は新しい接続を開くときに閉じる
+        self._connections: List[Tuple[weakref.ref, sqlite3.Connection]] = []
+        # close() のたびに進め、古い世代のスレッドローカル接続を無効化する
+        self._generation = 0
+        self._ensure_db_created(vector_storage)
+
+    def __enter__(self) -> "SQLiteDocumentRepository":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """このリポジトリが開いた全スレッドの接続を閉じる"""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            self._generation += 1
+        self._close_connections(conn for _, conn in connections)
 
-    def _get_connection(self):
-        """DB接続を取得"""
-        conn = sqlite3.connect(self.db_path)
+    @staticmethod
+    def _close_connections(connections: Iterable[sqlite3.Connection]) -> None:
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """呼び出しスレッド専用のDB接続を取得（なければ作成）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        conn = self._open_connection()
+        with self._lock:
+            live, stale = [], []
+            for owner, other in self._connections:
+                thread = owner()
+                if thread is not None and thread.is_alive():
+                    live.append((owner, other))
+                else:
+                    stale.append(other)
+            self._connections = live + [(weakref.ref(threading.current_thread()), conn)]
+            self._local.conn = conn
+            self._local.generation = self._generation
+        # 終了したスレッドの接続は誰も使わないので閉じる（スレッドを作り直す呼び出し元でも接続が溜まらない）
+        self._close_connections(stale)
+        return conn
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """新しいDB接続を作成し、拡張とPRAGMAを適用"""
+        # close() を別スレッドから呼べるよう check_same_thread は無効化する
+        # （接続自体はスレッドローカルなので同時に共有されることはない）
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         # sqlite-vec を有効化
         try:
             conn.enable_load_extension(True)
@@ -33,19 +213,35 @@ class SQLiteDocumentRepository(DocumentRepository):
             conn.enable_load_extension(False)
         except Exception:
             pass
+
+        # 接続単位のpragma設定
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute("PRAGMA mmap_size=134217728;")
+            conn.execute("PRAGMA busy_timeout=5000;")
+            conn.execute("PRAGMA temp_store=MEMORY;")
+        except sqlite3.OperationalError:
+            pass
         return conn
 
-    def _ensure_db_created(self):
-        """DB及びテーブルが存在することを保証"""
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """スレッドの接続を返し、成功時にコミット・例外時にロールバックする"""
         conn = self._get_connection()
-        
         try:
-            # pragma設定
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _ensure_db_created(self, requested_storage: Optional[str] = None):
+        """DB及びテーブルが存在することを保証"""
+        with self._transaction() as conn:
+            # DBファイル単位のpragma設定（page_sizeはWAL化・テーブル作成前のみ有効）
             try:
-                conn.execute("PRAGMA journal_mode=WAL;")
-                conn.execute("PRAGMA synchronous=NORMAL;")
                 conn.execute("PRAGMA page_size=32768;")
-                conn.execute("PRAGMA mmap_size=134217728;")
+                conn.execute("PRAGMA journal_mode=WAL;")
             except sqlite3.OperationalError:
                 pass
 
@@ -71,26 +267,357 @@ class SQLiteDocumentRepository(DocumentRepository):
             except sqlite3.OperationalError:
                 pass
 
+            # file_manifestテーブル（差分索引用）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_manifest (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    content_hash TEXT,
+                    doc_id INTEGER
+                );
+                """
+            )
+
+            # chunksテーブル（埋め込みの単位となるパッセージ）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_id INTEGER NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    text TEXT,
+                    UNIQUE (document_id, chunk_index)
+                );
+                """
+            )
+
+            # embedding_cacheテーブル（埋め込み入力とモデルIDのハッシュ → ベクトル）
+            # ドキュメントの削除とは独立に残し、再クロールや別カテゴリの同一テキストで再利用する
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+
+            # metadataテーブル（埋め込みのリビジョンなど、DB 全体の設定値）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                """
+            )
+
+            # chunk_vectorsテーブル（量子化した保存形式での再計算用の float16 ベクトル）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_vectors (
+                    chunk_id INTEGER PRIMARY KEY,
+                    embedding BLOB NOT NULL
+                );
+                """
+            )
+
+            # document_signaturesテーブル（正規ドキュメントの MinHash 署名、ほぼ重複の検出用）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS document_signatures (
+                    path TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL
+                );
+                """
+            )
+
+            # document_aliasesテーブル（ほぼ重複として索引しなかったページ → 正規ドキュメント）
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS document_aliases (
+                    alias_path TEXT PRIMARY KEY,
+                    canonical_path TEXT NOT NULL
+                );
+                """
+            )
+
             # doc_embeddingsテーブル
             try:
+                self._migrate_doc_embeddings(conn)
+                self.vector_storage = self._stored_vector_storage(conn) or self.vector_storage
+                conn.execute(_doc_embeddings_ddl(self.vector_storage))
+                self._backfill_chunks(conn)
+            except sqlite3.OperationalError as e:
+                # sqlite-vec を読み込めない環境では vec0 テーブルを作れない（ベクトル検索以外は使える）
+                print(f"Warning: vector table is unavailable: {e}", file=sys.stderr)
+
+            if self.vector_storage == "int8":
                 conn.execute(
-                    """
-                    CREATE VIRTUAL TABLE IF NOT EXISTS doc_embeddings USING vec0(
-                        embedding FLOAT[384]
-                    );
-                    """
+                    "INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)",
+                    (_INT8_SCALE_KEY, repr(_DEFAULT_INT8_SCALE)),
                 )
-            except Exception:
+            row = conn.execute(
+                "SELECT value FROM metadata WHERE key = ?", (_INT8_SCALE_KEY,)
+            ).fetchone()
+            if row:
+                self._int8_scale = float(row[0])
+
+            # chunks_ftsテーブル（チャンクの backfill 後に作り、既存のチャンクから索引を作る）
+            fts_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'"
+            ).fetchone()
+            try:
+                conn.execute(_CHUNKS_FTS_DDL)
+                if not fts_exists:
+                    conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+                self.fts_available = True
+            except sqlite3.OperationalError:
+                # FTS5 を含まない SQLite ではキーワード検索を無効にする
                 pass
+            row = conn.execute(
+                "SELECT value FROM metadata WHERE key = ?", (_EMBEDDINGS_NORMALIZED_KEY,)
+            ).fetchone()
+            self.embeddings_normalized = row is not None and row[0] == "1"
+
+        # マイグレーション: 正規化していない既存の埋め込みを一括で正規化する
+        if not self.embeddings_normalized and self._vec_loaded():
+            self._migrate_in_transaction(self._normalize_embeddings)
+        # 保存形式の変換（明示的に指定された場合だけ。失敗したら例外を送出する）
+        if requested_storage is not None and requested_storage != self.vector_storage:
+            self._migrate_in_transaction(self._rebuild_embeddings, requested_storage)
+
+    def _vec_loaded(self) -> bool:
+        """この接続で sqlite-vec が使えるか"""
+        try:
+            self._get_connection().execute("SELECT vec_version()")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _migrate_in_transaction(self, migrate, *args) -> None:
+        """DDL も含めて1トランザクションで移行し、失敗したら状態を戻して例外を送出する"""
+        previous = (self.vector_storage, self._int8_scale, self.embeddings_normalized)
+        try:
+            with self._transaction() as conn:
+                conn.execute("BEGIN")
+                migrate(conn, *args)
+        except Exception:
+            self.vector_storage, self._int8_scale, self.embeddings_normalized = previous
+            raise
+
+    def _normalize_embeddings(self, conn: sqlite3.Connection) -> None:
+        """
+        マイグレーション: 保存済みの埋め込みと埋め込みキャッシュを L2 正規化する
+
+        正規化しても向きは変わらないため、再エンコードせずにベクトルを書き換える。
+        """
+        if conn.execute("SELECT 1 FROM doc_embeddings LIMIT 1").fetchone():
+            self._rebuild_embeddings(conn, self.vector_storage, normalize=True)
+
+        # 埋め込みキャッシュも正規化しておく（再利用したベクトルがそのまま保存されるため）
+        last_key = ""
+        while True:
+            rows = conn.execute(
+                "SELECT key, embedding FROM embedding_cache WHERE key > ? ORDER BY key LIMIT ?",
+                (last_key, _UPSERT_ROWS_PER_STATEMENT),
+            ).fetchall()
+            if not rows:
+                break
+            vectors = _l2_normalize(np.stack([np.frombuffer(blob, dtype="float32") for _, blob in rows]))
+            conn.executemany(
+                "UPDATE embedding_cache SET embedding = ? WHERE key = ?",
+                [(vector.tobytes(), key) for (key, _), vector in zip(rows, vectors)],
+            )
+            last_key = rows[-1][0]
+
+        conn.execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, '1')",
+            (_EMBEDDINGS_NORMALIZED_KEY,),
+        )
+        self.embeddings_normalized = True
+
+    @staticmethod
+    def _stored_vector_storage(conn: sqlite3.Connection) -> Optional[str]:
+        """既存の doc_embeddings の保存形式（テーブルがなければ None）"""
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'doc_embeddings'"
+        ).fetchone()
+        if row is None:
+            return None
+        sql = row[0].lower()
+        for storage, column_type in VECTOR_STORAGE_TYPES.items():
+            if column_type.lower() in sql:
+                return storage
+        return "float32"
 
+    def _rebuild_embeddings(
+        self, conn: sqlite3.Connection, storage: str, normalize: bool = False
+    ) -> None:
+        """
+        doc_embeddings を指定の保存形式で作り直す
+
+        保存済みのベクトル（float32 の vec0 または chunk_vectors の float16）を
+        一時テーブルに退避し、新しい形式で再投入する（再エンコードは不要）。
+        量子化した形式から float32 に戻す場合は float16 の精度になる。
+        normalize を指定すると再投入前に L2 正規化する。
+        """
+        source = self.vector_storage
+        if source == "float32":
+            conn.execute(
+                """
+                CREATE TEMP TABLE vector_storage_backup AS
+                SELECT rowid AS id, embedding FROM doc_embeddings
+                """
+            )
+            source_dtype = "float32"
+        else:
+            conn.execute(
+                """
+                CREATE TEMP TABLE vector_storage_backup AS
+                SELECT chunk_id AS id, embedding FROM chunk_vectors
+                WHERE chunk_id IN (SELECT rowid FROM doc_embeddings)
+                """
+            )
+            source_dtype = "float16"
+
+        def batches() -> Iterator[tuple[List[int], np.ndarray]]:
+            cursor = conn.execute("SELECT id, embedding FROM temp.vector_storage_backup ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(_UPSERT_ROWS_PER_STATEMENT)
+                if not rows:
+                    return
+                vectors = np.stack([
+                    np.frombuffer(row[1], dtype=source_dtype) for row in rows
+                ]).astype("float32")
+                yield [row[0] for row in rows], _l2_normalize(vectors) if normalize else vectors
+
+        if storage == "int8":
+            # 保存済みの成分の最大絶対値が ±127 になる倍率を使う
+            max_abs = 0.0
+            for _, vectors in batches():
+                max_abs = max(max_abs, float(np.abs(vectors).max()))
+            self._int8_scale = 127 / max_abs if max_abs > 0 else _DEFAULT_INT8_SCALE
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                (_INT8_SCALE_KEY, repr(self._int8_scale)),
+            )
+
+        conn.execute("DROP TABLE doc_embeddings")
+        conn.execute("DELETE FROM chunk_vectors")
+        self.vector_storage = storage
+        conn.execute(_doc_embeddings_ddl(storage))
+        for chunk_ids, vectors in batches():
+            self._insert_embeddings(conn, chunk_ids, vectors)
+        conn.execute("DROP TABLE temp.vector_storage_backup")
+        conn.execute(_BUMP_EMBEDDINGS_REVISION_SQL)
+
+    def _migrate_doc_embeddings(self, conn: sqlite3.Connection) -> None:
+        """
+        マイグレーション: partition key なしの旧 doc_embeddings を作り直す
+
+        既存の埋め込みを一時テーブルに退避し、カテゴリ付きで再投入する
+        （再エンコードは不要）。
+        """
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'doc_embeddings'"
+        ).fetchone()
+        if row is None or "partition key" in row[0].lower():
+            return
+
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                """
+                CREATE TEMP TABLE doc_embeddings_backup AS
+                SELECT e.rowid AS id, COALESCE(d.category, '') AS category,
+                       e.embedding AS embedding
+                FROM doc_embeddings e
+                JOIN documents d ON d.id = e.rowid
+                """
+            )
+            conn.execute("DROP TABLE doc_embeddings")
+            conn.execute(_doc_embeddings_ddl("float32"))
+            conn.execute(
+                """
+                INSERT INTO doc_embeddings (rowid, category, embedding)
+                SELECT id, category, embedding FROM temp.doc_embeddings_backup
+                """
+            )
+            conn.execute("DROP TABLE temp.doc_embeddings_backup")
             conn.commit()
-        finally:
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _backfill_chunks(self, conn: sqlite3.Connection) -> None:
+        """
+        マイグレーション: ドキュメント単位の埋め込みしかない既存DBに
+        1ドキュメント1チャンクの行を作る
+
+        チャンクIDをドキュメントIDと同じにすることで、既存の埋め込み
+        （rowid = ドキュメントID）をそのまま使える。パッセージ単位に
+        分割し直すには build_index.py --full で再構築する。
+        """
+        if conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone():
+            return
+        conn.execute(
+            """
+            INSERT INTO chunks (id, document_id, chunk_index, text)
+            SELECT id, id, 0, text FROM documents
+            WHERE id IN (SELECT rowid FROM doc_embeddings)
+            """
+        )
+
+    def _delete_documents(self, conn: sqlite3.Connection, doc_ids: List[int]) -> None:
+        """ドキュメントと、そのチャンク・埋め込み・マニフェスト・重複検出の情報を削除"""
+        for doc_id in doc_ids:
+            self._delete_chunks(conn, doc_id)
+            # 次回の索引構築で再処理されるようマニフェストからも外す
+            conn.execute("DELETE FROM file_manifest WHERE doc_id = ?", (doc_id,))
+            row = conn.execute("SELECT path FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            if row:
+                self._release_aliases(conn, row[0])
+                conn.execute("DELETE FROM document_signatures WHERE path = ?", (row[0],))
+            conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    @staticmethod
+    def _release_aliases(conn: sqlite3.Connection, canonical_path: str) -> None:
+        """正規ドキュメントの別名登録を外し、別名だったページを次回は正規ドキュメント候補として再処理させる"""
+        conn.execute(
+            "DELETE FROM file_manifest WHERE path IN "
+            "(SELECT alias_path FROM document_aliases WHERE canonical_path = ?)",
+            (canonical_path,)
+        )
+        conn.execute("DELETE FROM document_aliases WHERE canonical_path = ?", (canonical_path,))
+
+    def _delete_chunks(self, conn: sqlite3.Connection, doc_id: int) -> None:
+        """ドキュメントのチャンクとその埋め込みを削除"""
+        chunk_ids = conn.execute(
+            "SELECT id FROM chunks WHERE document_id = ?", (doc_id,)
+        ).fetchall()
+        if not chunk_ids:
+            return
+        # vec0 は rowid 指定の削除のみ効率的に扱えるため1行ずつ削除する
+        conn.executemany("DELETE FROM doc_embeddings WHERE rowid = ?", chunk_ids)
+        conn.executemany("DELETE FROM chunk_vectors WHERE chunk_id = ?", chunk_ids)
+        if self.fts_available:
+            # external content の FTS5 は削除前の本文を渡して索引から外す
+            conn.execute(
+                """
+                INSERT INTO chunks_fts (chunks_fts, rowid, text)
+                SELECT 'delete', id, text FROM chunks WHERE document_id = ?
+                """,
+                (doc_id,),
+            )
+        conn.execute("DELETE FROM chunks WHERE document_id = ?", (doc_id,))
+        conn.execute(_BUMP_EMBEDDINGS_REVISION_SQL)
 
     def save(self, document: Document) -> Document:
         """ドキュメントを保存（作成または更新）"""
-        conn = self._get_connection()
-        try:
+        with self._transaction() as conn:
             existing = conn.execute(
                 "SELECT id FROM documents WHERE path = ?", (document.path,)
             ).fetchone()
@@ -116,51 +643,141 @@ class SQLiteDocumentRepository(DocumentRepository):
                 )
                 document.id = cur.lastrowid
 
-            conn.commit()
             return document
-        finally:
-            conn.close()
+
+    def save_many(self, documents: List[Document]) -> List[Document]:
+        """複数のドキュメントを1トランザクションでまとめて保存"""
+        if not documents:
+            return []
+        with self._transaction() as conn:
+            ids_by_path = self._upsert_documents(conn, documents)
+
+        for document in documents:
+            document.id = ids_by_path[document.path]
+        return documents
+
+    @staticmethod
+    def _upsert_documents(conn: sqlite3.Connection, documents: List[Document]) -> Dict[str, int]:
+        """ドキュメントを upsert し、パス → ID を返す"""
+        ids_by_path = {}
+        # executemany は RETURNING の結果を返さないため、複数行 VALUES で upsert する
+        for start in range(0, len(documents), _UPSERT_ROWS_PER_STATEMENT):
+            chunk = documents[start:start + _UPSERT_ROWS_PER_STATEMENT]
+            placeholders = ", ".join(["(?, ?, ?, ?)"] * len(chunk))
+            params = []
+            for document in chunk:
+                params.extend(
+                    (document.path, document.url, document.text, document.category)
+                )
+            rows = conn.execute(
+                f"""
+                INSERT INTO documents (path, url, text, category)
+                VALUES {placeholders}
+                ON CONFLICT(path) DO UPDATE SET
+                    url = excluded.url,
+                    text = excluded.text,
+                    category = excluded.category
+                RETURNING id, path
+                """,
+                params,
+            ).fetchall()
+            ids_by_path.update({path: doc_id for doc_id, path in rows})
+        return ids_by_path
+
+    def save_indexed_documents(
+        self,
+        documents: List[Document],
+        passages: List[Tuple[int, int, str]],
+        embeddings: np.ndarray,
+    ) -> List[Document]:
+        """
+        ドキュメント・チャンク・埋め込みを1トランザクションでまとめて保存
+
+        本文が変わった既存ドキュメントは、別名の判定が古くなるため別名登録を外す
+        （別名だったページはマニフェストからも外し、次回の索引構築で再判定させる）。
+        """
+        if len(passages) != len(embeddings):
+            raise ValueError(
+                f"passages and embeddings length mismatch: {len(passages)} != {len(embeddings)}"
+            )
+        if not documents:
+            return []
+        vectors = np.asarray(embeddings, dtype="float32")
+        with self._transaction() as conn:
+            for document in documents:
+                row = conn.execute(
+                    "SELECT text FROM documents WHERE path = ?", (document.path,)
+                ).fetchone()
+                if row is not None and row[0] != document.text:
+                    self._release_aliases(conn, document.path)
+            ids_by_path = self._upsert_documents(conn, documents)
+            doc_ids = [ids_by_path[document.path] for document in documents]
+            chunks = [
+                Chunk(document_id=doc_ids[doc_pos], chunk_index=chunk_index, text=text)
+                for doc_pos, chunk_index, text in passages
+            ]
+            # チャンクのないドキュメントも古いチャンクは消す
+            for doc_id in sorted(set(doc_ids)):
+                self._delete_chunks(conn, doc_id)
+            ids_by_key = self._insert_chunks(conn, chunks)
+            self._replace_embeddings(
+                conn,
+                [ids_by_key[(chunk.document_id, chunk.chunk_index)] for chunk in chunks],
+                vectors,
+            )
+
+        # コミット後に ID を反映する（失敗時は入力を変更しない）
+        for document, doc_id in zip(documents, doc_ids):
+            document.id = doc_id
+        return documents
 
     def find_by_path(self, path: str) -> Optional[Document]:
         """パスでドキュメントを検索"""
         conn = self._get_connection()
+        row = conn.execute(
+            "SELECT id, path, url, text, category FROM documents WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row:
+            return Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
+        return None
+
+    def has_embeddings(self, doc_id: int) -> bool:
+        """ドキュメントのチャンクに埋め込みが保存されているか"""
+        conn = self._get_connection()
         try:
+            # 1ドキュメントの埋め込みはまとめて書くため、先頭チャンクだけを確認する
             row = conn.execute(
-                "SELECT id, path, url, text, category FROM documents WHERE path = ?",
-                (path,),
+                """
+                SELECT 1 FROM doc_embeddings
+                WHERE rowid = (SELECT MIN(id) FROM chunks WHERE document_id = ?)
+                """,
+                (doc_id,),
             ).fetchone()
-            if row:
-                return Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
-            return None
-        finally:
-            conn.close()
+        except sqlite3.OperationalError:
+            # sqlite-vec を読み込めない場合は確認できないため、保存されていないとみなす
+            return False
+        return row is not None
 
     def find_by_id(self, doc_id: int) -> Optional[Document]:
         """IDでドキュメントを検索"""
         conn = self._get_connection()
-        try:
-            row = conn.execute(
-                "SELECT id, path, url, text, category FROM documents WHERE id = ?",
-                (doc_id,),
-            ).fetchone()
-            if row:
-                return Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
-            return None
-        finally:
-            conn.close()
+        row = conn.execute(
+            "SELECT id, path, url, text, category FROM documents WHERE id = ?",
+            (doc_id,),
+        ).fetchone()
+        if row:
+            return Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
+        return None
 
     def delete_by_id(self, doc_id: int) -> bool:
         """IDでドキュメントを削除"""
-        conn = self._get_connection()
-        try:
-            # 埋め込みを先に削除
-            conn.execute("DELETE FROM doc_embeddings WHERE rowid = ?", (doc_id,))
-            # ドキュメントを削除
-            cursor = conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-            conn.commit()
-            return cursor.rowcount > 0
-        finally:
-            conn.close()
+        with self._transaction() as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM documents WHERE id = ?", (doc_id,)
+            ).fetchone()
+            self._delete_documents(conn, [doc_id])
+            return exists is not None
 
     def search_by_vector(
         self, 
@@ -168,55 +785,339 @@ class SQLiteDocumentRepository(DocumentRepository):
         category: Optional[str] = None,
         top_k: int = 5
     ) -> List[tuple[Document, float]]:
-        """ベクトル類似度検索"""
+        """
+        ベクトル類似度検索
+
+        vec0 の KNN（MATCH ... AND k = ?）でチャンクを検索し、カテゴリは
+        partition key でスキャン内で絞り込む。ドキュメントごとに最も近い
+        チャンクだけを残し、返す Document の text はそのパッセージになる。
+        最新のベクトル索引（vector_engine）があればそちらでチャンクを選ぶ。
+
+        正規化済みの DB ではクエリも正規化し、スコアはコサイン距離（1 - cos）。
+        単位ベクトル同士では L2 距離 d と 1 - cos = d^2 / 2 の順序が一致するため、
+        vec0 の L2 KNN の結果をそのまま変換する。
+        """
+        vector = np.asarray(vector, dtype="float32")
+        if self.embeddings_normalized:
+            vector = _l2_normalize(vector)
+        engine = self._current_vector_engine()
+        if engine is not None:
+            return self._search_with_engine(engine, vector, category, top_k)
+        if self.vector_storage != "float32":
+            return self._search_quantized(vector, category, top_k)
+
         conn = self._get_connection()
-        try:
+        knn_sql = "SELECT rowid, distance FROM doc_embeddings WHERE embedding MATCH ? AND k = ?"
+        query = vector.tobytes()
+        if category:
+            knn_sql += " AND category = ?"
+        sql = f"""
+            WITH knn AS ({knn_sql})
+            SELECT documents.id, documents.path, documents.url,
+                   chunks.text, documents.category, knn.distance
+            FROM knn
+            JOIN chunks ON chunks.id = knn.rowid
+            JOIN documents ON documents.id = chunks.document_id
+            ORDER BY knn.distance ASC
+        """
+
+        k = min(max(top_k * _CHUNK_OVERSAMPLE, top_k), _MAX_KNN_K)
+        while True:
+            params = [query, k] + ([category] if category else [])
+            rows = conn.execute(sql, params).fetchall()
+
+            # ドキュメントごとに最良のチャンクを残す（rows は距離昇順）
+            best = {}
+            for row in rows:
+                if row[0] not in best:
+                    best[row[0]] = row
+            # 件数が足りなければ k を増やして取り直す
+            if len(best) >= top_k or len(rows) < k or k >= _MAX_KNN_K:
+                break
+            k = min(k * _CHUNK_OVERSAMPLE, _MAX_KNN_K)
+
+        results = []
+        for row in list(best.values())[:top_k]:
+            doc = Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
+            distance = float(row[5])
+            results.append((doc, distance * distance / 2 if self.embeddings_normalized else distance))
+
+        return results
+
+    @property
+    def score_metric(self) -> str:
+        """検索スコアの種類（"cosine": コサイン距離、"l2": L2 距離。どちらも昇順）"""
+        return "cosine" if self.embeddings_normalized else "l2"
+
+    def _current_vector_engine(self):
+        """DB の埋め込みと同じリビジョン・距離で書き出されたベクトル索引（なければ None）"""
+        engine = self.vector_engine
+        if engine is None or engine.revision != self.get_embeddings_revision() \
+                or engine.metric != self.score_metric:
+            return None
+        return engine
+
+    def _search_with_engine(
+        self,
+        engine,
+        vector: np.ndarray,
+        category: Optional[str],
+        top_k: int
+    ) -> List[tuple[Document, float]]:
+        """ベクトル索引で近いチャンクを選び、上位のチャンクだけ本文を読む"""
+        conn = self._get_connection()
+        query = np.asarray(vector, dtype="float32")
+        k = min(max(top_k * _CHUNK_OVERSAMPLE, top_k), _MAX_KNN_K)
+        while True:
+            hits = engine.search(query, category, k)
+            # ドキュメントごとに最良のチャンクを残す（hits は距離昇順）
+            owners = self._chunk_owners(conn, [chunk_id for chunk_id, _ in hits])
+            best = {}
+            for chunk_id, distance in hits:
+                doc_id = owners.get(chunk_id)
+                if doc_id is not None and doc_id not in best:
+                    best[doc_id] = (chunk_id, distance)
+            if len(best) >= top_k or len(hits) < k or k >= _MAX_KNN_K:
+                break
+            k = min(k * _CHUNK_OVERSAMPLE, _MAX_KNN_K)
+
+        return self._load_results(conn, list(best.values())[:top_k])
+
+    def _search_quantized(
+        self,
+        vector: np.ndarray,
+        category: Optional[str],
+        top_k: int
+    ) -> List[tuple[Document, float]]:
+        """
+        量子化したベクトルの KNN で候補を多めに選び、float16 のベクトルで距離を計算し直す
+
+        返す距離は float32 で保存した場合と同じ尺度（コサイン距離または L2 距離）。
+        """
+        conn = self._get_connection()
+        query = np.asarray(vector, dtype="float32")
+        knn_sql = (
+            "SELECT rowid FROM doc_embeddings "
+            f"WHERE embedding MATCH {_VECTOR_SQL_PARAMS[self.vector_storage]} AND k = ?"
+        )
+        if category:
+            knn_sql += " AND category = ?"
+        coarse_query = self._quantize(query.reshape(1, -1))[0]
+
+        k = min(max(top_k * _CHUNK_OVERSAMPLE, top_k) * max(1, self.rescore_oversample), _MAX_KNN_K)
+        while True:
+            params = [coarse_query, k] + ([category] if category else [])
+            candidates = [row[0] for row in conn.execute(knn_sql, params).fetchall()]
+            scored = self._rescore(conn, query, candidates, self.embeddings_normalized)
+            # ドキュメントごとに最良のチャンクを残す（scored は距離昇順）
+            best = {}
+            for chunk_id, doc_id, distance in scored:
+                if doc_id not in best:
+                    best[doc_id] = (chunk_id, distance)
+            if len(best) >= top_k or len(candidates) < k or k >= _MAX_KNN_K:
+                break
+            k = min(k * _CHUNK_OVERSAMPLE, _MAX_KNN_K)
+
+        return self._load_results(conn, list(best.values())[:top_k])
+
+    @staticmethod
+    def _rescore(
+        conn: sqlite3.Connection, query: np.ndarray, chunk_ids: List[int], cosine: bool
+    ) -> List[tuple[int, int, float]]:
+        """
+        候補チャンクの距離を float16 のベクトルで計算する
+
+        Returns:
+            (チャンクID, ドキュメントID, 距離) の距離昇順。cosine なら 1 - 内積、それ以外は L2 距離
+        """
+        ids: List[int] = []
+        doc_ids: List[int] = []
+        blobs: List[bytes] = []
+        for start in range(0, len(chunk_ids), _UPSERT_ROWS_PER_STATEMENT):
+            part = chunk_ids[start:start + _UPSERT_ROWS_PER_STATEMENT]
+            placeholders = ", ".join("?" * len(part))
+            for chunk_id, doc_id, blob in conn.execute(
+                f"""
+                SELECT chunk_vectors.chunk_id, chunks.document_id, chunk_vectors.embedding
+                FROM chunk_vectors
+                JOIN chunks ON chunks.id = chunk_vectors.chunk_id
+                WHERE chunk_vectors.chunk_id IN ({placeholders})
+                """,
+                part,
+            ):
+                ids.append(chunk_id)
+                doc_ids.append(doc_id)
+                blobs.append(blob)
+        if not ids:
+            return []
+        vectors = np.frombuffer(b"".join(blobs), dtype=np.float16).reshape(len(ids), -1)
+        if cosine:
+            distances = 1.0 - vectors.astype("float32") @ query
+        else:
+            distances = np.linalg.norm(vectors.astype("float32") - query, axis=1)
+        order = np.argsort(distances, kind="stable")
+        return [(ids[i], doc_ids[i], float(distances[i])) for i in order]
+
+    def search_by_text(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        top_k: int = 5
+    ) -> List[tuple[Document, float]]:
+        """
+        キーワード検索（FTS5 の BM25）
+
+        ドキュメントごとに最もよく一致したチャンクだけを残し、返す Document の text は
+        そのパッセージになる。スコアは bm25()（小さいほどよく一致する負の値）で昇順。
+        """
+        match = _fts_match_query(query)
+        if not match or not self.fts_available or top_k <= 0:
+            return []
+        conn = self._get_connection()
+        if category:
             sql = """
-                SELECT documents.id, documents.path, documents.url, 
-                       documents.text, documents.category,
-                       vec_distance_L2(doc_embeddings.embedding, ?) AS score
-                FROM doc_embeddings
-                JOIN documents ON doc_embeddings.rowid = documents.id
+                SELECT chunks.id, chunks.document_id, bm25(chunks_fts) AS score
+                FROM chunks_fts
+                JOIN chunks ON chunks.id = chunks_fts.rowid
+                JOIN documents ON documents.id = chunks.document_id
+                WHERE chunks_fts MATCH ? AND documents.category = ?
+                ORDER BY score ASC
+                LIMIT ?
+            """
+        else:
+            sql = """
+                WITH hits AS (
+                    SELECT rowid, rank FROM chunks_fts WHERE chunks_fts MATCH ?
+                    ORDER BY rank LIMIT ?
+                )
+                SELECT chunks.id, chunks.document_id, hits.rank
+                FROM hits
+                JOIN chunks ON chunks.id = hits.rowid
+                ORDER BY hits.rank ASC
             """
-            params = [vector.tobytes()]
 
-            if category:
-                sql += " WHERE documents.category = ?"
-                params.append(category)
+        k = min(max(top_k * _CHUNK_OVERSAMPLE, top_k), _MAX_KNN_K)
+        while True:
+            params = [match, category, k] if category else [match, k]
+            rows = conn.execute(sql, params).fetchall()
+            # ドキュメントごとに最良のチャンクを残す（rows はスコア昇順）
+            best = {}
+            for chunk_id, doc_id, score in rows:
+                if doc_id not in best:
+                    best[doc_id] = (chunk_id, score)
+            if len(best) >= top_k or len(rows) < k or k >= _MAX_KNN_K:
+                break
+            k = min(k * _CHUNK_OVERSAMPLE, _MAX_KNN_K)
 
-            sql += " ORDER BY score ASC LIMIT ?"
-            params.append(top_k)
+        return self._load_results(conn, list(best.values())[:top_k])
 
-            rows = conn.execute(sql, params).fetchall()
-            
-            results = []
-            for row in rows:
-                doc = Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
-                results.append((doc, float(row[5])))
-            
-            return results
+    def _load_results(
+        self, conn: sqlite3.Connection, selected: List[tuple[int, float]]
+    ) -> List[tuple[Document, float]]:
+        """選んだ (チャンクID, 距離) の本文とドキュメントを読む（順序は selected のまま）"""
+        if not selected:
+            return []
+        placeholders = ", ".join("?" * len(selected))
+        rows = conn.execute(
+            f"""
+            SELECT chunks.id, documents.id, documents.path, documents.url,
+                   chunks.text, documents.category
+            FROM chunks
+            JOIN documents ON documents.id = chunks.document_id
+            WHERE chunks.id IN ({placeholders})
+            """,
+            [chunk_id for chunk_id, _ in selected],
+        ).fetchall()
+        by_chunk = {row[0]: row for row in rows}
+
+        results = []
+        for chunk_id, distance in selected:
+            row = by_chunk.get(chunk_id)
+            if row is None:
+                continue
+            doc = Document(id=row[1], path=row[2], url=row[3], text=row[4], category=row[5])
+            results.append((doc, float(distance)))
+        return results
+
+    @staticmethod
+    def _chunk_owners(conn: sqlite3.Connection, chunk_ids: List[int]) -> Dict[int, int]:
+        """チャンクID → ドキュメントID（本文は読まない）"""
+        owners: Dict[int, int] = {}
+        for start in range(0, len(chunk_ids), _UPSERT_ROWS_PER_STATEMENT):
+            part = chunk_ids[start:start + _UPSERT_ROWS_PER_STATEMENT]
+            placeholders = ", ".join("?" * len(part))
+            owners.update(conn.execute(
+                f"SELECT id, document_id FROM chunks WHERE id IN ({placeholders})", part
+            ).fetchall())
+        return owners
+
+    def get_embeddings_revision(self) -> int:
+        """埋め込みのリビジョン（埋め込みを追加・削除するたびに増える）"""
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT value FROM metadata WHERE key = ?", (_EMBEDDINGS_REVISION_KEY,)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    @contextmanager
+    def embeddings_snapshot(self, batch_size: int = 10000):
+        """
+        全埋め込みを一貫したスナップショットで読む（ベクトル索引の書き出し用）
+
+        専用の接続で読み取りトランザクションを張り、(リビジョン, 件数, 行イテレータ) を返す。
+        行は (チャンクID, カテゴリ, ベクトル) でカテゴリ・チャンクID順。
+        読み込み中に索引構築が書き込んでも、返すリビジョンと行は食い違わない。
+        """
+        conn = self._open_connection()
+        try:
+            conn.execute("BEGIN")
+            row = conn.execute(
+                "SELECT value FROM metadata WHERE key = ?", (_EMBEDDINGS_REVISION_KEY,)
+            ).fetchone()
+            revision = int(row[0]) if row else 0
+            count = conn.execute("SELECT COUNT(*) FROM doc_embeddings").fetchone()[0]
+            if self.vector_storage == "float32":
+                sql = "SELECT rowid, category, embedding FROM doc_embeddings ORDER BY category, rowid"
+                dtype = "float32"
+            else:
+                # 量子化した形式では chunk_vectors の float16 ベクトルを書き出す
+                sql = """
+                    SELECT doc_embeddings.rowid, doc_embeddings.category, chunk_vectors.embedding
+                    FROM doc_embeddings
+                    JOIN chunk_vectors ON chunk_vectors.chunk_id = doc_embeddings.rowid
+                    ORDER BY doc_embeddings.category, doc_embeddings.rowid
+                """
+                dtype = "float16"
+
+            def rows() -> Iterator[tuple[int, str, np.ndarray]]:
+                cursor = conn.execute(sql)
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    for chunk_id, category, blob in batch:
+                        yield chunk_id, category, np.frombuffer(blob, dtype=dtype).astype("float32")
+
+            yield revision, count, rows()
         finally:
+            conn.rollback()
             conn.close()
 
     def find_all_by_category(self, category: str) -> List[Document]:
         """カテゴリで全ドキュメントを検索"""
         conn = self._get_connection()
-        try:
-            rows = conn.execute(
-                "SELECT id, path, url, text, category FROM documents WHERE category = ?",
-                (category,),
-            ).fetchall()
-            return [
-                Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
-                for row in rows
-            ]
-        finally:
-            conn.close()
+        rows = conn.execute(
+            "SELECT id, path, url, text, category FROM documents WHERE category = ?",
+            (category,),
+        ).fetchall()
+        return [
+            Document(id=row[0], path=row[1], url=row[2], text=row[3], category=row[4])
+            for row in rows
+        ]
 
     def delete_by_domain(self, domain: str) -> int:
         """特定ドメインの全ドキュメントを削除"""
-        conn = self._get_connection()
-        try:
+        with self._transaction() as conn:
             rows = conn.execute("SELECT id, path FROM documents").fetchall()
             to_delete = []
             
@@ -227,26 +1128,234 @@ class SQLiteDocumentRepository(DocumentRepository):
                 except Exception:
                     pass
 
-            for doc_id in to_delete:
-                conn.execute("DELETE FROM doc_embeddings WHERE rowid = ?", (doc_id,))
-                conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._delete_documents(conn, to_delete)
 
-            conn.commit()
             return len(to_delete)
-        finally:
-            conn.close()
 
-    def save_embedding(self, doc_id: int, embedding: np.ndarray) -> None:
-        """ドキュメントの埋め込みベクトルを保存"""
-        conn = self._get_connection()
-        try:
+    def replace_chunks_many(self, chunks: List[Chunk]) -> List[Chunk]:
+        """ドキュメントのチャンクを1トランザクションでまとめて置き換え"""
+        if not chunks:
+            return []
+        doc_ids = sorted({chunk.document_id for chunk in chunks})
+        with self._transaction() as conn:
+            for doc_id in doc_ids:
+                self._delete_chunks(conn, doc_id)
+            ids_by_key = self._insert_chunks(conn, chunks)
+
+        for chunk in chunks:
+            chunk.id = ids_by_key[(chunk.document_id, chunk.chunk_index)]
+        return chunks
+
+    def _insert_chunks(
+        self, conn: sqlite3.Connection, chunks: List[Chunk]
+    ) -> Dict[Tuple[int, int], int]:
+        """既存チャンクを削除済みのドキュメントにチャンクを挿入し、(ドキュメントID, 番号) → ID を返す"""
+        ids_by_key = {}
+        for start in range(0, len(chunks), _UPSERT_ROWS_PER_STATEMENT):
+            batch = chunks[start:start + _UPSERT_ROWS_PER_STATEMENT]
+            placeholders = ", ".join(["(?, ?, ?)"] * len(batch))
+            params = []
+            for chunk in batch:
+                params.extend((chunk.document_id, chunk.chunk_index, chunk.text))
+            rows = conn.execute(
+                f"""
+                INSERT INTO chunks (document_id, chunk_index, text)
+                VALUES {placeholders}
+                RETURNING id, document_id, chunk_index
+                """,
+                params,
+            ).fetchall()
+            ids_by_key.update({(doc_id, index): chunk_id for chunk_id, doc_id, index in rows})
+
+        if self.fts_available:
+            conn.executemany(
+                "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)",
+                [
+                    (ids_by_key[(chunk.document_id, chunk.chunk_index)], chunk.text)
+                    for chunk in chunks
+                ],
+            )
+        return ids_by_key
+
+    def save_embedding(self, chunk_id: int, embedding: np.ndarray) -> None:
+        """チャンクの埋め込みベクトルを保存"""
+        vectors = np.asarray(embedding, dtype="float32").reshape(1, -1)
+        with self._transaction() as conn:
             # 既存の埋め込みを削除
-            conn.execute("DELETE FROM doc_embeddings WHERE rowid = ?", (doc_id,))
-            # 新しい埋め込みを挿入
-            conn.execute(
-                "INSERT INTO doc_embeddings (rowid, embedding) VALUES (?, ?)",
-                (doc_id, embedding.tobytes()),
+            conn.execute("DELETE FROM doc_embeddings WHERE rowid = ?", (chunk_id,))
+            # 新しい埋め込みをドキュメントのカテゴリに挿入
+            self._insert_embeddings(conn, [chunk_id], vectors)
+            conn.execute(_BUMP_EMBEDDINGS_REVISION_SQL)
+
+    def save_embeddings_many(self, chunk_ids: List[int], embeddings: np.ndarray) -> None:
+        """複数チャンクの埋め込みベクトルを1トランザクションでまとめて保存"""
+        if len(chunk_ids) != len(embeddings):
+            raise ValueError(
+                f"chunk_ids and embeddings length mismatch: {len(chunk_ids)} != {len(embeddings)}"
+            )
+        if not chunk_ids:
+            return
+        vectors = np.asarray(embeddings, dtype="float32")
+        with self._transaction() as conn:
+            self._replace_embeddings(conn, chunk_ids, vectors)
+
+    def _replace_embeddings(
+        self, conn: sqlite3.Connection, chunk_ids: List[int], vectors: np.ndarray
+    ) -> None:
+        """チャンクの埋め込みを置き換え、埋め込みのリビジョンを進める"""
+        if not chunk_ids:
+            return
+        # vec0 は upsert 非対応のため、既存行を削除してから挿入する
+        conn.executemany(
+            "DELETE FROM doc_embeddings WHERE rowid = ?",
+            [(chunk_id,) for chunk_id in chunk_ids],
+        )
+        self._insert_embeddings(conn, chunk_ids, vectors)
+        conn.execute(_BUMP_EMBEDDINGS_REVISION_SQL)
+
+    def _quantize(self, vectors: np.ndarray) -> List[bytes]:
+        """vec0 に渡す形式のベクトル（保存形式に合わせて量子化）"""
+        if self.vector_storage == "int8":
+            quantized = np.clip(np.rint(vectors * self._int8_scale), -127, 127).astype(np.int8)
+        elif self.vector_storage == "bit":
+            # 成分の符号だけを残す（vec0 はハミング距離で比較する）
+            quantized = np.packbits(vectors > 0, axis=1, bitorder="little")
+        else:
+            quantized = np.ascontiguousarray(vectors, dtype="float32")
+        return [row.tobytes() for row in quantized]
+
+    def _insert_embeddings(
+        self, conn: sqlite3.Connection, chunk_ids: List[int], vectors: np.ndarray
+    ) -> None:
+        """既存行を削除済みのチャンクに埋め込みを挿入する（量子化した形式では float16 も保存）"""
+        if self.embeddings_normalized:
+            vectors = _l2_normalize(vectors)
+        conn.executemany(
+            _insert_embedding_sql(self.vector_storage),
+            zip(self._quantize(vectors), chunk_ids),
+        )
+        if self.vector_storage != "float32":
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_vectors (chunk_id, embedding) VALUES (?, ?)",
+                zip(chunk_ids, [row.tobytes() for row in vectors.astype(np.float16)]),
+            )
+
+    def get_manifest(self) -> Dict[str, FileManifestEntry]:
+        """索引済みファイルのマニフェストを全件取得"""
+        conn = self._get_connection()
+        rows = conn.execute(
+            "SELECT path, size, mtime_ns, content_hash, doc_id FROM file_manifest"
+        ).fetchall()
+        return {
+            row[0]: FileManifestEntry(
+                path=row[0], size=row[1], mtime_ns=row[2],
+                content_hash=row[3], doc_id=row[4]
+            )
+            for row in rows
+        }
+
+    def save_manifest_entries(self, entries: List[FileManifestEntry]) -> None:
+        """マニフェストエントリをまとめて保存"""
+        if not entries:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO file_manifest (path, size, mtime_ns, content_hash, doc_id)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (e.path, e.size, e.mtime_ns, e.content_hash, e.doc_id)
+                    for e in entries
+                ],
+            )
+
+    def get_cached_embeddings(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """埋め込みキャッシュから、見つかったキーのベクトルだけを返す"""
+        conn = self._get_connection()
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(unique_keys), _UPSERT_ROWS_PER_STATEMENT):
+            part = unique_keys[start:start + _UPSERT_ROWS_PER_STATEMENT]
+            placeholders = ", ".join("?" * len(part))
+            rows = conn.execute(
+                f"SELECT key, embedding FROM embedding_cache WHERE key IN ({placeholders})",
+                part,
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype="float32")
+        return found
+
+    def save_cached_embeddings(self, keys: List[str], embeddings: np.ndarray) -> None:
+        """埋め込みキャッシュにまとめて保存（同じキーは上書き）"""
+        if len(keys) != len(embeddings):
+            raise ValueError(
+                f"keys and embeddings length mismatch: {len(keys)} != {len(embeddings)}"
+            )
+        if not keys:
+            return
+        vectors = np.asarray(embeddings, dtype="float32")
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, embedding) VALUES (?, ?)",
+                [(key, vector.tobytes()) for key, vector in zip(keys, vectors)],
+            )
+
+    def get_signatures(self, category: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """正規ドキュメントの MinHash 署名を取得（category 指定時はそのカテゴリのドキュメント分のみ）"""
+        conn = self._get_connection()
+        if category is None:
+            rows = conn.execute("SELECT path, signature FROM document_signatures").fetchall()
+        else:
+            rows = conn.execute(
+                """
+                SELECT s.path, s.signature
+                FROM document_signatures s
+                JOIN documents d ON d.path = s.path
+                WHERE d.category = ?
+                """,
+                (category,),
+            ).fetchall()
+        return {path: np.frombuffer(blob, dtype=np.uint32) for path, blob in rows}
+
+    def save_signatures(self, signatures: Dict[str, np.ndarray]) -> None:
+        """MinHash 署名をまとめて保存（同じパスは上書き）"""
+        if not signatures:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO document_signatures (path, signature) VALUES (?, ?)",
+                [
+                    (path, np.asarray(signature, dtype=np.uint32).tobytes())
+                    for path, signature in signatures.items()
+                ],
+            )
+
+    def save_aliases(self, aliases: Dict[str, str]) -> None:
+        """別名パス → 正規ドキュメントのパスをまとめて保存し、別名側の署名は削除"""
+        if not aliases:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO document_aliases (alias_path, canonical_path) VALUES (?, ?)",
+                list(aliases.items()),
+            )
+            conn.executemany(
+                "DELETE FROM document_signatures WHERE path = ?",
+                [(alias_path,) for alias_path in aliases],
+            )
+
+    def get_aliases(self) -> Dict[str, str]:
+        """別名パス → 正規ドキュメントのパスを全件取得"""
+        conn = self._get_connection()
+        return dict(conn.execute("SELECT alias_path, canonical_path FROM document_aliases").fetchall())
+
+    def delete_aliases(self, alias_paths: List[str]) -> None:
+        """別名の登録を削除（正規ドキュメントとして索引し直した場合）"""
+        if not alias_paths:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "DELETE FROM document_aliases WHERE alias_path = ?",
+                [(path,) for path in alias_paths],
             )
-            conn.commit()
-        finally:
-            conn.close()
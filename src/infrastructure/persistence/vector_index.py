@@ -0,0 +1,443 @@
+"""
+DB から書き出すベクトル索引（プロセス内での検索）
+
+- numpy: doc_embeddings の全ベクトルをカテゴリ・チャンクID順に連続した float32 の .npy に
+  書き出し、サーバー起動時にメモリマップで開く。検索は行列ベクトル積1回（BLAS）と
+  np.argpartition で上位を選び、カテゴリはソート済みの行範囲で絞り込む（厳密検索）。
+- hnsw: カテゴリごとに hnswlib の HNSW グラフを作る近似最近傍検索。件数に対して
+  ほぼ対数時間で引けるため、全件スキャンが重くなる規模（数百万チャンク）向け。
+  M / ef_construction / ef_search で精度と速度を調整する。
+
+DB の埋め込みが L2 正規化済みなら内積で比較し、距離はコサイン距離（1 - 内積）を返す
+（metric = "cosine"）。そうでなければ L2 距離（metric = "l2"）。
+
+索引は DB の埋め込みリビジョンを記録しており、SQLiteDocumentRepository は
+リビジョンが一致するときだけ索引を使う（古ければ vec0 の KNN に戻る）。
+"""
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, HNSW_M
+
+META_FILE = "meta.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+CHUNK_IDS_FILE = "chunk_ids.npy"
+SQUARED_NORMS_FILE = "squared_norms.npy"
+
+# 利用できる検索エンジン名（"sqlite" は vec0 の KNN をそのまま使う）
+VECTOR_ENGINES = ("sqlite", "numpy", "hnsw")
+
+
+def vector_index_dir(db_path: str) -> str:
+    """DB と同じ場所に置く索引ディレクトリ（techdocs.db → techdocs.index/）"""
+    return os.path.splitext(db_path)[0] + ".index"
+
+
+def _index_metric(repository) -> str:
+    """書き出す索引の距離の種類（リポジトリの検索スコアに合わせる）"""
+    return "cosine" if repository.embeddings_normalized else "l2"
+
+
+def read_index_meta(directory: str) -> Optional[dict]:
+    """索引のメタデータ（なければ None）"""
+    try:
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class NumpyVectorIndex:
+    """メモリマップした埋め込み行列に対する厳密検索（コサイン距離または L2 距離）"""
+
+    name = "numpy"
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: export_numpy_index() の書き出し先
+        """
+        meta = read_index_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"Vector index not found: {directory}")
+        self.directory = directory
+        self.revision: int = meta["revision"]
+        self.metric: str = meta.get("metric", "l2")
+        # カテゴリ → [開始行, 終了行)（行はカテゴリ順に並んでいる）
+        self.category_ranges: Dict[str, Tuple[int, int]] = {
+            category: (start, end) for category, (start, end) in meta["category_ranges"].items()
+        }
+        self._embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+        self._chunk_ids = np.load(os.path.join(directory, CHUNK_IDS_FILE), mmap_mode="r")
+        self._squared_norms = np.load(os.path.join(directory, SQUARED_NORMS_FILE), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids)
+
+    def _row_range(self, category: Optional[str]) -> Tuple[int, int]:
+        if not category:
+            return 0, len(self._chunk_ids)
+        return self.category_ranges.get(category, (0, 0))
+
+    def search(self, query: np.ndarray, category: Optional[str], k: int) -> List[Tuple[int, float]]:
+        """
+        近いチャンクを距離昇順で返す
+
+        Returns:
+            (チャンクID, 距離) のリスト（最大 k 件）
+        """
+        start, end = self._row_range(category)
+        if end <= start or k <= 0:
+            return []
+        query = np.asarray(query, dtype="float32")
+        distances = self._embeddings[start:end] @ query
+        if self.metric == "cosine":
+            # 単位ベクトル同士なので 1 - x・q（行列ベクトル積1回）
+            distances *= -1.0
+            distances += 1.0
+        else:
+            # ||x - q||^2 = ||x||^2 - 2 x・q + ||q||^2
+            distances *= -2.0
+            distances += self._squared_norms[start:end]
+            distances += float(query @ query)
+
+        k = min(k, end - start)
+        if k < end - start:
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(end - start)
+        top = top[np.argsort(distances[top], kind="stable")]
+        if self.metric == "cosine":
+            return [(int(self._chunk_ids[start + row]), float(distances[row])) for row in top]
+        np.maximum(distances, 0.0, out=distances)
+        return [
+            (int(self._chunk_ids[start + row]), float(np.sqrt(distances[row])))
+            for row in top
+        ]
+
+
+def _replace_directory(tmp_dir: str, directory: str) -> None:
+    """書き出し終わった一時ディレクトリで索引を置き換える"""
+    old_dir = None
+    if os.path.exists(directory):
+        old_dir = f"{directory}.old-{uuid.uuid4().hex}"
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    if old_dir is not None:
+        # 開いているプロセスのメモリマップは削除後も有効
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def export_numpy_index(repository, directory: str, force: bool = False) -> Optional[dict]:
+    """
+    リポジトリの全埋め込みを NumPy 索引として書き出す
+
+    Args:
+        repository: SQLiteDocumentRepository
+        directory: 書き出し先
+        force: リビジョンが同じでも書き出し直す
+
+    Returns:
+        書き出した索引のメタデータ（最新で書き出しを省略した場合は None）
+    """
+    with repository.embeddings_snapshot() as (revision, count, rows):
+        current = read_index_meta(directory)
+        if not force and current is not None and current.get("revision") == revision \
+                and current.get("engine") == NumpyVectorIndex.name \
+                and current.get("metric", "l2") == _index_metric(repository):
+            return None
+
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = f"{directory}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+        try:
+            meta = _write_numpy_index(tmp_dir, revision, count, rows, _index_metric(repository))
+            _replace_directory(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    return meta
+
+
+def _write_numpy_index(directory: str, revision: int, count: int, rows, metric: str) -> dict:
+    """行イテレータから索引ファイルを書き出す（全件をメモリに載せない）"""
+    embeddings = None
+    chunk_ids = np.lib.format.open_memmap(
+        os.path.join(directory, CHUNK_IDS_FILE), mode="w+", dtype=np.int64, shape=(count,)
+    )
+    category_ranges: Dict[str, List[int]] = {}
+    written = 0
+    for chunk_id, category, vector in rows:
+        if written >= count:
+            break
+        if embeddings is None:
+            embeddings = np.lib.format.open_memmap(
+                os.path.join(directory, EMBEDDINGS_FILE), mode="w+",
+                dtype=np.float32, shape=(count, len(vector))
+            )
+        embeddings[written] = vector
+        chunk_ids[written] = chunk_id
+        category = category or ""
+        if category in category_ranges:
+            category_ranges[category][1] = written + 1
+        else:
+            category_ranges[category] = [written, written + 1]
+        written += 1
+
+    if embeddings is None:
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(directory, EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(0, 0)
+        )
+    squared_norms = np.einsum("ij,ij->i", embeddings[:written], embeddings[:written])
+    np.save(os.path.join(directory, SQUARED_NORMS_FILE), squared_norms.astype(np.float32))
+    embeddings.flush()
+    chunk_ids.flush()
+    del embeddings, chunk_ids
+
+    meta = {
+        "engine": NumpyVectorIndex.name,
+        "revision": revision,
+        "metric": metric,
+        "count": written,
+        "category_ranges": category_ranges,
+    }
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+# 距離の種類 → hnswlib の space
+_HNSW_SPACES = {"cosine": "ip", "l2": "l2"}
+
+
+def _import_hnswlib():
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError(
+            "The hnsw vector engine requires hnswlib (pip install hnswlib)"
+        ) from e
+    return hnswlib
+
+
+class HnswVectorIndex:
+    """カテゴリごとの HNSW グラフによる近似最近傍検索（コサイン距離または L2 距離）"""
+
+    name = "hnsw"
+
+    def __init__(self, directory: str, ef_search: int = HNSW_EF_SEARCH):
+        """
+        Args:
+            directory: export_hnsw_index() の書き出し先
+            ef_search: 検索時の候補リストの大きさ（大きいほど再現率が上がり遅くなる）
+        """
+        hnswlib = _import_hnswlib()
+        meta = read_index_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"Vector index not found: {directory}")
+        self.directory = directory
+        self.revision: int = meta["revision"]
+        self.metric: str = meta.get("metric", "l2")
+        self.m: int = meta["m"]
+        self.ef_construction: int = meta["ef_construction"]
+        self._count: int = meta["count"]
+        # カテゴリ → HNSW グラフ（カテゴリ指定なしの検索は全グラフの結果を併合する）
+        self._indexes = {}
+        for category, filename in meta["categories"].items():
+            index = hnswlib.Index(space=_HNSW_SPACES[self.metric], dim=meta["dim"])
+            index.load_index(os.path.join(directory, filename))
+            self._indexes[category] = index
+        self.ef_search = ef_search
+
+    @property
+    def ef_search(self) -> int:
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value: int) -> None:
+        # set_ef は検索と並行して呼べないため、変更は検索していないときに行う
+        self._ef_search = max(1, int(value))
+        for index in self._indexes.values():
+            index.set_ef(self._ef_search)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def search(self, query: np.ndarray, category: Optional[str], k: int) -> List[Tuple[int, float]]:
+        """
+        近いチャンクを距離昇順で返す（近似。候補数は max(ef_search, k)）
+
+        Returns:
+            (チャンクID, 距離) のリスト（最大 k 件）
+        """
+        if k <= 0:
+            return []
+        if category:
+            indexes = [self._indexes[category]] if category in self._indexes else []
+        else:
+            indexes = list(self._indexes.values())
+        query = np.asarray(query, dtype="float32").reshape(1, -1)
+
+        hits: List[Tuple[int, float]] = []
+        for index in indexes:
+            count = index.get_current_count()
+            if count == 0:
+                continue
+            labels, distances = index.knn_query(query, k=min(k, count))
+            if self.metric == "cosine":
+                # hnswlib の "ip" は 1 - 内積を返す
+                hits.extend(zip(map(int, labels[0]), map(float, distances[0])))
+            else:
+                # hnswlib の "l2" は二乗距離を返す
+                hits.extend(
+                    (int(label), float(np.sqrt(max(distance, 0.0))))
+                    for label, distance in zip(labels[0], distances[0])
+                )
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+
+
+def export_hnsw_index(
+    repository,
+    directory: str,
+    m: int = HNSW_M,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    force: bool = False,
+    batch_size: int = 10000,
+) -> Optional[dict]:
+    """
+    リポジトリの全埋め込みからカテゴリごとの HNSW 索引を作って書き出す
+
+    Args:
+        repository: SQLiteDocumentRepository
+        directory: 書き出し先
+        m: グラフの各ノードの近傍数（大きいほど再現率とメモリが増える）
+        ef_construction: 構築時の候補リストの大きさ（大きいほど構築が遅く精度が上がる）
+        force: リビジョンと設定が同じでも作り直す
+        batch_size: 1回の add_items に渡す件数
+
+    Returns:
+        書き出した索引のメタデータ（最新で書き出しを省略した場合は None）
+    """
+    hnswlib = _import_hnswlib()
+    with repository.embeddings_snapshot() as (revision, count, rows):
+        current = read_index_meta(directory)
+        if not force and current is not None and current.get("revision") == revision \
+                and current.get("engine") == HnswVectorIndex.name \
+                and current.get("metric", "l2") == _index_metric(repository) \
+                and current.get("m") == m and current.get("ef_construction") == ef_construction:
+            return None
+
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = f"{directory}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+        try:
+            meta = _write_hnsw_index(
+                hnswlib, tmp_dir, revision, count, rows,
+                _index_metric(repository), m, ef_construction, batch_size
+            )
+            _replace_directory(tmp_dir, directory)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    return meta
+
+
+def _write_hnsw_index(
+    hnswlib, directory: str, revision: int, count: int, rows: Iterable,
+    metric: str, m: int, ef_construction: int, batch_size: int
+) -> dict:
+    """カテゴリ順の行イテレータからカテゴリごとにグラフを作って保存する"""
+    categories: Dict[str, str] = {}
+    dim = 0
+    written = 0
+    index = None
+    category = None
+    labels: List[int] = []
+    vectors: List[np.ndarray] = []
+
+    def flush() -> None:
+        if not labels:
+            return
+        needed = index.get_current_count() + len(labels)
+        if needed > index.get_max_elements():
+            # 容量は倍々で広げる（カテゴリの件数は事前に分からない）
+            index.resize_index(max(needed, index.get_max_elements() * 2))
+        index.add_items(np.stack(vectors), np.asarray(labels, dtype=np.int64))
+        labels.clear()
+        vectors.clear()
+
+    def save() -> None:
+        flush()
+        filename = f"{len(categories)}.bin"
+        index.save_index(os.path.join(directory, filename))
+        categories[category] = filename
+
+    for chunk_id, row_category, vector in rows:
+        if written >= count:
+            break
+        row_category = row_category or ""
+        if index is None or row_category != category:
+            if index is not None:
+                save()
+            dim = len(vector)
+            category = row_category
+            index = hnswlib.Index(space=_HNSW_SPACES[metric], dim=dim)
+            index.init_index(
+                max_elements=min(batch_size, count - written),
+                M=m, ef_construction=ef_construction, random_seed=100,
+            )
+        labels.append(chunk_id)
+        vectors.append(vector)
+        if len(labels) >= batch_size:
+            flush()
+        written += 1
+    if index is not None:
+        save()
+
+    meta = {
+        "engine": HnswVectorIndex.name,
+        "revision": revision,
+        "metric": metric,
+        "count": written,
+        "dim": dim,
+        "m": m,
+        "ef_construction": ef_construction,
+        "categories": categories,
+    }
+    with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def export_vector_index(engine: str, repository, db_path: str, force: bool = False) -> Optional[dict]:
+    """設定されたエンジンの索引を DB の隣に書き出す（"sqlite" では何もしない）"""
+    if engine == "numpy":
+        return export_numpy_index(repository, vector_index_dir(db_path), force=force)
+    if engine == "hnsw":
+        return export_hnsw_index(repository, vector_index_dir(db_path), force=force)
+    if engine != "sqlite":
+        raise ValueError(f"Unknown vector engine: {engine!r} (expected one of {VECTOR_ENGINES})")
+    return None
+
+
+def load_vector_index(engine: str, db_path: str):
+    """書き出し済みの索引を開く（"sqlite" または索引がない場合は None）"""
+    if engine == "sqlite":
+        return None
+    if engine not in VECTOR_ENGINES:
+        raise ValueError(f"Unknown vector engine: {engine!r} (expected one of {VECTOR_ENGINES})")
+    directory = vector_index_dir(db_path)
+    meta = read_index_meta(directory)
+    if meta is None or meta.get("engine") != engine:
+        return None
+    if engine == "hnsw":
+        return HnswVectorIndex(directory)
+    return NumpyVectorIndex(directory)
@@ -9,9 +9,9 @@ from mcp.server.stdio import stdio_server
 # 親ディレクトリをパスに追加してインポート
 sys.path.insert(0, str(Path(__file__).parent))
 
-from infrastructure.persistence import SQLiteDocumentRepository
-from infrastructure.models import EmbeddingModel
-from application.use_cases import SearchDocumentsUseCase, SearchDocumentsRequest
+from config import SEARCH_HYBRID, SEARCH_MAX_CONCURRENCY, SEARCH_TIMEOUT_SECONDS
+# 検索の依存（numpy・sqlite-vec・推論ライブラリ）は SearchRuntime が起動後に読み込む
+from server_runtime import SearchExecutor, SearchRuntime, SearchTimeoutError, format_score
 
 # Configure logging
 logging.basicConfig(
@@ -26,19 +26,29 @@ logger = logging.getLogger("techdoc")
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "techdocs.db")
 
-# 依存性を初期化
-_repository = SQLiteDocumentRepository(DB_PATH)
-_embedding_model = EmbeddingModel()
-_search_use_case = SearchDocumentsUseCase(_repository, _embedding_model)
+# 依存性（モデル・DB）は起動後にバックグラウンドで読み込み、検索だけが完了を待つ
+_runtime = SearchRuntime(DB_PATH)
+# 検索（推論・SQLite）はスレッドプールで実行し、stdio のイベントループを止めない
+_search_executor = SearchExecutor(SEARCH_MAX_CONCURRENCY, SEARCH_TIMEOUT_SECONDS)
 
 
 async def search_docs(query: str, category: str = None, top_k: int = 5):
-    """Search technical documentation using vector similarity"""
+    """Search technical documentation by semantic similarity, fused with BM25 keyword search when hybrid"""
     logger.info(f"Search request - Query: '{query}', Category: {category}, Top K: {top_k}")
     
-    # ユースケースを実行
-    request = SearchDocumentsRequest(query=query, category=category, top_k=top_k)
-    response = _search_use_case.execute(request)
+    async def execute():
+        # ユースケースを実行（モデルの読み込みが終わっていなければ待つ）
+        search_use_case = await _runtime.get_async()
+        from application.use_cases import SearchDocumentsRequest
+
+        request = SearchDocumentsRequest(
+            query=query, category=category, top_k=top_k, hybrid=SEARCH_HYBRID
+        )
+        # 同時実行数は SEARCH_MAX_CONCURRENCY まで。時間切れやキャンセルでは未開始の検索を取り消す
+        return await _search_executor.submit(search_use_case.execute, request)
+
+    # 読み込み待ちも含めて SEARCH_TIMEOUT_SECONDS で打ち切る
+    response = await _search_executor.within_deadline(execute())
 
     # レスポンスをフォーマット
     results = [
@@ -46,7 +56,8 @@ async def search_docs(query: str, category: str = None, top_k: int = 5):
             "path": result.path,
             "category": result.category,
             "content": result.text,
-            "score": result.score
+            "score": result.score,
+            "score_type": response.score_type
         }
         for result in response.results
     ]
@@ -57,6 +68,8 @@ async def search_docs(query: str, category: str = None, top_k: int = 5):
 
 async def main():
     logger.info("Starting techdoc MCP server...")
+    # initialize / list_tools にはすぐ応答し、モデルと DB は裏で読み込む
+    _runtime.start()
     server = Server(
         "techdoc",
         version="1.0.0"
@@ -70,7 +83,7 @@ async def main():
             {
                 "uri": "techdoc://search",
                 "name": "Technical Documentation Search",
-                "description": "Search across TypeScript, Python, AWS CDK, and Vue documentation using semantic search",
+                "description": "Search across TypeScript, Python, AWS CDK, and Vue documentation using semantic and keyword search",
                 "mimeType": "application/json"
             }
         ]
@@ -81,7 +94,7 @@ async def main():
         return [
             {
                 "name": "search_docs",
-                "description": "**IMPORTANT: Use this tool for ALL questions about TypeScript, Python, AWS CDK, or Vue.js.** Searches indexed local documentation and returns relevant content. Use when users ask about: TypeScript (generics, types, interfaces, classes), Python (decorators, async, functions), AWS CDK (constructs, stacks, Lambda), Vue.js (components, composables, reactivity). Always prefer this tool over general knowledge for these topics.",
+                "description": "**IMPORTANT: Use this tool for ALL questions about TypeScript, Python, AWS CDK, or Vue.js.** Searches indexed local documentation by meaning and keywords (hybrid BM25 + vector search) and returns relevant content. Each result shows its score type: 'RRF score' (hybrid, higher is better) or 'Distance' (vector only, lower is better). Use when users ask about: TypeScript (generics, types, interfaces, classes), Python (decorators, async, functions), AWS CDK (constructs, stacks, Lambda), Vue.js (components, composables, reactivity). Always prefer this tool over general knowledge for these topics.",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
@@ -114,7 +127,12 @@ async def main():
             query = arguments["query"]
             category = arguments.get("category")
             top_k = arguments.get("top_k", 5)
-            results = await search_docs(query, category, top_k)
+            try:
+                results = await search_docs(query, category, top_k)
+            except SearchTimeoutError as e:
+                # クライアントにはツールのエラーとして返す（他のリクエストは影響を受けない）
+                logger.warning(f"{e} - Query: '{query}'")
+                raise
             
             # Format results as readable text
             if not results:
@@ -125,7 +143,7 @@ async def main():
             for i, result in enumerate(results, 1):
                 content_preview = result["content"][:1500] if len(result["content"]) > 1500 else result["content"]
                 formatted_results.append(
-                    f"=== Result {i} (Score: {result['score']:.4f}) ===\n"
+                    f"=== Result {i} ({format_score(result['score_type'], result['score'])}) ===\n"
                     f"Category: {result['category']}\n"
                     f"Path: {result['path']}\n\n"
                     f"{content_preview}\n"
@@ -140,8 +158,11 @@ async def main():
             raise ValueError(f"Unknown tool: {name}")
 
     logger.info("Starting server event loop...")
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        _search_executor.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,17 @@
 import os
-import sqlite3
+import sys
 import logging
-from typing import Optional
 import re
+from pathlib import Path
 
-import sqlite_vec
 from fastmcp import FastMCP
-from sentence_transformers import SentenceTransformer
+
+# 親ディレクトリをパスに追加してインポート
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import SEARCH_HYBRID
+# 検索の依存（numpy・sqlite-vec・推論ライブラリ）は SearchRuntime が起動後に読み込む
+from server_runtime import SearchRuntime, format_score
 
 # Configure logging
 logging.basicConfig(
@@ -21,71 +26,63 @@ logger = logging.getLogger("techdoc")
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "techdocs.db")
 
+# 依存性（モデル・DB）はプロセス内で1回だけ、起動後にバックグラウンドで読み込む
+_runtime = SearchRuntime(DB_PATH)
+
 # Initialize FastMCP
 mcp = FastMCP("techdoc")
 
 
+def _path_to_url(path: str) -> str:
+    # Convert /Users/.../docs/<category>/<domain>/<rest>.html -> https://<domain>/<rest>
+    m = re.search(r"/docs/[^/]+/([^/]+)/(.*)$", path)
+    if not m:
+        return path
+    domain, rest = m.group(1), m.group(2)
+    if rest.endswith(".html"):
+        rest = rest[:-5]
+    elif rest.endswith(".md"):
+        rest = rest[:-3]
+    return f"https://{domain}/{rest}"
+
+
 def _search_docs_internal(query: str, category: str, top_k: int = 5) -> str:
     """Internal search function used by all tool variants."""
     logger.info(f"Search request - Query: '{query}', Category: {category}, Top K: {top_k}")
-    
-    # Load model and encode query
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-    q_vec = model.encode(query).astype("float32")
-
-    # Connect to database
-    conn = sqlite3.connect(DB_PATH)
-    conn.enable_load_extension(True)
-    sqlite_vec.load(conn)
-    conn.enable_load_extension(False)
-
-    # Build SQL query
-    sql = """
-        SELECT documents.url, documents.category, documents.text, documents.path,
-               vec_distance_L2(doc_embeddings.embedding, ?) AS score
-        FROM doc_embeddings
-        JOIN documents ON doc_embeddings.rowid = documents.id
-        WHERE documents.category = ?
-        ORDER BY score ASC LIMIT ?
-    """
 
-    params = [q_vec.tobytes(), category, min(top_k, 10)]
+    # モデルの読み込みが終わっていなければ待つ
+    search_use_case = _runtime.get()
+    from application.use_cases import SearchDocumentsRequest
 
-    # Execute query
-    rows = conn.execute(sql, params).fetchall()
-    conn.close()
+    request = SearchDocumentsRequest(
+        query=query, category=category, top_k=min(top_k, 10), hybrid=SEARCH_HYBRID
+    )
+    response = search_use_case.execute(request)
 
-    if not rows:
+    if not response.results:
         logger.info("No results found")
         return "No results found."
 
-    def _path_to_url(path: str) -> str:
-        # Convert /Users/.../docs/<category>/<domain>/<rest>.html -> https://<domain>/<rest>
-        m = re.search(r"/docs/[^/]+/([^/]+)/(.*)$", path)
-        if not m:
-            return path
-        domain, rest = m.group(1), m.group(2)
-        if rest.endswith(".html"):
-            rest = rest[:-5]
-        elif rest.endswith(".md"):
-            rest = rest[:-3]
-        return f"https://{domain}/{rest}"
-
     # Format results
     formatted_results = []
-    for i, (url, cat, text, path, score) in enumerate(rows, 1):
-        eff_url = url or _path_to_url(path)
+    for i, result in enumerate(response.results, 1):
+        eff_url = result.url or _path_to_url(result.path)
+        text = result.text
         content_preview = text[:1500] if len(text) > 1500 else text
         formatted_results.append(
-            f"=== Result {i} (Score: {score:.4f}) ===\n"
-            f"Category: {cat}\n"
+            f"=== Result {i} ({format_score(response.score_type, result.score)}) ===\n"
+            f"Category: {result.category}\n"
             f"URL: {eff_url}\n\n"
             f"{content_preview}\n"
             f"{'...(truncated)' if len(text) > 1500 else ''}\n"
             f"{'='*80}\n"
         )
-    
-    logger.info(f"Found {len(rows)} results")
+
+    stats = _runtime.embedding_model.cache_stats()
+    logger.info(
+        f"Found {response.total_results} results "
+        f"(query cache: {stats['hits']} hits / {stats['misses']} misses)"
+    )
     return "\n".join(formatted_results)
 
 
@@ -104,7 +101,8 @@ def pytool(query: str, top_k: int = 5) -> str:
         top_k: Number of results to return (1-10, default 5)
     
     Returns:
-        Relevant Python documentation content
+        Relevant Python documentation content, ranked by keyword (BM25) and semantic match.
+        Each result shows "RRF score" (higher is better) or, for vector-only search, "Distance" (lower is better).
     """
     logger.info(f"pytool called with query='{query}', top_k={top_k}")
     return _search_docs_internal(query, "python", top_k)
@@ -125,7 +123,8 @@ def tytool(query: str, top_k: int = 5) -> str:
         top_k: Number of results to return (1-10, default 5)
     
     Returns:
-        Relevant TypeScript documentation content
+        Relevant TypeScript documentation content, ranked by keyword (BM25) and semantic match.
+        Each result shows "RRF score" (higher is better) or, for vector-only search, "Distance" (lower is better).
     """
     logger.info(f"tytool called with query='{query}', top_k={top_k}")
     return _search_docs_internal(query, "typescript", top_k)
@@ -146,7 +145,8 @@ def cdktool(query: str, top_k: int = 5) -> str:
         top_k: Number of results to return (1-10, default 5)
     
     Returns:
-        Relevant AWS CDK documentation content
+        Relevant AWS CDK documentation content, ranked by keyword (BM25) and semantic match.
+        Each result shows "RRF score" (higher is better) or, for vector-only search, "Distance" (lower is better).
     """
     logger.info(f"cdktool called with query='{query}', top_k={top_k}")
     return _search_docs_internal(query, "cdk", top_k)
@@ -167,7 +167,8 @@ def vuetool(query: str, top_k: int = 5) -> str:
         top_k: Number of results to return (1-10, default 5)
     
     Returns:
-        Relevant Vue.js documentation content
+        Relevant Vue.js documentation content, ranked by keyword (BM25) and semantic match.
+        Each result shows "RRF score" (higher is better) or, for vector-only search, "Distance" (lower is better).
     """
     logger.info(f"vuetool called with query='{query}', top_k={top_k}")
     return _search_docs_internal(query, "vue", top_k)
@@ -188,7 +189,8 @@ def awstool(query: str, top_k: int = 5) -> str:
         top_k: Number of results to return (1-10, default 5)
     
     Returns:
-        Relevant AWS Design documentation content
+        Relevant AWS Design documentation content, ranked by keyword (BM25) and semantic match.
+        Each result shows "RRF score" (higher is better) or, for vector-only search, "Distance" (lower is better).
     """
     logger.info(f"awstool called with query='{query}', top_k={top_k}")
     return _search_docs_internal(query, "aws_design", top_k)
@@ -199,5 +201,8 @@ if __name__ == "__main__":
     logger.info(f"Database path: {DB_PATH}")
     logger.info(f"Database exists: {os.path.exists(DB_PATH)}")
     
+    # initialize / list_tools にはすぐ応答し、モデルと DB は裏で読み込む
+    _runtime.start()
+
     # Run the server
     mcp.run()
@@ -0,0 +1,195 @@
+"""
+MCP サーバーの検索依存（モデル・DB）の読み込みと、検索の実行
+
+サーバーの import 時にモデルを読み込むと、initialize / list_tools の応答まで数秒かかり、
+クライアントがタイムアウトすることがある。SearchRuntime は重い import と初期化、
+ウォームアップ（1回目の推論・ベクトル検索）を別スレッドで行い、
+検索呼び出しだけが読み込みの完了を待つ。
+
+検索（推論と SQLite の検索）は同期処理のため、SearchExecutor で上限付きの
+スレッドプールに移し、イベントループ（stdio の読み書き）を止めないようにする。
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger("techdoc")
+
+WARMUP_QUERY = "warmup"
+
+
+def load_search_dependencies(db_path: str) -> Tuple[object, object]:
+    """
+    リポジトリ・埋め込みモデル・検索ユースケースを作成してウォームアップする
+
+    Returns:
+        (SearchDocumentsUseCase, EmbeddingModel)
+    """
+    # 重い依存（numpy・sqlite-vec・推論ライブラリ）はここで初めて読み込む
+    import numpy as np
+
+    from application.use_cases.search_documents_use_case import SearchDocumentsUseCase
+    from config import VECTOR_ENGINE
+    from infrastructure.models import EmbeddingModel
+    from infrastructure.persistence import SQLiteDocumentRepository, load_vector_index
+
+    vector_engine = load_vector_index(VECTOR_ENGINE, db_path)
+    if vector_engine is not None:
+        logger.info(f"Vector index loaded: {vector_engine.name} ({len(vector_engine)} vectors)")
+    elif VECTOR_ENGINE != "sqlite":
+        logger.warning(f"No {VECTOR_ENGINE} vector index found; using sqlite-vec KNN")
+    repository = SQLiteDocumentRepository(db_path, vector_engine=vector_engine)
+    embedding_model = EmbeddingModel()
+    use_case = SearchDocumentsUseCase(repository, embedding_model)
+
+    # 1回目の推論とベクトル検索は遅いため、起動時に済ませておく（クエリキャッシュは使わない）
+    vector = embedding_model.encode_batch([WARMUP_QUERY])[0]
+    try:
+        repository.search_by_vector(np.asarray(vector, dtype="float32"), top_k=1)
+    except Exception as e:
+        # DB がまだない場合なども起動は続ける（検索時にエラーを返す）
+        logger.warning(f"Search warmup skipped: {e}")
+    return use_case, embedding_model
+
+
+def format_score(score_type: str, score: float) -> str:
+    """
+    検索結果に表示するスコア（種類と大小の向きを明示する）
+
+    score_type は SearchDocumentsResponse.score_type（サーバー起動時に重い依存を読み込まないよう文字列で比較する）
+    """
+    if score_type == "rrf":
+        return f"RRF score: {score:.4f}, higher is better"
+    return f"Distance: {score:.4f}, lower is better"
+
+
+class SearchRuntime:
+    """検索依存の読み込みを1回だけバックグラウンドで行い、完了を待てるようにする"""
+
+    def __init__(self, db_path: str, loader: Callable[[str], Tuple[object, object]] = load_search_dependencies):
+        """
+        Args:
+            db_path: 検索する DB のパス
+            loader: (ユースケース, 埋め込みモデル) を返す読み込み関数
+        """
+        self.db_path = db_path
+        self._loader = loader
+        self._future: Future = Future()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.load_seconds: Optional[float] = None
+
+    def start(self) -> None:
+        """読み込みを開始する（2回目以降は何もしない）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._load, name="search-warmup", daemon=True)
+            self._thread.start()
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        logger.info("Loading search dependencies in the background...")
+        try:
+            result = self._loader(self.db_path)
+        except BaseException as e:
+            logger.exception("Failed to load search dependencies")
+            self._future.set_exception(e)
+            return
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"Search dependencies ready in {self.load_seconds:.2f} s")
+        self._future.set_result(result)
+
+    @property
+    def ready(self) -> bool:
+        """読み込みが（成功・失敗を問わず）終わったか"""
+        return self._future.done()
+
+    def get(self, timeout: Optional[float] = None):
+        """読み込み完了を待って検索ユースケースを返す（読み込み時の例外は再送出）"""
+        self.start()
+        return self._future.result(timeout)[0]
+
+    async def get_async(self):
+        """イベントループを止めずに読み込み完了を待ち、検索ユースケースを返す"""
+        self.start()
+        # 待っている呼び出しがキャンセルされても読み込み自体は続ける
+        use_case, _ = await asyncio.shield(asyncio.wrap_future(self._future))
+        return use_case
+
+    @property
+    def embedding_model(self):
+        """読み込み済みの埋め込みモデル（未完了なら None）"""
+        if not self._future.done() or self._future.exception() is not None:
+            return None
+        return self._future.result()[1]
+
+
+class SearchTimeoutError(TimeoutError):
+    """検索が制限時間内に終わらなかった"""
+
+
+class SearchExecutor:
+    """同期の検索処理を上限付きのスレッドプールで実行し、待ち時間を制限する"""
+
+    def __init__(self, max_workers: int = 4, timeout_seconds: float = 30.0):
+        """
+        Args:
+            max_workers: 同時に実行する検索の上限（超えた分は空くまで待つ）
+            timeout_seconds: 待ち時間も含めた1リクエストの上限（0 以下で無制限）
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout_seconds = timeout_seconds if timeout_seconds > 0 else None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="search"
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0  # 実行中または実行待ちの件数
+
+    async def run(self, func: Callable, *args):
+        """
+        func(*args) をスレッドプールで実行して結果を返す
+
+        制限時間を超えた場合や呼び出し側がキャンセルされた場合、まだ始まっていない処理は
+        実行せずに取り消す（実行中のスレッドは止められないため、結果を捨てる）。
+        """
+        return await self.within_deadline(self.submit(func, *args))
+
+    async def submit(self, func: Callable, *args):
+        """func(*args) をスレッドプールで実行して結果を待つ（制限時間は within_deadline でかける）"""
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        # 待っている側がキャンセルされると、未開始の future も取り消される
+        return await asyncio.wrap_future(future)
+
+    async def within_deadline(self, awaitable: Awaitable):
+        """
+        awaitable を1リクエストの制限時間内で待つ
+
+        モデルの読み込み待ちなど、検索の前段も同じ制限時間に含めるために使う。
+        SearchTimeoutError に変えるのは制限時間切れだけで、処理の中で起きた
+        TimeoutError はそのまま送出する。
+        """
+        task = asyncio.ensure_future(awaitable)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=self.timeout_seconds)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            task.cancel()
+            raise SearchTimeoutError(f"Search timed out after {self.timeout_seconds:g} s")
+        return task.result()
+
+    def _on_done(self, _future: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        """未開始の検索を取り消してスレッドプールを閉じる"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
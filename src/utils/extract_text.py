@@ -1,6 +1,8 @@
+import os
 import re
 import sys
 from pathlib import Path
+from typing import Optional
 
 import frontmatter
 import markdown
@@ -10,7 +12,54 @@ import trafilatura
 
 # 親ディレクトリをパスに追加してconfigをインポート
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS
+from config import (
+    NOISE_PATTERNS,
+    PER_LINE_NOISE_PATTERNS,
+    FAST_HTML_EXTRACT,
+    FAST_EXTRACT_MIN_CHARS,
+    SITE_CONTENT_XPATHS,
+    EXTRACTION_CACHE_DIR,
+    EXTRACTION_CACHE_MAX_BYTES,
+)
+from utils.extraction_cache import ExtractionCache
+from utils.html_extractors import HtmlExtractorRegistry
+from utils.text_cleaner import TextCleaner
+
+_text_cleaner = TextCleaner(NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS)
+
+
+def _trafilatura_extract(html: str):
+    return trafilatura.extract(html, include_comments=False, include_tables=False)
+
+
+# 既知サイトは lxml の高速パス、それ以外・抽出量不足は trafilatura
+html_extractors = HtmlExtractorRegistry(
+    fallback=_trafilatura_extract,
+    min_chars=FAST_EXTRACT_MIN_CHARS,
+    enabled=FAST_HTML_EXTRACT
+)
+html_extractors.register_xpaths(SITE_CONTENT_XPATHS)
+
+# 抽出ロジックを変えたら上げる（キャッシュ済みの抽出結果を無効化するため）
+EXTRACTOR_VERSION = "1"
+
+
+def _extractor_version() -> str:
+    """抽出結果に影響するもの（ロジック・ライブラリ・高速パスの設定）をまとめた文字列"""
+    return "|".join([
+        EXTRACTOR_VERSION,
+        str(getattr(trafilatura, "__version__", "")),
+        repr(sorted(SITE_CONTENT_XPATHS.items())),
+        str(FAST_EXTRACT_MIN_CHARS),
+        str(html_extractors.enabled),
+    ])
+
+
+extraction_cache = (
+    ExtractionCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES, _extractor_version())
+    if EXTRACTION_CACHE_DIR and EXTRACTION_CACHE_MAX_BYTES > 0
+    else None
+)
 
 
 class ExtractTextError(Exception):
@@ -41,99 +90,29 @@ class MarkdownParseError(ExtractTextError):
 def clean_text(text):
     """
     抽出したテキストから不要なノイズを除去する。
+    （パターンは起動時に一度だけコンパイルした TextCleaner で適用する）
     """
-    #print("[DEBUG] Original text length:", len(text))
-    #print("[DEBUG] Original text preview:", text[:500])
-    
-    # CSS/HTMLの残骸パターンを除去
-    css_patterns = [
-        r'\b(font-family|font-size|font-weight|line-height|color|background|padding|margin):\s*[^;]+;?',
-        r'\b(Roboto|Arial|Helvetica|Noto|Sans|Serif|Courier)\b',
-        r'rgba?\([^)]+\)',
-        r'#[0-9a-fA-F]{3,6}\b',
-        r'\d+px\b',
-        r'\d+em\b',
-        r'\d+%\b',
-    ]
-    for pattern in css_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-    
-    #print("[DEBUG] After CSS removal length:", len(text))
-    
-    # UIフィードバックや一般的なノイズフレーズを削除
-    for pattern in NOISE_PATTERNS:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-
-    # 行単位ノイズを除去
-    if PER_LINE_NOISE_PATTERNS:
-        lines = text.split('\n')
-        compiled = [re.compile(p, re.IGNORECASE) for p in PER_LINE_NOISE_PATTERNS]
-        kept = []
-        for line in lines:
-            stripped = line.strip()
-            if any(rx.search(stripped) for rx in compiled):
-                continue
-            kept.append(line)
-        text = '\n'.join(kept)
-    
-    # Contributor/著者セクションを除去（複数行対応）
-    # "Contributors:" のような見出しから次の見出しや空行が続くまでを削除
-    contributor_patterns = [
-        r'(?i)^contributors?:\s*$.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-        r'(?i)^authors?:\s*$.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-        r'(?i)^maintainers?:\s*$.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-        r'(?i)^written by.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-        r'(?i)^edited by.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-        r'(?i)^reviewed by.*?(?=\n\s*\n|\n[A-Z]|\Z)',
-    ]
-    for pattern in contributor_patterns:
-        text = re.sub(pattern, '', text, flags=re.MULTILINE | re.DOTALL)
-    
-    # タイトル重複を除去（連続する同一行を削除）
-    # 例: "Saga pattern\nSaga pattern" -> "Saga pattern"
-    lines = text.split('\n')
-    deduped_lines = []
-    prev_line = None
-    for line in lines:
-        stripped = line.strip()
-        # 空行は保持、同じ内容の連続は除去
-        if not stripped:  # 空行
-            deduped_lines.append(line)
-            prev_line = None
-        elif stripped != prev_line:
-            deduped_lines.append(line)
-            prev_line = stripped
-        # else: 前の行と同じなのでスキップ
-    text = '\n'.join(deduped_lines)
-    
-    #print("[DEBUG] After title dedup length:", len(text))
-    
-    # 改行で分断された単語を修復（例: "example\nve" -> "example"）
-    # 小文字で終わり、次行が小文字で始まる場合は結合
-    before_fix = text
-    text = re.sub(r'([a-z])\n([a-z]{1,3}\b)', r'\1\2', text)
-    
-    #if before_fix != text:
-        #print("[DEBUG] Line break fixes applied")
-    
-    # 連続する空白を1つに（改行以外）
-    text = re.sub(r'[ \t]+', ' ', text)
-    
-    # 適切な改行を挿入（文の終わりや大文字で始まる箇所で改行）
-    # ピリオド+大文字、または既存の改行を保持
-    text = re.sub(r'([.!?])\s+([A-Z])', r'\1\n\2', text)
-    
-    # 連続する空白行を圧縮（2行以上の空行を1行に）
-    text = re.sub(r'\n\s*\n(\s*\n)+', '\n\n', text)
-    
-    # 行末の空白を削除
-    text = re.sub(r'[ \t]+$', '', text, flags=re.MULTILINE)
-    
-    #print("[DEBUG] Final text length:", len(text))
-    #print("[DEBUG] Final text preview:", text[:500])
-    #print("[DEBUG] " + "="*50)
-    
-    return text.strip()
+    return _text_cleaner.clean(text)
+
+
+# 拡張子なしファイルの HTML 判定で読む先頭バイト数（判定は先頭 2048 文字で行う）
+_SNIFF_PREFIX_BYTES = 8192
+_SNIFF_CHARS = 2048
+
+
+def _decode(data: bytes) -> str:
+    """open(..., encoding="utf-8", errors="ignore") で読んだ場合と同じ文字列にする"""
+    text = data.decode("utf-8", errors="ignore")
+    # テキストモードの改行変換（\r\n / \r → \n）に合わせる
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _read_bytes(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError as exc:
+        raise FileReadError(path, exc) from exc
 
 
 def _read_file(path: str) -> str:
@@ -149,23 +128,71 @@ def _is_html_like(path: str) -> bool:
     return lower.endswith((".html", ".htm"))
 
 
-def _sniff_html(path: str) -> bool:
-    try:
-        snippet = _read_file(path)[:2048]
-    except FileReadError:
-        return False
-    sniff = snippet.lower()
-    return "<html" in sniff or "<!doctype" in sniff
+def _sniff_html(path: str) -> Optional[bytes]:
+    """
+    拡張子なしファイルが HTML なら内容全体（バイト列）を返し、そうでなければ None
 
+    先頭の固定長だけを読んで判定し、バイナリ（NUL を含む）や HTML でないファイルは
+    残りを読まずに捨てる。HTML の場合は同じファイルハンドルで続きを読み、
+    抽出側で再度ディスクから読まなくて済むようにする。
+    """
+    try:
+        with open(path, "rb") as f:
+            prefix = f.read(_SNIFF_PREFIX_BYTES)
+            if b"\0" in prefix:
+                return None
+            sniff = _decode(prefix)[:_SNIFF_CHARS].lower()
+            if "<html" not in sniff and "<!doctype" not in sniff:
+                return None
+            return prefix + f.read()
+    except OSError:
+        return None
+
+
+def _extract_html_raw(path: str, data: Optional[bytes], content_hash: Optional[str] = None) -> Optional[str]:
+    """
+    HTML から clean_text 適用前の本文を抽出する（ディスクキャッシュ経由）
 
-def extract_from_html(path):
+    content_hash（ファイル内容の SHA-256）が渡された場合はそれをキーに使い、
+    キャッシュにあればファイルを読まずに返す。
+    """
+    cache = extraction_cache
+    if cache is None:
+        if data is None:
+            data = _read_bytes(path)
+        return html_extractors.extract(path, _decode(data))
+
+    # 高速パスはドメインで抽出器が変わるため、ドメインもキーに含める
+    variant = html_extractors.domain_for(path) or ""
+    if content_hash is None:
+        if data is None:
+            data = _read_bytes(path)
+        key = cache.key_for(data, variant)
+    else:
+        key = cache.key_for_hash(content_hash, variant)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    if data is None:
+        data = _read_bytes(path)
+    extracted = html_extractors.extract(path, _decode(data))
+    # 本文なしの結果も保存し、次回のパースを省く
+    cache.put(key, extracted or "")
+    return extracted
+
+
+def extract_from_html(path, data: Optional[bytes] = None, content_hash: Optional[str] = None):
     """
     HTMLファイルから本文のみを抽出する。
-    Trafilaturaで主要コンテンツを抽出し、ノイズを除去する。
+    既知サイトは本文コンテナを XPath で、それ以外は Trafilatura で抽出し、ノイズを除去する。
+    抽出結果はファイル内容のハッシュをキーにキャッシュする（clean_text は毎回適用）。
+
+    data が渡された場合はファイルを読み直さずにその内容を使う。
+    content_hash（計算済みのファイル内容の SHA-256）が渡された場合はハッシュを計算し直さない。
     """
     try:
-        html = _read_file(path)
-        extracted = trafilatura.extract(html, include_comments=False, include_tables=False)
+        extracted = _extract_html_raw(path, data, content_hash)
     except FileReadError:
         raise
     except Exception as exc:  # Trafilatura parsing errors
@@ -198,14 +225,22 @@ def extract_from_md(path):
     return text
 
 
-def extract_text(path):
-    """Extract text from HTML/Markdown and html-like files without extensions."""
+def extract_text(path, content_hash: Optional[str] = None):
+    """Extract text from HTML/Markdown and html-like files without extensions.
+
+    content_hash is the file's SHA-256 if the caller already computed it (reused as the cache key).
+    """
     lower = path.lower()
     try:
         if lower.endswith(".md"):
             return extract_from_md(path)
-        if _is_html_like(path) or ("." not in path and _sniff_html(path)):
-            return extract_from_html(path)
+        if _is_html_like(path):
+            return extract_from_html(path, content_hash=content_hash)
+        if "." not in os.path.basename(path):
+            # 先頭だけで判定し、HTML なら読み込んだ内容をそのまま抽出に使う
+            data = _sniff_html(path)
+            if data is not None:
+                return extract_from_html(path, data, content_hash)
         return ""
     except ExtractTextError:
         # Fail-safe: skip problematic files to keep indexing running
@@ -0,0 +1,127 @@
+"""
+抽出テキストのディスクキャッシュ（内容アドレス方式）
+
+HTML のパース（trafilatura / lxml）結果を、ファイル内容のハッシュと抽出器のバージョンを
+キーとして保存する。NOISE_PATTERNS や ContentPolicy の調整後に全件を再処理しても、
+clean_text 以降だけを実行すればよくなる。
+
+- 1エントリ1ファイル（zlib 圧縮）。書き込みは一時ファイル経由の置き換えで、
+  複数のワーカープロセスから同時に使ってもよい
+- 合計サイズが上限を超えたら、更新時刻の古いもの（最後に使われたのが古いもの）から削除する
+"""
+import hashlib
+import os
+import uuid
+import zlib
+from typing import Optional
+
+_SUFFIX = ".z"
+# 上限を超えたときは上限のこの割合まで減らす（毎回の削除を避けるため）
+_EVICT_TARGET_RATIO = 0.9
+
+
+class ExtractionCache:
+    """ファイル内容ハッシュ + 抽出器バージョンをキーとする抽出テキストのキャッシュ"""
+
+    def __init__(self, directory: str, max_bytes: int, extractor_version: str):
+        """
+        Args:
+            directory: キャッシュディレクトリ
+            max_bytes: キャッシュ全体の上限サイズ（バイト）
+            extractor_version: 抽出結果に影響する設定・ライブラリのバージョンを表す文字列
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extractor_version = extractor_version
+        self.hits = 0
+        self.misses = 0
+        # 合計サイズの見積もり（初回の書き込み時に走査して求める）
+        self._estimated_bytes: Optional[int] = None
+
+    def key_for(self, data: bytes, variant: str = "") -> str:
+        """ファイル内容と抽出条件（ドメインなど）からキーを作る"""
+        return self.key_for_hash(hashlib.sha256(data).hexdigest(), variant)
+
+    def key_for_hash(self, content_hash: str, variant: str = "") -> str:
+        """
+        計算済みのファイル内容ハッシュ（SHA-256 の16進表記）からキーを作る
+
+        索引構築の走査段で求めたハッシュを使い、ファイルを再度読んでハッシュしなくて済むようにする。
+        """
+        suffix = hashlib.sha256(f"{self.extractor_version}|{variant}".encode("utf-8")).hexdigest()
+        return f"{content_hash}-{suffix[:16]}"
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[str]:
+        """キャッシュ済みのテキストを返す（なければ None）"""
+        path = self._path_for(key)
+        try:
+            with open(path, "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+        except (OSError, zlib.error, UnicodeDecodeError):
+            self.misses += 1
+            return None
+        try:
+            # 使われたエントリを新しくして削除対象から遠ざける（LRU）
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """テキストを保存する（失敗してもキャッシュなしとして続行）"""
+        path = self._path_for(key)
+        payload = zlib.compress(text.encode("utf-8"))
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        if self._estimated_bytes is None:
+            self.evict()
+        else:
+            self._estimated_bytes += len(payload)
+            if self._estimated_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> int:
+        """上限を超えていれば古いエントリから削除し、削除した件数を返す"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if total > self.max_bytes:
+            target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        self._estimated_bytes = total
+        return removed
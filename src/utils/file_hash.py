@@ -0,0 +1,15 @@
+import hashlib
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def compute_file_hash(path: str) -> str:
+    """
+    ファイル内容の SHA-256 ハッシュを計算する。
+    大きなファイルでもメモリを圧迫しないようチャンク単位で読み込む。
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,497 @@
+import os
+import sys
+from pathlib import Path
+import types
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Preload lightweight stubs so the use case import succeeds without optional deps.
+if "sentence_transformers" not in sys.modules:
+    class FakeSentenceTransformer:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        def encode(self, text, **_kwargs):  # pragma: no cover - stub behavior
+            return [0.0] * 384
+
+    sys.modules["sentence_transformers"] = types.SimpleNamespace(
+        SentenceTransformer=FakeSentenceTransformer
+    )
+
+
+from application.use_cases import BuildIndexUseCase, BuildIndexRequest  # noqa: E402
+from application.services import TextChunker  # noqa: E402
+from domain.entities import Chunk  # noqa: E402
+from utils.file_hash import compute_file_hash  # noqa: E402
+
+
+class FakeRepository:
+    def __init__(self):
+        self.documents = {}
+        self.chunks = {}
+        self.embeddings = {}
+        self.manifest = {}
+        self.embedding_cache = {}
+        self.signatures = {}
+        self.aliases = {}
+
+    def save_indexed_documents(self, documents, passages, embeddings):
+        for document in documents:
+            existing = self.documents.get(document.path)
+            if existing is not None and existing.text != document.text:
+                # 本文が変わった正規ドキュメントの別名は外し、次回再処理させる
+                for alias, canonical in list(self.aliases.items()):
+                    if canonical == document.path:
+                        del self.aliases[alias]
+                        self.manifest.pop(alias, None)
+            document.id = existing.id if existing else len(self.documents) + 1
+            self.documents[document.path] = document
+        for (doc_pos, chunk_index, text), embedding in zip(passages, embeddings):
+            chunk = Chunk(
+                id=len(self.chunks) + 1,
+                document_id=documents[doc_pos].id,
+                chunk_index=chunk_index,
+                text=text,
+            )
+            self.chunks[chunk.id] = chunk
+            self.embeddings[chunk.id] = embedding
+        return documents
+
+    def find_by_path(self, path):
+        return self.documents.get(path)
+
+    def has_embeddings(self, doc_id):
+        return any(c.document_id == doc_id and c.id in self.embeddings for c in self.chunks.values())
+
+    def chunks_of(self, path):
+        doc_id = self.documents[path].id
+        return [c for c in self.chunks.values() if c.document_id == doc_id]
+
+    def get_cached_embeddings(self, keys):
+        return {key: self.embedding_cache[key] for key in keys if key in self.embedding_cache}
+
+    def save_cached_embeddings(self, keys, embeddings):
+        self.embedding_cache.update(zip(keys, embeddings))
+
+    def get_signatures(self, category=None):
+        categories = {path: document.category for path, document in self.documents.items()}
+        return {
+            path: signature for path, signature in self.signatures.items()
+            if category is None or categories.get(path) == category
+        }
+
+    def save_signatures(self, signatures):
+        self.signatures.update(signatures)
+
+    def save_aliases(self, aliases):
+        self.aliases.update(aliases)
+        for path in aliases:
+            self.signatures.pop(path, None)
+
+    def get_aliases(self):
+        return dict(self.aliases)
+
+    def delete_aliases(self, alias_paths):
+        for path in alias_paths:
+            self.aliases.pop(path, None)
+
+    def delete_by_id(self, doc_id):
+        for path, document in list(self.documents.items()):
+            if document.id == doc_id:
+                del self.documents[path]
+                return True
+        return False
+
+    def get_manifest(self):
+        return dict(self.manifest)
+
+    def save_manifest_entries(self, entries):
+        for entry in entries:
+            self.manifest[entry.path] = entry
+
+
+class FakeEmbeddingModel:
+    model_id = "fake-model"
+
+    def __init__(self):
+        self.batches = []
+
+    def encode_batch(self, texts, batch_size=32):
+        self.batches.append(list(texts))
+        return np.array([[float(len(t))] * 384 for t in texts], dtype="float32")
+
+
+class AcceptAllPolicy:
+    def is_meaningful_for(self, _path, text):
+        return "reject" not in text
+
+
+def _read_text(path, content_hash=None):
+    return Path(path).read_text()
+
+
+def _write_files(tmp_path, texts):
+    """テキストを実ファイルとして書き出し、パス→テキストの辞書を返す"""
+    files = {}
+    for name, text in texts.items():
+        path = tmp_path / name
+        path.write_text(text)
+        files[str(path)] = text
+    return files
+
+
+def _make_use_case(files, repository=None, model=None):
+    repository = repository or FakeRepository()
+    model = model or FakeEmbeddingModel()
+    use_case = BuildIndexUseCase(
+        repository=repository,
+        embedding_model=model,
+        content_policy=AcceptAllPolicy(),
+        extract_text_func=_read_text,
+        path_to_url_func=lambda path: f"https://example.com/{path}",
+        logger=lambda _msg: None,
+    )
+    return use_case, repository, model
+
+
+def test_execute_embeds_in_batches_sorted_by_length(tmp_path):
+    files = _write_files(
+        tmp_path, {"a": "x" * 30, "b": "x" * 10, "c": "x" * 20, "d": "x" * 5, "e": "x" * 1}
+    )
+    use_case, repository, model = _make_use_case(files)
+
+    response = use_case.execute(BuildIndexRequest(files=list(files), batch_size=2))
+
+    assert [len(batch) for batch in model.batches] == [2, 2, 1]
+    assert model.batches[0] == ["x" * 10, "x" * 30]
+    assert model.batches[1] == ["x" * 5, "x" * 20]
+    assert len(repository.embeddings) == 5
+    assert response.skipped_documents == 0
+
+
+def test_execute_stores_embedding_matching_each_document(tmp_path):
+    files = _write_files(tmp_path, {"long": "y" * 40, "short": "y" * 4})
+    use_case, repository, _ = _make_use_case(files)
+
+    use_case.execute(BuildIndexRequest(files=list(files), batch_size=8))
+
+    for path, text in files.items():
+        (chunk,) = repository.chunks_of(path)
+        assert chunk.text == text
+        assert repository.embeddings[chunk.id][0] == pytest.approx(len(text))
+
+
+def test_execute_passes_scanned_content_hash_to_extractor(tmp_path):
+    files = _write_files(tmp_path, {"a": "alpha", "b": "beta"})
+    received = {}
+
+    def read_text(path, content_hash=None):
+        received[path] = content_hash
+        return _read_text(path)
+
+    use_case, _, _ = _make_use_case(files)
+    use_case.extract_text_func = read_text
+    use_case.execute(BuildIndexRequest(files=sorted(files)))
+
+    assert received == {path: compute_file_hash(path) for path in files}
+
+
+def test_execute_skips_rejected_documents(tmp_path):
+    files = _write_files(tmp_path, {"ok": "fine text", "bad": "reject me", "empty": "   "})
+    use_case, repository, _ = _make_use_case(files)
+
+    response = use_case.execute(BuildIndexRequest(files=list(files)))
+
+    assert response.skipped_documents == 2
+    assert list(repository.documents) == [str(tmp_path / "ok")]
+
+
+def test_execute_counts_batch_failure_as_skipped(tmp_path):
+    class FailingModel(FakeEmbeddingModel):
+        def encode_batch(self, texts, batch_size=32):
+            raise RuntimeError("boom")
+
+    files = _write_files(tmp_path, {"a": "aaa", "b": "bbb"})
+    use_case, repository, _ = _make_use_case(files, model=FailingModel())
+
+    response = use_case.execute(BuildIndexRequest(files=list(files)))
+
+    assert response.skipped_documents == 2
+    assert repository.documents == {}
+    assert repository.manifest == {}
+
+
+def test_execute_retries_documents_whose_batch_failed_to_save(tmp_path):
+    class FailingRepository(FakeRepository):
+        fail = True
+
+        def save_indexed_documents(self, documents, passages, embeddings):
+            if self.fail:
+                raise RuntimeError("disk full")
+            return super().save_indexed_documents(documents, passages, embeddings)
+
+    files = _write_files(tmp_path, {"a": "aaa", "b": "bbb"})
+    use_case, repository, _ = _make_use_case(files, repository=FailingRepository())
+
+    response = use_case.execute(BuildIndexRequest(files=sorted(files)))
+    assert response.skipped_documents == 2
+    assert repository.manifest == {}
+
+    # マニフェストに残らないため、次回の増分実行で再処理される
+    repository.fail = False
+    rerun = use_case.execute(BuildIndexRequest(files=sorted(files)))
+    assert rerun.new_documents == 2
+    assert all(repository.chunks_of(path) for path in files)
+
+
+def test_execute_skips_unchanged_files_on_rerun(tmp_path):
+    files = _write_files(tmp_path, {"a": "alpha", "b": "beta", "bad": "reject me"})
+    use_case, repository, model = _make_use_case(files)
+    first = use_case.execute(BuildIndexRequest(files=list(files)))
+    assert (first.new_documents, first.skipped_documents) == (2, 1)
+
+    (tmp_path / "b").write_text("beta, revised")
+    model.batches.clear()
+    second = use_case.execute(BuildIndexRequest(files=list(files)))
+
+    assert second.unchanged_documents == 2
+    assert (second.new_documents, second.updated_documents) == (0, 1)
+    assert model.batches == [["beta, revised"]]
+
+
+def test_execute_adopts_indexed_documents_when_manifest_is_missing(tmp_path):
+    files = _write_files(tmp_path, {"a": "alpha", "b": "beta"})
+    use_case, repository, model = _make_use_case(files)
+    use_case.execute(BuildIndexRequest(files=sorted(files)))
+    indexed_ids = {path: doc.id for path, doc in repository.documents.items()}
+
+    # マニフェスト導入前の DB: ドキュメントと埋め込みはあるがマニフェストがない
+    repository.manifest.clear()
+    (tmp_path / "b").write_text("beta, revised")
+    model.batches.clear()
+    response = use_case.execute(BuildIndexRequest(files=sorted(files)))
+
+    assert response.unchanged_documents == 1
+    assert (response.new_documents, response.updated_documents) == (0, 1)
+    assert model.batches == [["beta, revised"]]
+    assert {path: entry.doc_id for path, entry in repository.manifest.items()} == indexed_ids
+
+
+def test_execute_treats_touched_file_with_same_hash_as_unchanged(tmp_path):
+    files = _write_files(tmp_path, {"a": "alpha"})
+    use_case, repository, model = _make_use_case(files)
+    use_case.execute(BuildIndexRequest(files=list(files)))
+
+    path = str(tmp_path / "a")
+    stale = repository.manifest[path]
+    os.utime(path, ns=(stale.mtime_ns + 10**9, stale.mtime_ns + 10**9))
+    model.batches.clear()
+    response = use_case.execute(BuildIndexRequest(files=list(files)))
+
+    assert response.unchanged_documents == 1
+    assert model.batches == []
+    assert repository.manifest[path].mtime_ns == stale.mtime_ns + 10**9
+
+
+def test_execute_full_rebuild_ignores_manifest(tmp_path):
+    files = _write_files(tmp_path, {"a": "alpha"})
+    use_case, _, model = _make_use_case(files)
+    use_case.execute(BuildIndexRequest(files=list(files)))
+
+    response = use_case.execute(
+        BuildIndexRequest(files=list(files), incremental=False, use_embedding_cache=False)
+    )
+
+    assert (response.updated_documents, response.unchanged_documents) == (1, 0)
+    assert len(model.batches) == 2
+
+
+def test_execute_with_worker_processes_matches_serial(tmp_path):
+    files = _write_files(
+        tmp_path, {f"doc{i}": ("reject " if i % 4 == 0 else "") + "z" * i for i in range(1, 12)}
+    )
+    serial, serial_repo, _ = _make_use_case(files)
+    parallel, parallel_repo, _ = _make_use_case(files)
+
+    expected = serial.execute(BuildIndexRequest(files=list(files), batch_size=3))
+    actual = parallel.execute(
+        BuildIndexRequest(files=list(files), batch_size=3, workers=2, extraction_chunk_size=2)
+    )
+
+    assert actual == expected
+    assert sorted(parallel_repo.documents) == sorted(serial_repo.documents)
+
+
+def test_execute_embeds_each_passage_of_long_documents(tmp_path):
+    long_text = "\n".join(f"sentence number {i} with some words" for i in range(40))
+    files = _write_files(tmp_path, {"long": long_text, "short": "tiny"})
+    repository = FakeRepository()
+    use_case = BuildIndexUseCase(
+        repository=repository,
+        embedding_model=FakeEmbeddingModel(),
+        content_policy=AcceptAllPolicy(),
+        extract_text_func=_read_text,
+        path_to_url_func=lambda path: path,
+        logger=lambda _msg: None,
+        text_chunker=TextChunker(max_tokens=30, overlap_tokens=6),
+    )
+
+    use_case.execute(BuildIndexRequest(files=list(files)))
+
+    long_chunks = sorted(repository.chunks_of(str(tmp_path / "long")), key=lambda c: c.chunk_index)
+    assert len(long_chunks) > 1
+    assert [c.chunk_index for c in long_chunks] == list(range(len(long_chunks)))
+    assert long_chunks[0].text.startswith("sentence number 0 ")
+    assert long_chunks[-1].text.endswith("sentence number 39 with some words")
+    assert len(repository.embeddings) == len(repository.chunks)
+
+
+def test_execute_consumes_file_generator_and_reports_stage_stats(tmp_path):
+    files = _write_files(tmp_path, {f"doc{i}": "w" * (i + 1) for i in range(7)})
+    use_case, repository, _ = _make_use_case(files)
+
+    response = use_case.execute(
+        BuildIndexRequest(files=(path for path in files), batch_size=2, queue_size=1)
+    )
+
+    assert response.new_documents == 7
+    assert len(repository.documents) == 7
+    stats = {stage.name: stage for stage in response.stage_stats}
+    assert list(stats) == ["scan", "extract", "embed", "write"]
+    assert (stats["scan"].items, stats["extract"].items, stats["write"].items) == (7, 7, 7)
+
+
+def test_execute_propagates_unexpected_stage_errors(tmp_path):
+    class BrokenManifestRepository(FakeRepository):
+        def save_manifest_entries(self, entries):
+            raise KeyboardInterrupt()
+
+    files = _write_files(tmp_path, {f"doc{i}": "text" for i in range(20)})
+    use_case, _, _ = _make_use_case(files, repository=BrokenManifestRepository())
+
+    with pytest.raises(KeyboardInterrupt):
+        use_case.execute(BuildIndexRequest(files=list(files), batch_size=1, queue_size=1))
+
+
+def test_execute_reuses_cached_embeddings_for_identical_text(tmp_path):
+    (tmp_path / "cdk").mkdir()
+    (tmp_path / "aws").mkdir()
+    files = _write_files(
+        tmp_path, {"cdk/page": "same page", "aws/page": "same page", "cdk/other": "other"}
+    )
+    use_case, repository, model = _make_use_case(files)
+
+    # 同一本文のページを別名にせず、両方を埋め込みキャッシュ経由で索引させる
+    first = use_case.execute(BuildIndexRequest(files=list(files), near_duplicate_threshold=0))
+
+    assert model.batches == [["other", "same page"]]
+    assert (first.embedding_cache_hits, first.embedding_cache_misses) == (1, 2)
+    for path, text in files.items():
+        (chunk,) = repository.chunks_of(path)
+        assert repository.embeddings[chunk.id][0] == pytest.approx(len(text))
+
+    model.batches.clear()
+    second = use_case.execute(
+        BuildIndexRequest(files=list(files), incremental=False, near_duplicate_threshold=0)
+    )
+
+    assert model.batches == []
+    assert (second.embedding_cache_hits, second.embedding_cache_misses) == (3, 0)
+    assert second.updated_documents == 3
+
+
+def _page(topic, extra=""):
+    words = " ".join(f"{topic}{i}" for i in range(200))
+    return f"{words} {extra}".strip()
+
+
+def test_execute_records_near_duplicates_as_aliases(tmp_path):
+    (tmp_path / "v1").mkdir()
+    (tmp_path / "v2").mkdir()
+    files = _write_files(tmp_path, {
+        "v1/page": _page("lambda", "footer v1"),
+        "v2/page": _page("lambda", "footer v2"),
+        "other": _page("queue"),
+    })
+    use_case, repository, model = _make_use_case(files)
+
+    response = use_case.execute(BuildIndexRequest(files=sorted(files)))
+
+    v1, v2 = str(tmp_path / "v1/page"), str(tmp_path / "v2/page")
+    assert response.duplicate_documents == 1
+    assert response.new_documents == 2
+    assert sorted(repository.documents) == sorted([str(tmp_path / "other"), v1])
+    assert repository.aliases == {v2: v1}
+    assert sorted(repository.signatures) == sorted([str(tmp_path / "other"), v1])
+    assert repository.manifest[v2].doc_id is None
+    assert sum(len(batch) for batch in model.batches) == 2
+
+    # 正規ドキュメント自身は再索引しても別名にならない
+    rerun = use_case.execute(BuildIndexRequest(files=sorted(files), incremental=False))
+    assert rerun.duplicate_documents == 1
+    assert rerun.updated_documents == 2
+    assert repository.aliases == {v2: v1}
+
+
+def test_incremental_build_rechecks_aliases_of_changed_canonical(tmp_path):
+    files = _write_files(tmp_path, {
+        "dup.html": _page("lambda", "footer dup"),
+        "p0.html": _page("lambda", "footer p0"),
+    })
+    use_case, repository, _ = _make_use_case(files)
+    dup, p0 = str(tmp_path / "dup.html"), str(tmp_path / "p0.html")
+
+    use_case.execute(BuildIndexRequest(files=sorted(files)))
+    assert repository.aliases == {p0: dup}
+
+    # 正規ドキュメントの本文が変わると、別名だったページも同じ実行で判定し直す
+    (tmp_path / "dup.html").write_text(_page("queue"))
+    response = use_case.execute(BuildIndexRequest(files=sorted(files)))
+
+    assert repository.aliases == {}
+    assert response.duplicate_documents == 0
+    assert (response.new_documents, response.updated_documents) == (1, 1)
+    assert response.unchanged_documents == 0
+    assert "footer p0" in repository.documents[p0].text
+    assert repository.manifest[p0].doc_id == repository.documents[p0].id
+
+    # 次の増分実行ではどちらも変更なし
+    rerun = use_case.execute(BuildIndexRequest(files=sorted(files)))
+    assert rerun.unchanged_documents == 2
+
+
+def test_execute_only_detects_near_duplicates_within_category(tmp_path):
+    (tmp_path / "cdk").mkdir()
+    (tmp_path / "aws_design").mkdir()
+    cdk_files = _write_files(tmp_path, {"cdk/page": _page("lambda", "footer cdk")})
+    design_files = _write_files(tmp_path, {"aws_design/page": _page("lambda", "footer design")})
+    use_case, repository, _ = _make_use_case({**cdk_files, **design_files})
+
+    use_case.execute(BuildIndexRequest(files=sorted(cdk_files), category="cdk"))
+    response = use_case.execute(BuildIndexRequest(files=sorted(design_files), category="aws_design"))
+
+    # 別カテゴリのドキュメントの別名にはしない（そのカテゴリの検索で見つからなくなるため）
+    assert response.duplicate_documents == 0
+    assert response.new_documents == 1
+    assert repository.aliases == {}
+    assert repository.documents[str(tmp_path / "aws_design/page")].category == "aws_design"
+
+
+def test_execute_can_disable_near_duplicate_detection(tmp_path):
+    files = _write_files(tmp_path, {"a": _page("lambda"), "b": _page("lambda")})
+    use_case, repository, _ = _make_use_case(files)
+
+    response = use_case.execute(
+        BuildIndexRequest(files=sorted(files), near_duplicate_threshold=0)
+    )
+
+    assert response.duplicate_documents == 0
+    assert response.new_documents == 2
+    assert repository.aliases == {}
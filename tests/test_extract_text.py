@@ -0,0 +1,124 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Preload lightweight stubs so extract_text import succeeds without optional deps.
+for name, attrs in {
+    "frontmatter": {"loads": lambda raw: types.SimpleNamespace(content=raw)},
+    "markdown": {"markdown": lambda text: text},
+    "trafilatura": {"extract": lambda _html, **_kwargs: ""},
+}.items():
+    if name not in sys.modules:
+        sys.modules[name] = types.SimpleNamespace(**attrs)
+
+from utils import extract_text as extract_text_module  # noqa: E402
+from utils.extraction_cache import ExtractionCache  # noqa: E402
+from utils.file_hash import compute_file_hash  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def extraction_cache(tmp_path, monkeypatch):
+    """抽出キャッシュはテストごとの一時ディレクトリに置く"""
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024, extractor_version="test")
+    monkeypatch.setattr(extract_text_module, "extraction_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def extracted_html(monkeypatch):
+    """trafilatura に渡された HTML を記録し、ファイルの再読み込みを禁止する"""
+    calls = []
+
+    def fake_extract(html, **_kwargs):
+        calls.append(html)
+        return "Extracted body."
+
+    def no_reread(path):
+        raise AssertionError(f"file read twice: {path}")
+
+    monkeypatch.setattr(extract_text_module, "trafilatura", types.SimpleNamespace(extract=fake_extract))
+    monkeypatch.setattr(extract_text_module, "_read_file", no_reread)
+    return calls
+
+
+def test_extensionless_html_is_read_once_and_passed_to_extractor(tmp_path, extracted_html):
+    # wget ミラーではディレクトリ名にドットを含むことが多い
+    page = tmp_path / "docs.python.org" / "3" / "tutorial"
+    page.parent.mkdir(parents=True)
+    body = "<!DOCTYPE html>\r\n<html><body>" + "x" * 20000 + "</body></html>\r\n"
+    page.write_bytes(body.encode("utf-8"))
+
+    assert extract_text_module.extract_text(str(page)) == "Extracted body."
+    assert extracted_html == [body.replace("\r\n", "\n")]
+
+
+def test_binary_extensionless_file_is_rejected_from_prefix(tmp_path, extracted_html):
+    blob = tmp_path / "archive"
+    blob.write_bytes(b"<html>\x00\x01\x02" + b"\xff" * 50000)
+
+    assert extract_text_module.extract_text(str(blob)) == ""
+    assert extracted_html == []
+
+
+def test_non_html_extensionless_file_is_skipped(tmp_path, extracted_html):
+    notes = tmp_path / "LICENSE"
+    notes.write_text("Permission is hereby granted, free of charge...\n" * 1000)
+
+    assert extract_text_module.extract_text(str(notes)) == ""
+    assert extracted_html == []
+
+
+def test_html_marker_beyond_sniff_window_is_not_html(tmp_path, extracted_html):
+    page = tmp_path / "late-marker"
+    page.write_text(" " * 5000 + "<html></html>")
+
+    assert extract_text_module.extract_text(str(page)) == ""
+
+
+def test_cached_extraction_skips_html_parsing(tmp_path, extracted_html, extraction_cache):
+    page = tmp_path / "page.html"
+    page.write_text("<html><body>Body</body></html>")
+
+    first = extract_text_module.extract_text(str(page))
+    second = extract_text_module.extract_text(str(page))
+
+    assert first == second == "Extracted body."
+    assert len(extracted_html) == 1
+    assert (extraction_cache.hits, extraction_cache.misses) == (1, 1)
+
+
+def test_changed_content_or_extractor_version_misses_cache(tmp_path, extracted_html, extraction_cache):
+    page = tmp_path / "page.html"
+    page.write_text("<html><body>v1</body></html>")
+    extract_text_module.extract_text(str(page))
+
+    page.write_text("<html><body>v2</body></html>")
+    extract_text_module.extract_text(str(page))
+    extraction_cache.extractor_version = "test-2"
+    extract_text_module.extract_text(str(page))
+
+    assert len(extracted_html) == 3
+
+
+def test_precomputed_content_hash_is_reused_as_cache_key(tmp_path, extracted_html, monkeypatch):
+    page = tmp_path / "page.html"
+    page.write_text("<html><body>Body</body></html>")
+    content_hash = compute_file_hash(str(page))
+
+    # ハッシュ未指定の呼び出しと同じキャッシュエントリを使う
+    extract_text_module.extract_text(str(page))
+
+    def no_read(path):
+        raise AssertionError(f"file read on cache hit: {path}")
+
+    monkeypatch.setattr(extract_text_module, "_read_bytes", no_read)
+    assert extract_text_module.extract_text(str(page), content_hash=content_hash) == "Extracted body."
+    assert len(extracted_html) == 1
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from utils.extraction_cache import ExtractionCache  # noqa: E402
+
+
+def _cache(tmp_path, max_bytes=1024 * 1024):
+    return ExtractionCache(str(tmp_path / "cache"), max_bytes=max_bytes, extractor_version="v1")
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.key_for(b"<html>page</html>", "docs.python.org")
+
+    assert cache.get(key) is None
+    cache.put(key, "本文テキスト")
+
+    assert cache.get(key) == "本文テキスト"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_depends_on_content_variant_and_version(tmp_path):
+    cache = _cache(tmp_path)
+    other = ExtractionCache(cache.directory, cache.max_bytes, extractor_version="v2")
+
+    keys = {
+        cache.key_for(b"a"),
+        cache.key_for(b"b"),
+        cache.key_for(b"a", "vuejs.org"),
+        other.key_for(b"a"),
+    }
+
+    assert len(keys) == 4
+    # 計算済みのハッシュからも同じキーになる
+    assert cache.key_for_hash(hashlib.sha256(b"a").hexdigest(), "vuejs.org") == cache.key_for(b"a", "vuejs.org")
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10_000)
+    keys = [cache.key_for(str(i).encode()) for i in range(6)]
+    # 圧縮が効かないランダムな内容で1件あたり約 3KB
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, os.urandom(1500).hex())
+        path = cache._path_for(key)
+        os.utime(path, ns=(i * 10**9, i * 10**9))
+
+    cache.get(keys[0])  # 最も古いエントリを使って新しくする
+    for key in keys[3:]:
+        cache.put(key, os.urandom(1500).hex())
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[5]) is not None
+    total = sum(f.stat().st_size for f in (tmp_path / "cache").rglob("*.z"))
+    assert total <= 10_000
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+pytest.importorskip("lxml")
+
+from config import SITE_CONTENT_XPATHS  # noqa: E402
+from utils.html_extractors import HtmlExtractorRegistry, XPathExtractor  # noqa: E402
+
+SPHINX_PAGE = """<!DOCTYPE html>
+<html><head><title>t</title><script>var x = 1;</script></head>
+<body>
+<nav class="sidebar">Table of Contents</nav>
+<div class="body" role="main">
+  <h1>Decorators<a class="headerlink" href="#d">¶</a></h1>
+  <p>A decorator is a <code>callable</code>   that
+  returns a function.</p>
+  <!-- generated -->
+  <ul><li>first</li><li>second<br>line</li></ul>
+  <footer>Footer text</footer>
+</div>
+</body></html>"""
+
+
+def _fallback(calls):
+    def fallback(html):
+        calls.append(html)
+        return "fallback text"
+    return fallback
+
+
+def test_xpath_extractor_returns_container_text_by_block():
+    extractor = XPathExtractor(SITE_CONTENT_XPATHS["docs.python.org"])
+
+    assert extractor(SPHINX_PAGE) == (
+        "Decorators\nA decorator is a callable that returns a function.\nfirst\nsecond\nline"
+    )
+
+
+def test_xpath_extractor_without_container_returns_none():
+    assert XPathExtractor('//div[@id="missing"]')(SPHINX_PAGE) is None
+
+
+def test_registry_uses_fast_path_for_known_domain():
+    calls = []
+    registry = HtmlExtractorRegistry(fallback=_fallback(calls), min_chars=10)
+    registry.register_xpaths(SITE_CONTENT_XPATHS)
+
+    text = registry.extract("/docs/python/docs.python.org/3/glossary.html", SPHINX_PAGE)
+
+    assert text.startswith("Decorators\n")
+    assert calls == []
+
+
+@pytest.mark.parametrize(
+    "path, min_chars",
+    [
+        ("/docs/python/example.com/page.html", 10),  # 未登録ドメイン
+        ("/docs/python/docs.python.org/3/page.html", 10_000),  # 抽出量が足りない
+    ],
+)
+def test_registry_falls_back(path, min_chars):
+    calls = []
+    registry = HtmlExtractorRegistry(fallback=_fallback(calls), min_chars=min_chars)
+    registry.register_xpaths(SITE_CONTENT_XPATHS)
+
+    assert registry.extract(path, SPHINX_PAGE) == "fallback text"
+    assert calls == [SPHINX_PAGE]
+
+
+def test_registry_falls_back_when_extractor_fails():
+    def broken(_html):
+        raise RuntimeError("unexpected layout")
+
+    calls = []
+    registry = HtmlExtractorRegistry(fallback=_fallback(calls), min_chars=1)
+    registry.register("vuejs.org", broken)
+
+    assert registry.domain_for("/docs/vue/v3.vuejs.org/guide/index.html") == "vuejs.org"
+    assert registry.extract("/docs/vue/v3.vuejs.org/guide/index.html", "<html></html>") == "fallback text"
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from infrastructure.models.micro_batcher import MicroBatcher  # noqa: E402
+
+
+class RecordingEncoder:
+    """テキスト長をベクトルにし、呼ばれたバッチを記録する"""
+
+    def __init__(self, delay=None):
+        self.batches = []
+        self.delay = delay
+
+    def __call__(self, texts):
+        if self.delay is not None:
+            self.delay.wait(timeout=5)
+        self.batches.append(list(texts))
+        return np.array([[float(len(t))] * 4 for t in texts], dtype="float32")
+
+
+def test_concurrent_encodes_are_batched_and_routed_to_callers():
+    release = threading.Event()
+    encoder = RecordingEncoder(delay=release)
+    batcher = MicroBatcher(encoder, max_batch_size=8, max_wait_ms=50)
+    texts = ["q" * n for n in range(1, 17)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = [executor.submit(batcher.encode, text) for text in texts]
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    for text, vector in zip(texts, results):
+        assert vector[0] == len(text)
+    assert sorted(t for batch in encoder.batches for t in batch) == sorted(texts)
+    assert all(len(batch) <= 8 for batch in encoder.batches)
+    assert len(encoder.batches) < len(texts)
+    assert batcher.items == len(texts)
+    batcher.close()
+
+
+def test_encode_batch_errors_reach_every_caller_in_the_batch():
+    def failing(_texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(failing, max_wait_ms=0)
+    with pytest.raises(RuntimeError, match="model failed"):
+        batcher.encode("query")
+    batcher.close()
+
+
+def test_encode_async_does_not_block_the_event_loop():
+    encoder = RecordingEncoder()
+    batcher = MicroBatcher(encoder, max_batch_size=4, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.encode_async(t) for t in ["a", "bb", "ccc"]))
+
+    results = asyncio.run(run())
+
+    assert [v[0] for v in results] == [1, 2, 3]
+    assert encoder.batches == [["a", "bb", "ccc"]]
+    batcher.close()
+
+
+def test_cancelled_requests_are_not_encoded():
+    release = threading.Event()
+    encoder = RecordingEncoder(delay=release)
+    batcher = MicroBatcher(encoder, max_batch_size=1, max_wait_ms=0)
+
+    first = batcher.submit("first")
+    cancelled = batcher.submit("cancelled")
+    assert cancelled.cancel()
+    last = batcher.submit("last")
+    release.set()
+
+    assert first.result(timeout=5)[0] == 5
+    assert last.result(timeout=5)[0] == 4
+    assert encoder.batches == [["first"], ["last"]]
+    batcher.close()
+
+
+def test_submit_after_close_fails():
+    batcher = MicroBatcher(RecordingEncoder())
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit("query")
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from application.services.near_duplicates import (  # noqa: E402
+    MinHasher,
+    NearDuplicateIndex,
+    estimate_jaccard,
+)
+
+
+def _words(prefix, count, start=0):
+    return " ".join(f"{prefix}{i}" for i in range(start, start + count))
+
+
+def test_signature_is_deterministic_and_case_insensitive():
+    text = _words("Word", 50)
+    a = MinHasher().signature(text)
+    b = MinHasher().signature(text.lower())
+
+    assert a.dtype == np.uint32 and a.shape == (128,)
+    np.testing.assert_array_equal(a, b)
+
+
+def test_signature_of_text_without_words_is_none():
+    assert MinHasher().signature("  ... ---  ") is None
+
+
+def test_estimate_tracks_shingle_overlap():
+    hasher = MinHasher()
+    base = hasher.signature(_words("w", 400))
+    near = hasher.signature(_words("w", 400) + " trailing footer")
+    far = hasher.signature(_words("w", 200) + " " + _words("x", 200))
+
+    assert estimate_jaccard(base, near) > 0.9
+    assert 0.3 < estimate_jaccard(base, far) < 0.7
+
+
+def test_index_finds_close_signature_but_not_itself():
+    hasher = MinHasher()
+    index = NearDuplicateIndex(threshold=0.9)
+    index.add("a", hasher.signature(_words("w", 400)))
+    index.add("b", hasher.signature(_words("z", 400)))
+
+    near = hasher.signature(_words("w", 400) + " footer")
+    assert index.find_duplicate("c", near) == "a"
+    assert index.find_duplicate("a", near) is None
+    assert index.find_duplicate("c", hasher.signature(_words("q", 400))) is None
+
+    index.remove("a")
+    assert index.find_duplicate("c", near) is None
+    assert len(index) == 1
+
+
+def test_index_rejects_bands_that_do_not_divide_signature():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(num_perm=128, bands=10)
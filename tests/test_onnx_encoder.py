@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import ONNX_MODEL_DIR  # noqa: E402
+from infrastructure.models.embedding_model import create_encoder  # noqa: E402
+from infrastructure.models.onnx_encoder import mean_pool_normalize, onnx_model_path  # noqa: E402
+
+PARITY_TEXTS = [
+    "How do I set a timeout on a Lambda function in CDK?",
+    "Vue components receive data from their parent through props.",
+    "asyncio.gather runs awaitables concurrently and collects their results.",
+    "TypeScript generics let a function work over many types while keeping type safety. " * 20,
+]
+
+
+def _real_sentence_transformers() -> bool:
+    """他のテストのスタブではなく、実際の sentence-transformers が使えるか"""
+    module = sys.modules.get("sentence_transformers")
+    if module is not None:
+        return getattr(module, "__file__", None) is not None
+    return importlib.util.find_spec("sentence_transformers") is not None
+
+
+def _onnx_available(quantized: bool) -> bool:
+    return (
+        importlib.util.find_spec("onnxruntime") is not None
+        and importlib.util.find_spec("tokenizers") is not None
+        and os.path.exists(onnx_model_path(ONNX_MODEL_DIR, quantized))
+    )
+
+
+def test_mean_pool_ignores_padding_and_normalizes():
+    tokens = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype="float32")
+    mask = np.array([[1, 1, 0]])
+
+    pooled = mean_pool_normalize(tokens, mask)
+
+    np.testing.assert_allclose(pooled, [[1.0, 0.0]])
+    assert pooled.dtype == np.float32
+
+
+def test_create_encoder_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_encoder("tensorflow")
+
+
+@pytest.mark.parametrize("quantized, min_cosine", [(False, 0.999), (True, 0.98)])
+def test_onnx_backend_matches_torch(quantized, min_cosine):
+    if not _real_sentence_transformers():
+        pytest.skip("sentence-transformers unavailable")
+    if not _onnx_available(quantized):
+        pytest.skip("onnxruntime/tokenizers or exported ONNX model unavailable")
+
+    torch_encoder, torch_id = create_encoder("torch")
+    onnx_encoder, onnx_id = create_encoder("onnx", quantized)
+
+    expected = torch_encoder.encode(PARITY_TEXTS)
+    actual = onnx_encoder.encode(PARITY_TEXTS, batch_size=2)
+
+    cosine = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    assert cosine.min() >= min_cosine
+    assert [onnx_encoder.count_tokens(t) for t in PARITY_TEXTS] == [
+        torch_encoder.count_tokens(t) for t in PARITY_TEXTS
+    ]
+    # int8 は結果が変わるため埋め込みキャッシュのキーを分ける
+    assert (onnx_id == torch_id) is (not quantized)
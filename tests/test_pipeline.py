@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from application.services import Pipeline  # noqa: E402
+
+
+def test_stages_stream_items_in_order():
+    pipeline = Pipeline()
+    numbers = pipeline.queue(2)
+    results = []
+
+    def produce(stats, output):
+        for i in range(50):
+            stats.items += 1
+            output.put(i, stats)
+        output.close(stats)
+
+    def consume(stats, source):
+        for item in source.iterate(stats):
+            stats.items += 1
+            results.append(item * 2)
+
+    pipeline.add_stage("produce", produce, numbers)
+    pipeline.add_stage("consume", consume, numbers)
+    stats = pipeline.run()
+
+    assert results == [i * 2 for i in range(50)]
+    assert [s.items for s in stats] == [50, 50]
+
+
+def test_bounded_queue_applies_backpressure():
+    pipeline = Pipeline()
+    numbers = pipeline.queue(3)
+    produced = []
+    max_ahead = []
+
+    def produce(_stats, output):
+        for i in range(20):
+            output.put(i)
+            produced.append(i)
+        output.close()
+
+    def consume(_stats, source):
+        for item in source.iterate():
+            # 消費済みの件数に対して、上流が先行できるのはキュー上限ぶん + 受け渡し中の1件まで
+            max_ahead.append(len(produced) - item)
+
+    pipeline.add_stage("produce", produce, numbers)
+    pipeline.add_stage("consume", consume, numbers)
+    pipeline.run()
+
+    assert max(max_ahead) <= 4
+
+
+def test_stage_error_stops_other_stages_and_is_reraised():
+    pipeline = Pipeline()
+    numbers = pipeline.queue(1)
+    produced = []
+
+    def produce(_stats, output):
+        for i in range(10_000):
+            output.put(i)
+            produced.append(i)
+        output.close()
+
+    def consume(_stats, source):
+        for item in source.iterate():
+            if item == 3:
+                raise RuntimeError("boom")
+
+    pipeline.add_stage("produce", produce, numbers)
+    pipeline.add_stage("consume", consume, numbers)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        pipeline.run()
+    assert len(produced) < 10_000
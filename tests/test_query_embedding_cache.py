@@ -0,0 +1,115 @@
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Preload lightweight stubs so the models package import succeeds without optional deps.
+if "sentence_transformers" not in sys.modules:
+    class FakeSentenceTransformer:
+        def __init__(self, *_args, **_kwargs):
+            pass
+
+        def encode(self, text, **_kwargs):  # pragma: no cover - stub behavior
+            return [0.0] * 384
+
+    sys.modules["sentence_transformers"] = types.SimpleNamespace(
+        SentenceTransformer=FakeSentenceTransformer
+    )
+
+from infrastructure.models import QueryEmbeddingCache  # noqa: E402
+from infrastructure.models import query_embedding_cache  # noqa: E402
+
+MODEL = "test-model"
+
+
+def _vector(value):
+    return np.full(4, value, dtype="float32")
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return _vector(len(text))
+
+
+def test_normalized_queries_share_an_entry():
+    cache = QueryEmbeddingCache(max_entries=8)
+    encoder = CountingEncoder()
+
+    first = cache.get_or_compute(MODEL, "Python  decorators", encoder)
+    second = cache.get_or_compute(MODEL, "  python decorators\n", encoder)
+
+    assert encoder.calls == ["Python  decorators"]
+    assert second is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_model_name_is_part_of_the_key():
+    cache = QueryEmbeddingCache(max_entries=8)
+    cache.put("model-a", "query", _vector(1))
+
+    assert cache.get("model-b", "query") is None
+    assert cache.get("model-a", "query")[0] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put(MODEL, "a", _vector(1))
+    cache.put(MODEL, "b", _vector(2))
+    cache.get(MODEL, "a")
+    cache.put(MODEL, "c", _vector(3))
+
+    assert cache.get(MODEL, "b") is None
+    assert cache.get(MODEL, "a") is not None
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_recomputed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_embedding_cache.time, "time", lambda: now[0])
+    cache = QueryEmbeddingCache(max_entries=8, ttl_seconds=60)
+    encoder = CountingEncoder()
+
+    cache.get_or_compute(MODEL, "q", encoder)
+    now[0] += 61
+    cache.get_or_compute(MODEL, "q", encoder)
+
+    assert encoder.calls == ["q", "q"]
+
+
+def test_cached_vectors_are_read_only():
+    cache = QueryEmbeddingCache(max_entries=8)
+    vector = cache.get_or_compute(MODEL, "q", CountingEncoder())
+
+    with pytest.raises(ValueError):
+        vector[0] = 42.0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "cache" / "queries.npz")
+    cache = QueryEmbeddingCache(max_entries=8, path=path)
+    cache.put(MODEL, "CDK Lambda function", _vector(7))
+    cache.save()
+
+    restored = QueryEmbeddingCache(max_entries=8, path=path)
+
+    assert restored.load() == 1
+    assert restored.get(MODEL, "cdk lambda function")[0] == 7
+
+
+def test_load_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "queries.npz"
+    path.write_bytes(b"not an npz")
+
+    assert QueryEmbeddingCache(path=str(path)).load() == 0
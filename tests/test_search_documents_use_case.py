@@ -0,0 +1,102 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from application.services import reciprocal_rank_fusion  # noqa: E402
+from application.use_cases import SearchDocumentsRequest, SearchDocumentsUseCase  # noqa: E402
+from domain.entities import Document  # noqa: E402
+
+
+def _doc(doc_id, text=None):
+    return Document(
+        id=doc_id, path=f"doc{doc_id}", url=f"https://example.com/{doc_id}",
+        text=text or f"passage {doc_id}", category="python"
+    )
+
+
+class FakeEmbeddingModel:
+    def encode(self, text):
+        return np.zeros(384, dtype="float32")
+
+
+class FakeRepository:
+    """ベクトル検索とキーワード検索が同時に実行されないと進まないリポジトリ"""
+
+    def __init__(self, vector_hits, text_hits, require_parallel=True):
+        self.vector_hits = vector_hits
+        self.text_hits = text_hits
+        self.require_parallel = require_parallel
+        self.vector_started = threading.Event()
+        self.text_started = threading.Event()
+        self.calls = []
+
+    def search_by_vector(self, vector, category=None, top_k=5):
+        self.calls.append(("vector", category, top_k))
+        self.vector_started.set()
+        if self.require_parallel:
+            assert self.text_started.wait(timeout=5), "text search did not run concurrently"
+        return self.vector_hits[:top_k]
+
+    def search_by_text(self, query, category=None, top_k=5):
+        self.calls.append(("text", category, top_k))
+        self.text_started.set()
+        if self.require_parallel:
+            assert self.vector_started.wait(timeout=5), "vector search did not run concurrently"
+        return self.text_hits[:top_k]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=60)
+
+    assert [key for key, _ in fused] == ["a", "c", "b", "d"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 63)
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_reciprocal_rank_fusion_weights():
+    fused = reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 2.0])
+
+    assert [key for key, _ in fused] == ["b", "a"]
+
+
+def test_hybrid_search_runs_both_retrievals_in_parallel_and_fuses():
+    repository = FakeRepository(
+        vector_hits=[(_doc(1), 0.1), (_doc(2), 0.2), (_doc(3), 0.3)],
+        text_hits=[(_doc(4, "defineComponent() API"), -9.0), (_doc(2, "keyword passage"), -5.0)],
+    )
+    use_case = SearchDocumentsUseCase(repository, FakeEmbeddingModel())
+
+    response = use_case.execute(
+        SearchDocumentsRequest(query="defineComponent", category="vue", top_k=3, hybrid=True)
+    )
+
+    # doc2 は両方に現れるため最上位。同じ順位どうしはベクトル検索を先にする
+    assert [r.path for r in response.results] == ["doc2", "doc1", "doc4"]
+    assert response.results[0].score == pytest.approx(1 / 62 + 1 / 62)
+    # 同じドキュメントは、より上位に現れた検索のパッセージを返す（同順位ならベクトル検索）
+    assert response.results[0].text == "passage 2"
+    assert response.total_results == 3
+    assert response.score_type == "rrf"
+    assert sorted(repository.calls) == [("text", "vue", 12), ("vector", "vue", 12)]
+
+
+def test_vector_only_search_does_not_use_text_index():
+    repository = FakeRepository(
+        vector_hits=[(_doc(1), 0.1)], text_hits=[(_doc(2), -1.0)], require_parallel=False
+    )
+    use_case = SearchDocumentsUseCase(repository, FakeEmbeddingModel())
+
+    response = use_case.execute(SearchDocumentsRequest(query="q", top_k=5))
+
+    assert [(r.path, r.score) for r in response.results] == [("doc1", 0.1)]
+    assert response.score_type == "distance"
+    assert repository.calls == [("vector", None, 5)]
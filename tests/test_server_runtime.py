@@ -0,0 +1,165 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from server_runtime import SearchExecutor, SearchRuntime, SearchTimeoutError, format_score  # noqa: E402
+
+
+class BlockingLoader:
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.calls = []
+        self.error = error
+
+    def __call__(self, db_path):
+        self.calls.append(db_path)
+        self.release.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return "use-case", "model"
+
+
+def test_start_loads_once_in_background():
+    loader = BlockingLoader()
+    runtime = SearchRuntime("docs.db", loader=loader)
+
+    runtime.start()
+    runtime.start()
+    assert not runtime.ready
+    assert runtime.embedding_model is None
+
+    loader.release.set()
+    assert runtime.get(timeout=5) == "use-case"
+    assert runtime.embedding_model == "model"
+    assert loader.calls == ["docs.db"]
+
+
+def test_get_async_waits_without_blocking_the_loop():
+    loader = BlockingLoader()
+    runtime = SearchRuntime("docs.db", loader=loader)
+
+    async def run():
+        waiter = asyncio.ensure_future(runtime.get_async())
+        await asyncio.sleep(0.01)
+        # 読み込み中もイベントループは他の処理を進められる
+        assert not waiter.done()
+        loader.release.set()
+        return await asyncio.wait_for(waiter, timeout=5)
+
+    assert asyncio.run(run()) == "use-case"
+
+
+def test_cancelled_waiter_does_not_cancel_loading():
+    loader = BlockingLoader()
+    runtime = SearchRuntime("docs.db", loader=loader)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(runtime.get_async(), timeout=0.01)
+
+    asyncio.run(run())
+    loader.release.set()
+    assert runtime.get(timeout=5) == "use-case"
+
+
+def test_load_errors_are_raised_to_every_search():
+    loader = BlockingLoader(error=RuntimeError("no model"))
+    loader.release.set()
+    runtime = SearchRuntime("docs.db", loader=loader)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="no model"):
+            runtime.get(timeout=5)
+    assert runtime.ready
+    assert runtime.embedding_model is None
+
+
+def test_search_executor_keeps_event_loop_responsive():
+    release = threading.Event()
+    executor = SearchExecutor(max_workers=2, timeout_seconds=5)
+
+    async def run():
+        search = asyncio.ensure_future(executor.run(release.wait, 5))
+        # 検索の実行中も他のコルーチン（list_tools など）が進む
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.001)
+            ticks += 1
+        assert not search.done()
+        release.set()
+        return ticks, await search
+
+    assert asyncio.run(run()) == (5, True)
+    executor.shutdown()
+
+
+def test_search_executor_limits_concurrency_and_cancels_queued_work():
+    release = threading.Event()
+    started = []
+    executor = SearchExecutor(max_workers=1, timeout_seconds=0.05)
+
+    def work(name):
+        started.append(name)
+        release.wait(timeout=5)
+        return name
+
+    async def run():
+        running = asyncio.ensure_future(executor.run(work, "running"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(SearchTimeoutError):
+            # 空きがないまま時間切れになった検索は実行されない
+            await executor.run(work, "queued")
+
+    asyncio.run(run())
+    release.set()
+    executor.shutdown()
+    assert started == ["running"]
+
+
+def test_search_deadline_includes_waiting_for_the_runtime():
+    loader = BlockingLoader()
+    runtime = SearchRuntime("docs.db", loader=loader)
+    executor = SearchExecutor(max_workers=1, timeout_seconds=0.05)
+
+    async def search():
+        use_case = await runtime.get_async()
+        return await executor.submit(str.upper, use_case)
+
+    async def run():
+        # モデルの読み込みが終わらなくても制限時間で打ち切る
+        with pytest.raises(SearchTimeoutError):
+            await executor.within_deadline(search())
+        loader.release.set()
+        return await executor.within_deadline(search())
+
+    assert asyncio.run(run()) == "USE-CASE"
+    executor.shutdown()
+
+
+def test_search_executor_does_not_relabel_timeouts_raised_by_the_search():
+    executor = SearchExecutor(max_workers=1, timeout_seconds=5)
+
+    def work():
+        raise TimeoutError("database is locked")
+
+    async def run():
+        await executor.run(work)
+
+    with pytest.raises(TimeoutError, match="database is locked") as excinfo:
+        asyncio.run(run())
+    assert not isinstance(excinfo.value, SearchTimeoutError)
+    executor.shutdown()
+
+
+def test_format_score_names_the_score_type_and_its_direction():
+    assert format_score("rrf", 0.0325) == "RRF score: 0.0325, higher is better"
+    assert format_score("distance", 0.21) == "Distance: 0.2100, lower is better"
@@ -0,0 +1,480 @@
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from domain.entities import Chunk, Document, FileManifestEntry  # noqa: E402
+from infrastructure.persistence import SQLiteDocumentRepository  # noqa: E402
+
+
+def _vec_available() -> bool:
+    """sqlite-vec 拡張をロードできる環境かどうか"""
+    try:
+        import sqlite_vec
+
+        conn = sqlite3.connect(":memory:")
+        conn.enable_load_extension(True)
+        sqlite_vec.load(conn)
+        conn.close()
+        return True
+    except Exception:
+        return False
+
+
+requires_vec = pytest.mark.skipif(not _vec_available(), reason="sqlite-vec unavailable")
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return SQLiteDocumentRepository(str(tmp_path / "techdocs.db"))
+
+
+def _doc(path, text="body", category="python"):
+    return Document(path=path, url=f"https://example.com/{path}", text=text, category=category)
+
+
+def _index(repository, docs, vectors):
+    """1ドキュメント1チャンクで保存し、埋め込みを登録する"""
+    chunks = repository.replace_chunks_many(
+        [Chunk(document_id=d.id, chunk_index=0, text=d.text) for d in docs]
+    )
+    repository.save_embeddings_many([c.id for c in chunks], vectors)
+    return chunks
+
+
+def test_embedding_migration_errors_are_not_swallowed(tmp_path, monkeypatch):
+    def broken_migration(self, conn):
+        raise ValueError("broken migration")
+
+    monkeypatch.setattr(SQLiteDocumentRepository, "_migrate_doc_embeddings", broken_migration)
+
+    with pytest.raises(ValueError, match="broken migration"):
+        SQLiteDocumentRepository(str(tmp_path / "techdocs.db"))
+
+
+def test_save_many_assigns_ids_in_input_order(repository):
+    saved = repository.save_many([_doc("b"), _doc("a"), _doc("c")])
+
+    assert [d.path for d in saved] == ["b", "a", "c"]
+    for document in saved:
+        assert repository.find_by_id(document.id).path == document.path
+
+
+def test_save_many_updates_existing_rows(repository):
+    first = repository.save_many([_doc("a", text="old")])[0]
+
+    second = repository.save_many([_doc("a", text="new", category="vue")])[0]
+
+    assert second.id == first.id
+    stored = repository.find_by_path("a")
+    assert (stored.text, stored.category) == ("new", "vue")
+
+
+@requires_vec
+def test_save_embeddings_many_replaces_vectors(repository):
+    docs = repository.save_many([_doc("a"), _doc("b")])
+    vectors = np.eye(2, 384, dtype="float32")
+
+    chunks = _index(repository, docs, vectors)
+    repository.save_embeddings_many([c.id for c in chunks], vectors[::-1])
+
+    results = repository.search_by_vector(vectors[0], top_k=2)
+    assert [doc.path for doc, _ in results] == ["b", "a"]
+
+
+def test_save_embeddings_many_rejects_length_mismatch(repository):
+    with pytest.raises(ValueError):
+        repository.save_embeddings_many([1, 2], np.zeros((1, 384), dtype="float32"))
+
+
+def test_connection_is_reused_within_thread(repository):
+    assert repository._get_connection() is repository._get_connection()
+
+
+def test_executor_threads_use_separate_connections(repository):
+    repository.save_many([_doc(f"p{i}") for i in range(20)])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        found = list(executor.map(lambda i: repository.find_by_path(f"p{i}").path, range(20)))
+        thread_conns = set(executor.map(lambda _: id(repository._get_connection()), range(8)))
+
+    assert found == [f"p{i}" for i in range(20)]
+    assert id(repository._get_connection()) not in thread_conns
+
+
+def test_connections_of_finished_threads_are_closed(repository):
+    opened = []
+    for _ in range(3):
+        worker = threading.Thread(target=lambda: opened.append(repository._get_connection()))
+        worker.start()
+        worker.join()
+
+    # 新しい接続を開くときに、終了したスレッドの接続を閉じて手放す
+    for conn in opened[:-1]:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert len(repository._connections) == 2
+    repository._get_connection().execute("SELECT 1")
+
+
+def test_close_invalidates_connections_and_reopens_lazily(tmp_path):
+    with SQLiteDocumentRepository(str(tmp_path / "techdocs.db")) as repo:
+        repo.save_many([_doc("a")])
+        old_conn = repo._get_connection()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_conn.execute("SELECT 1")
+    assert repo.find_by_path("a").path == "a"
+    repo.close()
+
+
+@requires_vec
+def test_search_by_vector_filters_category_inside_knn(repository):
+    docs = repository.save_many(
+        [_doc("py1", category="python"), _doc("vue1", category="vue"), _doc("py2", category="python")]
+    )
+    vectors = np.zeros((3, 384), dtype="float32")
+    vectors[:, 0] = 1.0
+    vectors[:, 1] = [0.0, 0.05, 0.5]
+    _index(repository, docs, vectors)
+
+    results = repository.search_by_vector(np.eye(1, 384, dtype="float32")[0], category="python", top_k=5)
+
+    assert [doc.path for doc, _ in results] == ["py1", "py2"]
+    assert results[0][1] == pytest.approx(0.0)
+
+
+@requires_vec
+def test_legacy_embeddings_table_is_migrated_to_partitions(tmp_path):
+    import sqlite_vec
+
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.enable_load_extension(True)
+    sqlite_vec.load(conn)
+    conn.execute(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE, "
+        "url TEXT, text TEXT, category TEXT)"
+    )
+    conn.execute("CREATE VIRTUAL TABLE doc_embeddings USING vec0(embedding FLOAT[384])")
+    for doc_id, category in [(1, "python"), (2, "vue")]:
+        conn.execute(
+            "INSERT INTO documents (id, path, url, text, category) VALUES (?, ?, '', 'body', ?)",
+            (doc_id, f"doc{doc_id}", category),
+        )
+        conn.execute(
+            "INSERT INTO doc_embeddings (rowid, embedding) VALUES (?, ?)",
+            (doc_id, np.full(384, doc_id, dtype="float32").tobytes()),
+        )
+    conn.commit()
+    conn.close()
+
+    repo = SQLiteDocumentRepository(db_path)
+    results = repo.search_by_vector(np.full(384, 1, dtype="float32"), category="vue", top_k=5)
+    repo.close()
+
+    assert [doc.path for doc, _ in results] == ["doc2"]
+
+    repo = SQLiteDocumentRepository(db_path)
+    assert repo.find_by_id(1).text == "body"
+    repo.close()
+
+
+@requires_vec
+def test_search_returns_best_passage_once_per_document(repository):
+    docs = repository.save_many([_doc("a"), _doc("b")])
+    chunks = repository.replace_chunks_many(
+        [
+            Chunk(document_id=docs[0].id, chunk_index=0, text="a-intro"),
+            Chunk(document_id=docs[0].id, chunk_index=1, text="a-detail"),
+            Chunk(document_id=docs[1].id, chunk_index=0, text="b-intro"),
+        ]
+    )
+    vectors = np.zeros((3, 384), dtype="float32")
+    vectors[:, 0] = 1.0
+    vectors[:, 1] = [0.5, 0.1, 0.3]
+    repository.save_embeddings_many([c.id for c in chunks], vectors)
+
+    results = repository.search_by_vector(np.eye(1, 384, dtype="float32")[0], top_k=5)
+
+    assert [(doc.path, doc.text) for doc, _ in results] == [("a", "a-detail"), ("b", "b-intro")]
+
+
+@requires_vec
+def test_replace_chunks_and_delete_remove_old_vectors(repository):
+    doc = repository.save_many([_doc("a")])[0]
+    _index(repository, [doc], np.ones((1, 384), dtype="float32"))
+    repository.replace_chunks_many([Chunk(document_id=doc.id, chunk_index=0, text="new")])
+
+    assert repository.search_by_vector(np.ones(384, dtype="float32")) == []
+
+    assert repository.delete_by_id(doc.id) is True
+    assert repository.find_by_id(doc.id) is None
+
+
+@requires_vec
+def test_save_indexed_documents_writes_documents_chunks_and_embeddings(repository):
+    vectors = np.eye(3, 384, dtype="float32")
+    docs = repository.save_indexed_documents(
+        [_doc("a"), _doc("b")], [(0, 0, "a0"), (0, 1, "a1"), (1, 0, "b0")], vectors
+    )
+
+    hits = repository.search_by_vector(vectors[2], top_k=1)
+    assert hits[0][0].id == docs[1].id
+    assert hits[0][0].path == "b"
+
+
+@requires_vec
+def test_changed_canonical_releases_its_aliases(repository):
+    vector = np.eye(1, 384, dtype="float32")
+    repository.save_indexed_documents([_doc("a", text="same")], [(0, 0, "same")], vector)
+    repository.save_aliases({"b": "a"})
+    repository.save_manifest_entries([
+        FileManifestEntry(path="b", size=1, mtime_ns=1, content_hash="h", doc_id=None)
+    ])
+
+    # 本文が同じなら別名の判定はそのまま
+    repository.save_indexed_documents([_doc("a", text="same")], [(0, 0, "same")], vector)
+    assert repository.get_aliases() == {"b": "a"}
+
+    repository.save_indexed_documents([_doc("a", text="changed")], [(0, 0, "changed")], vector)
+    assert repository.get_aliases() == {}
+    assert "b" not in repository.get_manifest()
+
+
+@requires_vec
+def test_has_embeddings_requires_stored_vectors(repository):
+    indexed, chunked_only, bare = repository.save_many([_doc("a"), _doc("b"), _doc("c")])
+    _index(repository, [indexed], np.eye(1, 384, dtype="float32"))
+    repository.replace_chunks_many([Chunk(document_id=chunked_only.id, chunk_index=0, text="b")])
+
+    assert repository.has_embeddings(indexed.id)
+    assert not repository.has_embeddings(chunked_only.id)
+    assert not repository.has_embeddings(bare.id)
+
+
+@requires_vec
+def test_save_indexed_documents_is_one_transaction(repository):
+    old = repository.save_indexed_documents([_doc("a", text="old")], [(0, 0, "old")], np.eye(1, 384))[0]
+
+    # 埋め込みの次元が合わず挿入に失敗すると、ドキュメントとチャンクも更新されない
+    with pytest.raises(Exception):
+        repository.save_indexed_documents(
+            [_doc("a", text="new"), _doc("b")], [(0, 0, "new"), (1, 0, "b0")],
+            np.ones((2, 10), dtype="float32"),
+        )
+
+    assert repository.find_by_path("a").text == "old"
+    assert repository.find_by_path("b") is None
+    assert repository.search_by_vector(np.eye(1, 384)[0], top_k=1)[0][0].id == old.id
+
+
+def test_embedding_cache_round_trip(repository):
+    vectors = np.arange(6, dtype="float32").reshape(2, 3)
+    repository.save_cached_embeddings(["k1", "k2"], vectors)
+
+    found = repository.get_cached_embeddings(["k2", "missing", "k1", "k2"])
+
+    assert sorted(found) == ["k1", "k2"]
+    np.testing.assert_array_equal(found["k2"], vectors[1])
+
+
+@requires_vec
+def test_signatures_and_aliases_follow_canonical_document(repository):
+    doc = repository.save_many([_doc("a")])[0]
+    signature = np.arange(128, dtype=np.uint32)
+    repository.save_signatures({"a": signature, "b": signature + 1})
+    repository.save_aliases({"b": "a"})
+    repository.save_manifest_entries([
+        FileManifestEntry(path="b", size=1, mtime_ns=1, content_hash="h", doc_id=None)
+    ])
+
+    found = repository.get_signatures()
+    assert sorted(found) == ["a"]
+    np.testing.assert_array_equal(found["a"], signature)
+    assert sorted(repository.get_signatures("python")) == ["a"]
+    assert repository.get_signatures("cdk") == {}
+
+    # 正規ドキュメントを削除すると、別名だったページは次回再処理される
+    repository.delete_by_id(doc.id)
+    assert repository.get_signatures() == {}
+    assert "b" not in repository.get_manifest()
+
+
+def _unit_vectors(count, seed=0):
+    vectors = np.random.RandomState(seed).randn(count, 384).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@requires_vec
+@pytest.mark.parametrize("storage", ["int8", "bit"])
+def test_quantized_storage_rescores_with_full_precision(tmp_path, storage):
+    vectors = _unit_vectors(40)
+    query = vectors[7] + 0.1 * _unit_vectors(1, seed=1)[0]
+
+    exact = SQLiteDocumentRepository(str(tmp_path / "float.db"))
+    _index(exact, exact.save_many([_doc(f"d{i}") for i in range(40)]), vectors)
+    quantized = SQLiteDocumentRepository(str(tmp_path / f"{storage}.db"), vector_storage=storage)
+    _index(quantized, quantized.save_many([_doc(f"d{i}") for i in range(40)]), vectors)
+
+    expected = exact.search_by_vector(query, top_k=5)
+    actual = quantized.search_by_vector(query, top_k=5)
+
+    assert quantized.vector_storage == storage
+    assert [d.path for d, _ in actual] == [d.path for d, _ in expected]
+    # 距離は float16 のベクトルで計算し直したコサイン距離
+    np.testing.assert_allclose([s for _, s in actual], [s for _, s in expected], atol=1e-2)
+    assert quantized.search_by_vector(query, category="vue") == []
+    exact.close()
+    quantized.close()
+
+
+@requires_vec
+def test_vector_storage_is_converted_without_reencoding(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    vectors = _unit_vectors(20)
+    with SQLiteDocumentRepository(db_path) as repo:
+        chunks = _index(repo, repo.save_many([_doc(f"d{i}") for i in range(20)]), vectors)
+        expected = repo.search_by_vector(vectors[3], top_k=3)
+        revision = repo.get_embeddings_revision()
+
+    with SQLiteDocumentRepository(db_path, vector_storage="bit") as repo:
+        assert [d.path for d, _ in repo.search_by_vector(vectors[3], top_k=3)] == \
+            [d.path for d, _ in expected]
+        assert repo.get_embeddings_revision() > revision
+        # 変換後も書き出し用のスナップショットは全精度に近いベクトルを返す
+        with repo.embeddings_snapshot() as (_, count, rows):
+            snapshot = {chunk_id: vector for chunk_id, _, vector in rows}
+        assert count == 20
+        np.testing.assert_allclose(snapshot[chunks[3].id], vectors[3], atol=1e-3)
+
+    # 形式を指定しなければ DB の形式のまま開く
+    with SQLiteDocumentRepository(db_path) as repo:
+        assert repo.vector_storage == "bit"
+        repo.delete_by_id(chunks[3].document_id)
+        assert [d.path for d, _ in repo.search_by_vector(vectors[3], top_k=1)] != ["d3"]
+
+    with SQLiteDocumentRepository(db_path, vector_storage="int8") as repo:
+        results = repo.search_by_vector(vectors[4], top_k=1)
+        assert [d.path for d, _ in results] == ["d4"]
+        assert results[0][1] == pytest.approx(0.0, abs=1e-2)
+
+
+def test_unknown_vector_storage_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteDocumentRepository(str(tmp_path / "techdocs.db"), vector_storage="float64")
+
+
+@requires_vec
+def test_scores_are_cosine_distances_of_normalized_vectors(repository):
+    docs = repository.save_many([_doc("a"), _doc("b")])
+    vectors = np.zeros((2, 384), dtype="float32")
+    vectors[0, :2] = [3.0, 4.0]
+    vectors[1, :2] = [-2.0, 0.0]
+    _index(repository, docs, vectors)
+
+    results = repository.search_by_vector(np.eye(1, 384, dtype="float32")[0] * 10, top_k=2)
+
+    assert repository.embeddings_normalized is True
+    assert repository.score_metric == "cosine"
+    assert [doc.path for doc, _ in results] == ["a", "b"]
+    np.testing.assert_allclose([s for _, s in results], [1 - 0.6, 2.0], atol=1e-5)
+
+
+@requires_vec
+def test_existing_unnormalized_embeddings_are_migrated(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    vectors = _unit_vectors(10) * np.arange(1, 11, dtype="float32")[:, None]
+    with SQLiteDocumentRepository(db_path) as repo:
+        chunks = _index(repo, repo.save_many([_doc(f"d{i}") for i in range(10)]), vectors)
+        repo.save_cached_embeddings(["k"], vectors[:1])
+        # 正規化していなかった頃の DB を再現する
+        conn = repo._get_connection()
+        conn.execute("DELETE FROM metadata WHERE key = 'embeddings_normalized'")
+        conn.execute("UPDATE embedding_cache SET embedding = ?", (vectors[0].tobytes(),))
+        conn.executemany(
+            "UPDATE doc_embeddings SET embedding = ? WHERE rowid = ?",
+            [(vector.tobytes(), chunk.id) for chunk, vector in zip(chunks, vectors)],
+        )
+        conn.commit()
+        revision = repo.get_embeddings_revision()
+
+    with SQLiteDocumentRepository(db_path) as repo:
+        assert repo.embeddings_normalized is True
+        assert repo.get_embeddings_revision() > revision
+        with repo.embeddings_snapshot() as (_, count, rows):
+            snapshot = {chunk_id: vector for chunk_id, _, vector in rows}
+        assert count == 10
+        for chunk, vector in zip(chunks, vectors):
+            np.testing.assert_allclose(snapshot[chunk.id], vector / np.linalg.norm(vector), atol=1e-6)
+        np.testing.assert_allclose(np.linalg.norm(repo.get_cached_embeddings(["k"])["k"]), 1.0, atol=1e-6)
+        (top, score), = repo.search_by_vector(vectors[9], top_k=1)
+        assert top.path == "d9"
+        assert score == pytest.approx(0.0, abs=1e-5)
+
+
+def _chunk_texts(repository, doc, texts):
+    return repository.replace_chunks_many([
+        Chunk(document_id=doc.id, chunk_index=i, text=text) for i, text in enumerate(texts)
+    ])
+
+
+def test_search_by_text_matches_api_names_with_bm25(repository):
+    cdk, vue, other = repository.save_many(
+        [_doc("cdk", category="cdk"), _doc("vue", category="vue"), _doc("other", category="vue")]
+    )
+    _chunk_texts(repository, cdk, [
+        "Stacks and constructs overview",
+        "Use aws_lambda.Function to define a Lambda function in your stack",
+    ])
+    _chunk_texts(repository, vue, ["defineComponent() gives type inference to component options"])
+    _chunk_texts(repository, other, ["A component can define props"])
+
+    results = repository.search_by_text("aws_lambda.Function")
+    assert [(doc.path, doc.text) for doc, _ in results] == [
+        ("cdk", "Use aws_lambda.Function to define a Lambda function in your stack")
+    ]
+    assert results[0][1] < 0  # bm25() は小さいほどよく一致する
+
+    assert [doc.path for doc, _ in repository.search_by_text("defineComponent")] == ["vue"]
+    assert sorted(doc.path for doc, _ in repository.search_by_text("component", category="vue")) == \
+        ["other", "vue"]
+    assert repository.search_by_text("defineComponent", category="cdk") == []
+    assert repository.search_by_text('"" ...') == []
+
+
+@requires_vec
+def test_text_index_follows_chunk_replacement_and_deletion(repository):
+    doc = repository.save_many([_doc("a")])[0]
+    _chunk_texts(repository, doc, ["old passage about asyncio.gather"])
+    _chunk_texts(repository, doc, ["new passage about asyncio.TaskGroup"])
+
+    assert repository.search_by_text("asyncio.gather") == []
+    assert [doc.text for doc, _ in repository.search_by_text("TaskGroup")] == \
+        ["new passage about asyncio.TaskGroup"]
+
+    repository.delete_by_id(doc.id)
+    assert repository.search_by_text("TaskGroup") == []
+
+
+def test_text_index_is_built_for_existing_chunks(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    with SQLiteDocumentRepository(db_path) as repo:
+        doc = repo.save_many([_doc("a")])[0]
+        _chunk_texts(repo, doc, ["functools.lru_cache decorator"])
+        conn = repo._get_connection()
+        conn.execute("DROP TABLE chunks_fts")
+        conn.commit()
+
+    with SQLiteDocumentRepository(db_path) as repo:
+        assert [d.path for d, _ in repo.search_by_text("lru_cache")] == ["a"]
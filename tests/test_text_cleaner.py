@@ -0,0 +1,101 @@
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS  # noqa: E402
+from utils.text_cleaner import CONTRIBUTOR_PATTERNS, CSS_NOISE_PATTERNS, TextCleaner  # noqa: E402
+
+
+def _legacy_clean_text(text):
+    """TextCleaner 導入前の clean_text（出力一致の基準）"""
+    for pattern in CSS_NOISE_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    for pattern in NOISE_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    if PER_LINE_NOISE_PATTERNS:
+        compiled = [re.compile(p, re.IGNORECASE) for p in PER_LINE_NOISE_PATTERNS]
+        text = '\n'.join(
+            line for line in text.split('\n')
+            if not any(rx.search(line.strip()) for rx in compiled)
+        )
+    for pattern in CONTRIBUTOR_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.MULTILINE | re.DOTALL)
+    deduped_lines = []
+    prev_line = None
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            deduped_lines.append(line)
+            prev_line = None
+        elif stripped != prev_line:
+            deduped_lines.append(line)
+            prev_line = stripped
+    text = '\n'.join(deduped_lines)
+    text = re.sub(r'([a-z])\n([a-z]{1,3}\b)', r'\1\2', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r'([.!?])\s+([A-Z])', r'\1\n\2', text)
+    text = re.sub(r'\n\s*\n(\s*\n)+', '\n\n', text)
+    text = re.sub(r'[ \t]+$', '', text, flags=re.MULTILINE)
+    return text.strip()
+
+
+# 一致・境界条件を起こしやすい断片
+FRAGMENTS = [
+    "Saga pattern", "Saga pattern", "The quick brown fox.", "Next step", "example", "ve",
+    "Feed", "back", "Feedback", "FEEDBACK", "On this page", "Try", "  Copy  ", "Footnotes",
+    "Contributors:", "Contributors: alice", "Authors:", "written by bob", "Reviewed by carol",
+    "Maintainer:", "font-size: 12px;", "color: #fff", "Arial", "Ari", "al", "rgba(0,0,0,.5)",
+    "10px", "2em", "50%", "=====", "-----", "--", "Skip to main", "Jump to", "Back to top",
+    "Edit on GitHub", "Ctrl k", "README", "ſkip to", "İnspect", "ırregular", "Kelvin",
+    "Wrıtten by dave", "Contributorſ:", "日本語のテキスト", "\t", " ", "", "!", "?", "a", "B",
+]
+
+
+def _random_document(rng):
+    parts = []
+    for _ in range(rng.randint(1, 60)):
+        parts.append(rng.choice(FRAGMENTS))
+        parts.append(rng.choice(["\n", "\n", "\n\n", " ", "", "\t", "\n \n\n"]))
+    return "".join(parts)
+
+
+@pytest.fixture(scope="module")
+def cleaner():
+    return TextCleaner(NOISE_PATTERNS, PER_LINE_NOISE_PATTERNS)
+
+
+def test_matches_legacy_output_on_random_documents(cleaner):
+    rng = random.Random(1234)
+    for _ in range(1000):
+        text = _random_document(rng)
+        assert cleaner.clean(text) == _legacy_clean_text(text), repr(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Intro\nContributors:\nalice\nbob\n\nBody text",
+        "FeedArialback remains joined",
+        "Title\nTitle\nTry\nTitle\nbody",
+        "ſkip to content\nSkip to content\nDone.",
+        "WRİTTEN BY someone\nNext",
+        "",
+    ],
+)
+def test_matches_legacy_output_on_edge_cases(cleaner, text):
+    assert cleaner.clean(text) == _legacy_clean_text(text)
+
+
+def test_noise_is_removed(cleaner):
+    text = "Saga pattern\nSaga pattern\nOn this page\nUse compensating actions. Was this page helpful?"
+
+    assert cleaner.clean(text) == "Saga pattern\n\nUse compensating actions."
@@ -0,0 +1,279 @@
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Ensure src/ is importable when running from project root
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from domain.entities import Chunk, Document  # noqa: E402
+from infrastructure.persistence import (  # noqa: E402
+    HnswVectorIndex,
+    NumpyVectorIndex,
+    SQLiteDocumentRepository,
+    export_vector_index,
+    load_vector_index,
+    vector_index_dir,
+)
+from infrastructure.persistence.vector_index import (  # noqa: E402
+    export_hnsw_index,
+    export_numpy_index,
+)
+from test_sqlite_document_repository import requires_vec  # noqa: E402
+
+try:
+    import hnswlib  # noqa: F401
+    HAS_HNSWLIB = True
+except ImportError:
+    HAS_HNSWLIB = False
+
+requires_hnswlib = pytest.mark.skipif(not HAS_HNSWLIB, reason="hnswlib is not installed")
+
+
+class SnapshotRepository:
+    """embeddings_snapshot だけを持つリポジトリ"""
+
+    embeddings_normalized = False
+
+    def __init__(self, rows, revision=1):
+        self.rows = rows
+        self.revision = revision
+        self.snapshots = 0
+
+    @contextmanager
+    def embeddings_snapshot(self):
+        self.snapshots += 1
+        ordered = sorted(self.rows, key=lambda row: (row[1], row[0]))
+        yield self.revision, len(ordered), iter(ordered)
+
+
+def _random_rows(count=300, dim=16, seed=0):
+    rng = np.random.RandomState(seed)
+    categories = ["python", "vue", "cdk"]
+    return [
+        (chunk_id, categories[chunk_id % 3], rng.randn(dim).astype("float32"))
+        for chunk_id in range(1, count + 1)
+    ]
+
+
+def _brute_force(rows, query, category, k):
+    scored = [
+        (chunk_id, float(np.linalg.norm(vector - query)))
+        for chunk_id, row_category, vector in rows
+        if not category or row_category == category
+    ]
+    return sorted(scored, key=lambda item: item[1])[:k]
+
+
+@pytest.mark.parametrize("category", [None, "vue", "missing"])
+def test_numpy_index_matches_brute_force(tmp_path, category):
+    rows = _random_rows()
+    export_numpy_index(SnapshotRepository(rows), str(tmp_path / "index"))
+    index = NumpyVectorIndex(str(tmp_path / "index"))
+    query = np.random.RandomState(1).randn(16).astype("float32")
+
+    hits = index.search(query, category, 10)
+    expected = _brute_force(rows, query, category, 10)
+
+    assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in expected]
+    np.testing.assert_allclose(
+        [d for _, d in hits], [d for _, d in expected], rtol=1e-4, atol=1e-4
+    )
+    assert len(index) == len(rows)
+    assert index.revision == 1
+
+
+def test_numpy_index_scores_normalized_rows_by_cosine_distance(tmp_path):
+    rows = [
+        (chunk_id, category, vector / np.linalg.norm(vector))
+        for chunk_id, category, vector in _random_rows()
+    ]
+    repository = SnapshotRepository(rows)
+    repository.embeddings_normalized = True
+    export_numpy_index(repository, str(tmp_path / "index"))
+    index = NumpyVectorIndex(str(tmp_path / "index"))
+    query = np.random.RandomState(1).randn(16).astype("float32")
+    query /= np.linalg.norm(query)
+
+    hits = index.search(query, None, 5)
+
+    assert index.metric == "cosine"
+    expected = sorted(((chunk_id, 1 - float(vector @ query)) for chunk_id, _, vector in rows),
+                      key=lambda item: item[1])[:5]
+    assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in expected]
+    np.testing.assert_allclose([d for _, d in hits], [d for _, d in expected], atol=1e-5)
+
+
+def test_export_skips_when_revision_is_unchanged(tmp_path):
+    repository = SnapshotRepository(_random_rows(count=10))
+    directory = str(tmp_path / "index")
+
+    assert export_numpy_index(repository, directory)["count"] == 10
+    assert export_numpy_index(repository, directory) is None
+
+    repository.revision = 2
+    repository.rows = repository.rows[:4]
+    assert export_numpy_index(repository, directory)["count"] == 4
+    assert len(NumpyVectorIndex(directory)) == 4
+
+
+def test_load_vector_index_without_export_falls_back(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    assert load_vector_index("sqlite", db_path) is None
+    assert load_vector_index("numpy", db_path) is None
+    with pytest.raises(ValueError):
+        load_vector_index("faiss", db_path)
+
+
+@requires_hnswlib
+@pytest.mark.parametrize("category", [None, "vue", "missing"])
+def test_hnsw_index_with_large_ef_matches_brute_force(tmp_path, category):
+    rows = _random_rows()
+    meta = export_hnsw_index(SnapshotRepository(rows), str(tmp_path / "index"), batch_size=64)
+    index = HnswVectorIndex(str(tmp_path / "index"), ef_search=400)
+    query = np.random.RandomState(1).randn(16).astype("float32")
+
+    hits = index.search(query, category, 10)
+    expected = _brute_force(rows, query, category, 10)
+
+    assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in expected]
+    np.testing.assert_allclose(
+        [d for _, d in hits], [d for _, d in expected], rtol=1e-4, atol=1e-4
+    )
+    assert sorted(meta["categories"]) == ["cdk", "python", "vue"]
+    assert len(index) == len(rows)
+
+
+@requires_hnswlib
+def test_hnsw_recall_at_default_ef(tmp_path):
+    rows = _random_rows(count=2000)
+    export_hnsw_index(SnapshotRepository(rows), str(tmp_path / "index"))
+    index = HnswVectorIndex(str(tmp_path / "index"))
+    rng = np.random.RandomState(2)
+
+    recalls = []
+    for _ in range(20):
+        query = rng.randn(16).astype("float32")
+        expected = {chunk_id for chunk_id, _ in _brute_force(rows, query, None, 10)}
+        actual = {chunk_id for chunk_id, _ in index.search(query, None, 10)}
+        recalls.append(len(expected & actual) / 10)
+    assert np.mean(recalls) >= 0.95
+
+
+@requires_hnswlib
+def test_hnsw_export_rebuilds_when_parameters_change(tmp_path):
+    repository = SnapshotRepository(_random_rows(count=50))
+    directory = str(tmp_path / "index")
+
+    assert export_hnsw_index(repository, directory, m=8)["m"] == 8
+    assert export_hnsw_index(repository, directory, m=8) is None
+    assert export_hnsw_index(repository, directory, m=12)["m"] == 12
+    assert HnswVectorIndex(directory).m == 12
+    # 別エンジンの索引は読み込まない
+    export_numpy_index(repository, directory, force=True)
+    assert load_vector_index("hnsw", str(tmp_path / "techdocs.db")) is None
+
+
+@requires_vec
+def test_repository_uses_fresh_index_and_ignores_stale_one(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    repository = SQLiteDocumentRepository(db_path)
+    rng = np.random.RandomState(3)
+    docs = repository.save_many([
+        Document(path=f"doc{i}", url=f"https://example.com/{i}", text=f"doc {i}",
+                 category="python" if i % 2 else "vue")
+        for i in range(20)
+    ])
+    chunks = repository.replace_chunks_many([
+        Chunk(document_id=doc.id, chunk_index=j, text=f"{doc.path}-{j}")
+        for doc in docs for j in range(3)
+    ])
+    repository.save_embeddings_many(
+        [c.id for c in chunks], rng.randn(len(chunks), 384).astype("float32")
+    )
+    query = rng.randn(384).astype("float32")
+    expected = repository.search_by_vector(query, category="python", top_k=5)
+
+    assert export_vector_index("numpy", repository, db_path)["count"] == len(chunks)
+    assert (Path(vector_index_dir(db_path)) / "embeddings.npy").exists()
+    repository.vector_engine = load_vector_index("numpy", db_path)
+    actual = repository.search_by_vector(query, category="python", top_k=5)
+
+    assert [(d.id, d.text) for d, _ in actual] == [(d.id, d.text) for d, _ in expected]
+    np.testing.assert_allclose([s for _, s in actual], [s for _, s in expected], rtol=1e-4)
+
+    # 書き出し後に埋め込みが変わったら、古い索引は使わない
+    repository.save_embeddings_many([chunks[0].id], (query + 0).reshape(1, -1))
+    (top, distance), = repository.search_by_vector(query, top_k=1)
+    assert top.text == chunks[0].text
+    assert distance == pytest.approx(0.0, abs=1e-4)
+    repository.close()
+
+
+@requires_vec
+@requires_hnswlib
+def test_repository_search_through_hnsw_index(tmp_path):
+    db_path = str(tmp_path / "techdocs.db")
+    repository = SQLiteDocumentRepository(db_path)
+    rng = np.random.RandomState(4)
+    docs = repository.save_many([
+        Document(path=f"doc{i}", url=f"https://example.com/{i}", text=f"doc {i}",
+                 category="python" if i % 2 else "vue")
+        for i in range(30)
+    ])
+    chunks = repository.replace_chunks_many([
+        Chunk(document_id=doc.id, chunk_index=j, text=f"{doc.path}-{j}")
+        for doc in docs for j in range(2)
+    ])
+    repository.save_embeddings_many(
+        [c.id for c in chunks], rng.randn(len(chunks), 384).astype("float32")
+    )
+    query = rng.randn(384).astype("float32")
+    expected = repository.search_by_vector(query, category="vue", top_k=5)
+
+    assert export_vector_index("hnsw", repository, db_path)["count"] == len(chunks)
+    repository.vector_engine = load_vector_index("hnsw", db_path)
+    assert isinstance(repository.vector_engine, HnswVectorIndex)
+    actual = repository.search_by_vector(query, category="vue", top_k=5)
+
+    assert [d.id for d, _ in actual] == [d.id for d, _ in expected]
+    np.testing.assert_allclose([s for _, s in actual], [s for _, s in expected], rtol=1e-4)
+    repository.close()
+
+
+class RepeatingIndex:
+    """同じチャンクだけを k 件返すベクトル索引（要求された k を記録する）"""
+
+    def __init__(self, chunk_id, revision, metric):
+        self.chunk_id = chunk_id
+        self.revision = revision
+        self.metric = metric
+        self.requested = []
+
+    def search(self, query, category, k):
+        self.requested.append(k)
+        return [(self.chunk_id, 0.0)] * k
+
+
+@requires_vec
+def test_repository_caps_vector_index_oversampling(tmp_path):
+    repository = SQLiteDocumentRepository(str(tmp_path / "techdocs.db"))
+    doc, = repository.save_many([
+        Document(path="doc", url="https://example.com/doc", text="doc", category="python")
+    ])
+    chunk, = repository.replace_chunks_many([Chunk(document_id=doc.id, chunk_index=0, text="doc")])
+    repository.save_embeddings_many([chunk.id], np.ones((1, 384), dtype="float32"))
+    engine = RepeatingIndex(chunk.id, repository.get_embeddings_revision(), repository.score_metric)
+    repository.vector_engine = engine
+
+    # ドキュメントが足りなくても、k を上限まで増やしたら打ち切る
+    results = repository.search_by_vector(np.ones(384, dtype="float32"), top_k=5)
+
+    assert [d.id for d, _ in results] == [doc.id]
+    assert engine.requested == [20, 80, 320, 1280, 4096]
+    repository.close()